@@ -2,7 +2,6 @@
 import open3d as o3d
 
 import numpy as np
-from numpy import linalg as la
 import csv
 import math
 
@@ -12,6 +11,9 @@ from mpl_toolkits.mplot3d.art3d import Poly3DCollection
 
 # Functionalities for point cloud processing and computing the ideal grasping region:
 from point_cloud_module.process_point_cloud import point_cloud
+# Batched screw motions:
+from point_cloud_module.screw_motion import axis_angle_to_rotation
+from point_cloud_module.screw_motion import screw_transformations
 
 from time import perf_counter
 import argparse
@@ -34,27 +36,17 @@ def read_csv(filename):
     return datapoints
 
 ''' Function to get a rotation matrix given an axis and a angle:
-    Note the angle should be in radians and axis should be a numpy array.'''
+    Note the angle should be in radians and axis should be a numpy array. The rotation is computed using the closed form Rodrigues 
+    formula of point_cloud_module.screw_motion, which also accepts arrays of axes and angles.'''
 def axis_angle_to_rot(axis, angle):
-    axis = axis/la.norm(axis)
-
-    omega = np.asarray([[0, -axis[2], axis[1]],
-                        [axis[2], 0, -axis[0]],
-                        [-axis[1], axis[0], 0]])
-
-    R = np.eye(3) + (math.sin(angle)*omega) + ((1 - math.cos(angle))*la.matrix_power(omega, 2))
-    return R
+    return axis_angle_to_rotation(axis, angle)
 
 ''' Function to compute a 4x4 transformation matrix given a screw axis and the magnitude of displacement about
     that axis:
-    Note: By default for this function we always assume that the pitch is 0 i.e. pure rotation about the screw axis. '''
+    Note: By default for this function we always assume that the pitch is 0 i.e. pure rotation about the screw axis. 
+    Arrays of screw parameters give a stack of transformations (see point_cloud_module.screw_motion.screw_transformations). '''
 def get_transformation_for_screw(axis, pitch, theta, point):
-    R = axis_angle_to_rot(axis, theta)
-    p = np.reshape(np.matmul((np.eye(3) - R),point)  + (pitch*theta*axis), [3])
-    g = np.eye(4,4)
-    g[0:3, 0:3] = R
-    g[0:3, 3] = p
-    return g
+    return screw_transformations(axis, point, pitch, theta)
 
 '''Function builds an object of the point_cloud class'''
 def build_cloud_object(cloud_object, pcd):
@@ -81,9 +73,7 @@ def pivoting_motion(cloud_object, num_pose):
     
     # desired_grasp_pose_object_frame = cloud_object.computgrasping_poses, grasp_flaged_end_effector_poses[num_pose]
     desired_grasp_pose_object_frame_final = np.matmul(g, desired_grasp_pose_object_frame)
-    desired_grasp_pose_base_frame_final = np.eye(4,4)
-    desired_grasp_pose_base_frame_final[0:3, 0:3] = np.matmul(cloud_object.R_bounding_box, desired_grasp_pose_object_frame_final[0:3, 0:3])
-    desired_grasp_pose_base_frame_final[0:3, 3] = np.reshape(cloud_object.p_bounding_box + np.dot(cloud_object.R_bounding_box, np.reshape(desired_grasp_pose_object_frame_final[0:3, 3], [3,1])), [3])
+    desired_grasp_pose_base_frame_final = np.matmul(cloud_object.g_bounding_box, desired_grasp_pose_object_frame_final)
 
     # Storing the poses for preprocessing: 
     # grasping_poses = np.asarray([cloud_object.computed_end_effector_poses_inter_base[num_pose], cloud_object.computed_end_effector_poses_base[num_pose], desired_grasp_pose_base_frame_final])
@@ -221,12 +211,19 @@ if __name__ == "__main__":
     # Add a command-line argument for the input filename
     parser.add_argument('--filename', type=str, help='Path to the input point cloud file')
     parser.add_argument('--visualize', action='store_true', help='Enable visualize flag')
+    parser.add_argument('--backend', type=str, default='torch', choices=['torch', 'torchscript', 'onnx', 'numpy'], help='Backend used for the metric prediction')
+    parser.add_argument('--adaptive', action='store_true', help='Refine the contact lattice only around the high metric region')
+    parser.add_argument('--multi_screw', action='store_true', help='Score the four bottom edges of the bounding box as pivoting axes and use the best one')
+    parser.add_argument('--multi_face', action='store_true', help='Sample contacts on both pairs of parallel faces when both dimensions fit within the gripper')
+    parser.add_argument('--target_increment', type=float, default=0.001, help='Spacing of the finest contact lattice used with --adaptive (metres)')
 
     # Parse the command-line arguments
     args = parser.parse_args()
 
     # Creating the cloud object and loading the necessary file:
     cloud_object = point_cloud()
+    cloud_object.metric_backend = args.backend
+    cloud_object.multi_face_sampling = args.multi_face
 
     # Read the point cloud data from the specified file    
     pcd = o3d.io.read_point_cloud(args.filename)
@@ -264,7 +261,14 @@ if __name__ == "__main__":
     metric_time_start = perf_counter()
     
     # cloud_object.predict_metric()
-    cloud_object.predict_metric_generic()
+    if args.multi_screw:
+        # All the candidate axes are evaluated in a single forward pass and the best one replaces the screw parameters above:
+        cloud_object.predict_metric_multi_screw()
+        print('Selected screw axis: ', cloud_object.screw_axis, ' through the point: ', cloud_object.point)
+    if args.adaptive:
+        cloud_object.predict_metric_adaptive(args.target_increment)
+    elif not args.multi_screw:
+        cloud_object.predict_metric_generic()
 
     print('Metric Value Predicted using Neural Network ... ')
 
@@ -288,6 +292,8 @@ if __name__ == "__main__":
 
     # Number of contact locations generated on the surface:
     print("Number of contact locations generated on the bounding box: ", cloud_object.sampled_c1.shape[0])
+    if args.adaptive:
+        print("Number of contact locations evaluated by the neural network: ", cloud_object.num_metric_evaluations)
 
     # Computed end-effector poses:
     print("Number of end-effector poses computed: ", len(cloud_object.computed_end_effector_poses_base))
@@ -1 +1 @@
-__all__ = {"data_loader", "neural_net"}
\ No newline at end of file
+__all__ = {"data_loader", "neural_net", "model_cache", "export_model", "numpy_inference"}
\ No newline at end of file
@@ -0,0 +1,185 @@
+'''Python Script to export a trained metric network checkpoint from Trained_Models/ as a frozen TorchScript or ONNX model.
+   The exported models can be evaluated without rebuilding metric_nn_generic and are loaded using load_exported_model.
+
+   Usage:
+   python -m neural_network_module.export_model --checkpoint Trained_Models/<checkpoint>.pth --format torchscript
+   python -m neural_network_module.export_model --checkpoint Trained_Models/<checkpoint>.pth --format onnx
+   python -m neural_network_module.export_model --checkpoint Trained_Models/<checkpoint>.pth --format numpy
+
+   By default the exported model is saved next to the checkpoint (<checkpoint>.pt for TorchScript, <checkpoint>.onnx for ONNX and 
+   <checkpoint>.npz for the weights used by neural_network_module.numpy_inference), which is where point_cloud.predict_metric_generic 
+   looks for it when metric_backend is 'torchscript', 'onnx' or 'numpy'.'''
+
+import os
+import re
+import argparse
+
+import numpy as np
+import torch
+from torch import nn
+from neural_network_module.neural_net import metric_nn_generic
+from neural_network_module.neural_net import fuse_metric_nn_generic
+
+
+# Normalization layers and activation functions as they appear in the names of the checkpoints:
+norm_layers = {'batch': nn.BatchNorm1d, 'layer': nn.LayerNorm, 'none': None}
+act_layers = {'relu': nn.ReLU, 'gelu': nn.GELU, 'tanh': nn.Tanh, 'silu': nn.SiLU}
+
+# File extensions of the exported models:
+export_extensions = {'torchscript': '.pt', 'onnx': '.onnx', 'numpy': '.npz'}
+
+# Activation functions supported by neural_network_module.numpy_inference:
+numpy_activations = {nn.ReLU: 'relu', nn.GELU: 'gelu', nn.Tanh: 'tanh', nn.SiLU: 'silu'}
+
+
+def parse_checkpoint_name(path):
+    '''
+        Reads the architecture of metric_nn_generic from the name of a checkpoint, for example:
+        depth_8_norm_batch_act_relu_residual_True_input_18_test_all_train_variation_1_additional_features_extra_True.pth
+        Returns a dictionary with the keys depth, norm, act_layer, residual and input_size.
+    '''
+    match = re.search(r'depth_(\d+)_norm_([a-z]+)_act_([a-z]+)_residual_(True|False)_input_(\d+)', os.path.basename(path))
+    if match is None:
+        raise ValueError('Unable to read the architecture from the checkpoint name: ' + path)
+
+    depth, norm, act, residual, input_size = match.groups()
+    if norm not in norm_layers or act not in act_layers:
+        raise ValueError('Unknown normalization or activation in the checkpoint name: ' + path)
+
+    return {'depth': int(depth), 'norm': norm_layers[norm], 'act_layer': act_layers[act], 'residual': residual == 'True',
+            'input_size': int(input_size)}
+
+
+def exported_model_path(checkpoint, export_format):
+    '''Default path of the exported model corresponding to a checkpoint.'''
+    if export_format not in export_extensions:
+        raise ValueError('Unknown export format: ' + str(export_format))
+    return os.path.splitext(checkpoint)[0] + export_extensions[export_format]
+
+
+def load_checkpoint(path, input_size, hidden_size=8, depth=2, norm=nn.LayerNorm, act_layer=nn.GELU, residual=False, post_norm=False):
+    '''Loads the checkpoint into metric_nn_generic and returns the model optimized for inference using fuse_metric_nn_generic.'''
+    model = metric_nn_generic(input_size, hidden_size=hidden_size, depth=depth, norm=norm, act_layer=act_layer, residual=residual, post_norm=post_norm)
+    model.load_state_dict(torch.load(path, map_location='cpu'))
+    return fuse_metric_nn_generic(model.eval())
+
+
+@torch.no_grad()
+def export_torchscript(model, input_size, path):
+    '''Traces the model and saves the frozen TorchScript graph. The parameters are inlined as constants by torch.jit.freeze.'''
+    example = torch.zeros(2, input_size)
+    traced = torch.jit.trace(model.eval(), example)
+    frozen = torch.jit.freeze(traced)
+    frozen.save(path)
+    return path
+
+
+@torch.no_grad()
+def export_onnx(model, input_size, path, opset_version=13):
+    '''Saves the model as an ONNX graph. The number of datapoints (first dimension of the input) is kept dynamic.'''
+    example = torch.zeros(2, input_size)
+    torch.onnx.export(model.eval(), example, path, input_names=['x_data'], output_names=['metric'], opset_version=opset_version,
+                      dynamic_axes={'x_data': {0: 'num_datapoints'}, 'metric': {0: 'num_datapoints'}})
+    return path
+
+
+@torch.no_grad()
+def export_numpy(model, path):
+    '''
+        Saves the weights of a model returned by fuse_metric_nn_generic to a .npz file which is evaluated by numpy_inference.numpy_metric_model.
+        Every MLP (embedding, block_<i> and regressor) is stored as an array of operation names <name>_ops and the parameters of the 
+        j-th operation as <name>_<j>_weight, <name>_<j>_bias and <name>_<j>_eps.
+    '''
+    arrays = {'residual': np.asarray(model.residual), 'num_blocks': np.asarray(len(model.blocks))}
+    mlps = [('embedding', model.embedding)] + [('block_' + str(i), block) for i, block in enumerate(model.blocks)] + [('regressor', model.regressor)]
+
+    for name, mlp in mlps:
+        layers = [] if isinstance(mlp, nn.Identity) else list(mlp)
+        ops = []
+        for j, layer in enumerate(layers):
+            prefix = name + '_' + str(j)
+            if isinstance(layer, nn.Linear):
+                ops.append('linear')
+                arrays[prefix + '_weight'] = layer.weight.numpy().astype(np.float32)
+                arrays[prefix + '_bias'] = layer.bias.numpy().astype(np.float32)
+            elif isinstance(layer, nn.LayerNorm):
+                ops.append('layer_norm')
+                arrays[prefix + '_weight'] = layer.weight.numpy().astype(np.float32)
+                arrays[prefix + '_bias'] = layer.bias.numpy().astype(np.float32)
+                arrays[prefix + '_eps'] = np.asarray(layer.eps)
+            elif type(layer) in numpy_activations:
+                if isinstance(layer, nn.GELU) and getattr(layer, 'approximate', 'none') == 'tanh':
+                    ops.append('gelu_tanh')
+                else:
+                    ops.append(numpy_activations[type(layer)])
+            else:
+                raise ValueError('Layer not supported by the NumPy backend: ' + type(layer).__name__)
+        arrays[name + '_ops'] = np.asarray(ops, dtype=str)
+
+    # Writing to an open file so that np.savez does not append a second extension:
+    with open(path, 'wb') as f:
+        np.savez(f, **arrays)
+    return path
+
+
+def export_checkpoint(checkpoint, export_format, output=None, hidden_size=8, post_norm=False):
+    '''Exports a checkpoint from Trained_Models/ using the architecture read from its name. Returns the path of the exported model.'''
+    config = parse_checkpoint_name(checkpoint)
+    input_size = config.pop('input_size')
+    model = load_checkpoint(checkpoint, input_size, hidden_size=hidden_size, post_norm=post_norm, **config)
+
+    if output is None:
+        output = exported_model_path(checkpoint, export_format)
+
+    if export_format == 'torchscript':
+        return export_torchscript(model, input_size, output)
+    elif export_format == 'onnx':
+        return export_onnx(model, input_size, output)
+    elif export_format == 'numpy':
+        return export_numpy(model, output)
+    else:
+        raise ValueError('Unknown export format: ' + str(export_format))
+
+
+#### Wrapper class so that an onnxruntime session can be used in place of a torch model by batch_inference:
+class onnx_metric_model(object):
+    """Callable ONNX model which takes and returns torch tensors"""
+
+    def __init__(self, path):
+        # onnxruntime is only needed when the ONNX backend is used:
+        import onnxruntime
+        self.session = onnxruntime.InferenceSession(path, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, x):
+        return torch.from_numpy(self.session.run(None, {self.input_name: x.numpy()})[0])
+
+    def eval(self):
+        return self
+
+
+def load_exported_model(path):
+    '''
+        Loads a model saved by export_torchscript or export_onnx. The format is determined by the file extension.
+        The returned model can be evaluated using neural_net.batch_inference.
+    '''
+    extension = os.path.splitext(path)[1]
+    if extension == export_extensions['torchscript']:
+        model = torch.jit.load(path, map_location='cpu')
+        return model.eval()
+    elif extension == export_extensions['onnx']:
+        return onnx_metric_model(path)
+    else:
+        raise ValueError('Unknown exported model format: ' + path)
+
+
+# MAIN FUNCTION:
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Export a trained metric network checkpoint')
+    parser.add_argument('--checkpoint', type=str, required=True, help='Path to the .pth checkpoint in Trained_Models/')
+    parser.add_argument('--format', type=str, default='torchscript', choices=list(export_extensions.keys()), help='Format of the exported model')
+    parser.add_argument('--output', type=str, default=None, help='Path of the exported model, defaults to the checkpoint path with the extension of the format')
+    args = parser.parse_args()
+
+    path = export_checkpoint(args.checkpoint, args.format, args.output)
+    print('Exported model saved to: ', path)
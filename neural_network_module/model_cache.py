@@ -0,0 +1,91 @@
+'''Python Script to keep the trained metric networks in memory so that a checkpoint from Trained_Models/ is only loaded once per process.'''
+
+import os
+import threading
+from collections import OrderedDict
+
+import torch
+from torch import nn
+from neural_network_module.neural_net import metric_nn_generic
+from neural_network_module.neural_net import fuse_metric_nn_generic
+from neural_network_module.neural_net import quantize_metric_nn
+from neural_network_module.export_model import load_exported_model
+
+
+#### Cache class to store the trained metric networks in eval mode. The cache is keyed by the checkpoint path along with the
+# architecture parameters, and the least recently used model is evicted once more than max_models models are resident.
+class metric_nn_cache(object):
+    """Least recently used cache of trained metric_nn_generic models"""
+
+### Constructor to initialize an object of the class metric_nn_cache:
+    def __init__(self, max_models=4):
+        '''
+            max_models: int, maximum number of models which are kept in memory at the same time
+        '''
+        self.max_models = max_models
+        self.models = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_model(self, path, input_size, hidden_size=8, depth=2, norm=nn.LayerNorm, act_layer=nn.GELU, residual=False, post_norm=False, fuse=False, quantize=False):
+        '''
+            Returns the model corresponding to the checkpoint and architecture, loading the weights only if it is not cached yet.
+            path: string, path to the .pth file containing the state dict of the model
+            input_size, hidden_size, depth, norm, act_layer, residual, post_norm: architecture parameters of metric_nn_generic
+            fuse: boolean, whether to return the model optimized for inference using fuse_metric_nn_generic
+            quantize: boolean, whether to return the model with dynamic int8 linear layers using quantize_metric_nn (fuse is ignored)
+        '''
+        key = (os.path.abspath(path), input_size, hidden_size, depth, norm, act_layer, residual, post_norm, fuse, quantize)
+
+        with self.lock:
+            if key in self.models:
+                self.models.move_to_end(key)
+                return self.models[key]
+
+            model = metric_nn_generic(input_size, hidden_size=hidden_size, depth=depth, norm=norm, act_layer=act_layer, residual=residual, post_norm=post_norm)
+            model.load_state_dict(torch.load(path, map_location='cpu'))
+            model.eval()
+            if quantize:
+                model = quantize_metric_nn(model)
+            elif fuse:
+                model = fuse_metric_nn_generic(model)
+
+            self.models[key] = model
+
+            # Evicting the least recently used models:
+            while len(self.models) > self.max_models:
+                self.models.popitem(last=False)
+
+        return model
+
+    def get_exported_model(self, path):
+        '''
+            Returns the TorchScript or ONNX model saved by neural_network_module.export_model, loading it only if it is not cached yet.
+            path: string, path to the exported .pt or .onnx file
+        '''
+        key = (os.path.abspath(path), 'exported')
+
+        with self.lock:
+            if key in self.models:
+                self.models.move_to_end(key)
+                return self.models[key]
+
+            model = load_exported_model(path)
+            self.models[key] = model
+
+            # Evicting the least recently used models:
+            while len(self.models) > self.max_models:
+                self.models.popitem(last=False)
+
+        return model
+
+    def clear(self):
+        with self.lock:
+            self.models.clear()
+
+    def __len__(self):
+        with self.lock:
+            return len(self.models)
+
+
+# Process-wide cache shared by all the objects of the point_cloud class:
+metric_model_cache = metric_nn_cache()
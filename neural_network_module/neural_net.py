@@ -4,6 +4,7 @@
 from torch import nn
 import torch
 import math
+import copy
 import numpy as np
 import torch.nn.functional as F
 
@@ -132,7 +133,140 @@ class metric_nn_generic(nn.Module):
         
         return y_pred
 
-        
+
+class metric_nn_fused(nn.Module):
+
+    def __init__(self, embedding, blocks, regressor, residual=False):
+        '''
+            Inference only version of metric_nn_generic which is created using fuse_metric_nn_generic.
+            embedding: nn.Module, embedding MLP (nn.Identity when the network has depth 1)
+            blocks: list of nn.Module, hidden MLPs with the normalization folded into their linear layers
+            regressor: nn.Module, regressor MLP
+            residual: boolean, whether the hidden MLPs use skip connections
+        '''
+        super(metric_nn_fused, self).__init__()
+        self.embedding = embedding
+        self.blocks = nn.ModuleList(blocks)
+        self.regressor = regressor
+        self.residual = residual
+
+    def forward(self, x):
+        embedding = self.embedding(x)
+        for block in self.blocks:
+            if self.residual:
+                embedding = embedding + block(embedding)
+            else:
+                embedding = block(embedding)
+        return self.regressor(embedding)
+
+
+def fold_linear(mlp, pre_norm=None, post_norm=None):
+    '''
+        Converts an MLP into nn.Sequential(Linear, activation, Linear) without the dropout layers. A BatchNorm1d layer applied before the MLP 
+        (pre_norm) is folded into fc1 and one applied after the MLP (post_norm) is folded into fc2. In eval mode batch normalization is the 
+        affine transform y = scale*x + shift, where scale = weight/sqrt(running_var + eps) and shift = bias - running_mean*scale.
+        Normalization layers that cannot be folded (for example nn.LayerNorm) are kept in the sequence.
+    '''
+    fc1 = copy.deepcopy(mlp.fc1)
+    fc2 = copy.deepcopy(mlp.fc2)
+    layers = [fc1, copy.deepcopy(mlp.act), fc2]
+
+    if pre_norm is not None:
+        if is_foldable(pre_norm):
+            scale, shift = batch_norm_affine(pre_norm)
+            fc1.bias.copy_(fc1.bias + torch.mv(fc1.weight, shift))
+            fc1.weight.copy_(fc1.weight*scale.unsqueeze(0))
+        elif not isinstance(pre_norm, nn.Identity):
+            layers.insert(0, copy.deepcopy(pre_norm))
+
+    if post_norm is not None:
+        if is_foldable(post_norm):
+            scale, shift = batch_norm_affine(post_norm)
+            fc2.weight.copy_(fc2.weight*scale.unsqueeze(1))
+            fc2.bias.copy_(fc2.bias*scale + shift)
+        elif not isinstance(post_norm, nn.Identity):
+            layers.append(copy.deepcopy(post_norm))
+
+    return nn.Sequential(*layers)
+
+
+def is_foldable(norm):
+    # Batch normalization can only be folded when it uses the running statistics in eval mode:
+    return isinstance(norm, nn.BatchNorm1d) and norm.track_running_stats and norm.running_mean is not None
+
+
+def batch_norm_affine(norm):
+    scale = torch.rsqrt(norm.running_var + norm.eps)
+    if norm.weight is not None:
+        scale = norm.weight*scale
+    shift = -norm.running_mean*scale
+    if norm.bias is not None:
+        shift = shift + norm.bias
+    return scale, shift
+
+
+@torch.no_grad()
+def fuse_metric_nn_generic(model):
+    '''
+        Optimizes a trained metric_nn_generic for inference. Every BatchNorm1d layer in hidden_mlps is folded into the neighbouring nn.Linear
+        and the nn.Dropout layers are removed. The returned metric_nn_fused is in eval mode and its outputs match the outputs of the 
+        original model in eval mode within floating point tolerance.
+    '''
+    model = model.eval()
+    blocks = []
+
+    if model.depth >= 2:
+        embedding = fold_linear(model.embedding_mlp)
+        for i in range(0, len(model.hidden_mlps), 2):
+            mlp, norm = model.hidden_mlps[i], model.hidden_mlps[i+1]
+            # Same order as the forward pass of metric_nn_generic:
+            if model.residual and not model.post_norm:
+                blocks.append(fold_linear(mlp, pre_norm=norm))
+            else:
+                blocks.append(fold_linear(mlp, post_norm=norm))
+    else:
+        embedding = nn.Identity()
+
+    regressor = fold_linear(model.regressor_mlp)
+
+    # The skip connections are only used when the model has hidden MLPs:
+    fused = metric_nn_fused(embedding, blocks, regressor, residual=model.residual and model.depth > 2)
+    return fused.eval()
+
+
+def quantize_metric_nn(model):
+    '''
+        Dynamic int8 quantization for CPU inference. The weights of every nn.Linear layer are stored as int8 with one scale per output 
+        channel and the activations are quantized on the fly for each batch. The model should not be fused using fuse_metric_nn_generic:
+        folding the BatchNorm1d layers rescales the input columns of the linear layers which increases the rounding error of the int8 
+        activations, so the normalization layers are kept in float32 instead. With the small layers of metric_nn_generic the quantized model
+        is slower than the fused float32 model, it is only used by quantization_report.py.
+    '''
+    return torch.quantization.quantize_dynamic(model.eval(), {nn.Linear: torch.quantization.per_channel_dynamic_qconfig}, dtype=torch.qint8)
+
+
+@torch.no_grad()
+def batch_inference(model, x_data, chunk_size=None):
+    '''
+        Runs the model on the complete feature matrix without the Dataset and DataLoader classes. 
+        x_data: numpy array of shape (N, input_size), it is passed to the model through torch.from_numpy
+        chunk_size: int, number of rows evaluated per forward pass. When None the whole matrix is evaluated in a single pass.
+        Returns the predictions as a numpy array which shares its memory with the output tensor.
+    '''
+    # The conversion only copies when x_data is not already a contiguous float32 array:
+    x = torch.from_numpy(np.ascontiguousarray(x_data, dtype=np.float32))
+
+    if chunk_size is None or chunk_size >= x.shape[0]:
+        return model(x).numpy()
+
+    y_pred = None
+    for start in range(0, x.shape[0], chunk_size):
+        out = model(x[start:start+chunk_size])
+        if y_pred is None:
+            y_pred = torch.empty((x.shape[0],) + tuple(out.shape[1:]), dtype=out.dtype)
+        y_pred[start:start+out.shape[0]] = out
+    return y_pred.numpy()
+
 def scaled_dot_product(q, k, v, mask=None):
     d_k = q.size()[-1]
     attn_logits = torch.matmul(q, k.transpose(-2, -1))
@@ -0,0 +1,129 @@
+'''Python Script to evaluate the trained metric networks using NumPy only. This module does not import torch.
+
+   The weights are exported from a metric_nn_generic checkpoint to a .npz file using:
+   python -m neural_network_module.export_model --checkpoint Trained_Models/<checkpoint>.pth --format numpy
+
+   The export uses fuse_metric_nn_generic, so the batch normalization layers are already folded into the linear layers and the
+   forward pass only consists of matrix multiplications, activation functions and (if present) layer normalization. The computation
+   is carried out in float32 like the torch backend and the raw outputs agree with the torch backend within an absolute tolerance of
+   1e-5 (the remaining difference comes from the order of the floating point summations in the matrix multiplications).'''
+
+import os
+import math
+import functools
+
+import numpy as np
+from scipy.special import erf
+
+
+# File extension of the exported weights:
+numpy_extension = '.npz'
+
+
+def numpy_model_path(checkpoint):
+    '''Default path of the .npz file corresponding to a checkpoint.'''
+    return os.path.splitext(checkpoint)[0] + numpy_extension
+
+
+# Activation functions with the same definitions as the corresponding torch.nn modules:
+def relu(x):
+    return np.maximum(x, 0, out=x)
+
+def gelu(x):
+    return 0.5*x*(1.0 + erf(x/math.sqrt(2.0)))
+
+def gelu_tanh(x):
+    return 0.5*x*(1.0 + np.tanh(math.sqrt(2.0/math.pi)*(x + 0.044715*x**3)))
+
+def tanh(x):
+    return np.tanh(x, out=x)
+
+def silu(x):
+    return x/(1.0 + np.exp(-x))
+
+activations = {'relu': relu, 'gelu': gelu, 'gelu_tanh': gelu_tanh, 'tanh': tanh, 'silu': silu}
+
+
+def layer_norm(x, weight, bias, eps):
+    mean = np.mean(x, axis=-1, keepdims=True)
+    var = np.var(x, axis=-1, keepdims=True)
+    return (x - mean)/np.sqrt(var + eps)*weight + bias
+
+
+#### Class to evaluate a metric_nn_generic model exported to a .npz file:
+class numpy_metric_model(object):
+    """NumPy version of metric_nn_fused"""
+
+### Constructor to initialize an object of the class numpy_metric_model:
+    def __init__(self, path):
+        '''
+            path: string, path to the .npz file written by neural_network_module.export_model.export_numpy
+        '''
+        with np.load(path) as data:
+            self.residual = bool(data['residual'])
+            self.embedding = self.read_layers(data, 'embedding')
+            self.blocks = [self.read_layers(data, 'block_' + str(i)) for i in range(int(data['num_blocks']))]
+            self.regressor = self.read_layers(data, 'regressor')
+
+    @staticmethod
+    def read_layers(data, name):
+        '''Reads the layers of a single MLP as a list of (operation, parameters) tuples.'''
+        layers = []
+        for j, op in enumerate(data[name + '_ops']):
+            prefix = name + '_' + str(j)
+            if op == 'linear':
+                # The weights are stored as (out_features, in_features) like nn.Linear and transposed once here:
+                layers.append((op, (np.ascontiguousarray(data[prefix + '_weight'].T), data[prefix + '_bias'])))
+            elif op == 'layer_norm':
+                layers.append((op, (data[prefix + '_weight'], data[prefix + '_bias'], float(data[prefix + '_eps']))))
+            elif op in activations:
+                layers.append((op, None))
+            else:
+                raise ValueError('Unknown layer in the exported model: ' + str(op))
+        return layers
+
+    @staticmethod
+    def run_layers(layers, x):
+        for op, params in layers:
+            if op == 'linear':
+                x = np.matmul(x, params[0])
+                x += params[1]
+            elif op == 'layer_norm':
+                x = layer_norm(x, *params)
+            else:
+                x = activations[op](x)
+        return x
+
+    def __call__(self, x):
+        embedding = self.run_layers(self.embedding, x)
+        for block in self.blocks:
+            if self.residual:
+                embedding = embedding + self.run_layers(block, embedding)
+            else:
+                embedding = self.run_layers(block, embedding)
+        return self.run_layers(self.regressor, embedding)
+
+    def predict(self, x_data, chunk_size=None):
+        '''
+            Same as neural_net.batch_inference for the torch models.
+            x_data: numpy array of shape (N, input_size)
+            chunk_size: int, number of rows evaluated per forward pass. When None the whole matrix is evaluated in a single pass.
+        '''
+        x = np.ascontiguousarray(x_data, dtype=np.float32)
+
+        if chunk_size is None or chunk_size >= x.shape[0]:
+            return self(x)
+
+        y_pred = None
+        for start in range(0, x.shape[0], chunk_size):
+            out = self(x[start:start+chunk_size])
+            if y_pred is None:
+                y_pred = np.empty((x.shape[0],) + out.shape[1:], dtype=out.dtype)
+            y_pred[start:start+out.shape[0]] = out
+        return y_pred
+
+
+@functools.lru_cache(maxsize=4)
+def load_numpy_model(path):
+    '''Loads the .npz file only once per process, similar to model_cache.metric_model_cache for the torch models.'''
+    return numpy_metric_model(path)
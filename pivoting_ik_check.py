@@ -3,7 +3,6 @@ from __future__ import annotations
 import open3d as o3d
 
 import numpy as np
-from numpy import linalg as la
 import csv
 import math
 
@@ -16,6 +15,9 @@ from scipy.spatial.transform import Rotation as Rot
 
 # Functionalities for point cloud processing and computing the ideal grasping region:
 from point_cloud_module.process_point_cloud import point_cloud
+# Batched screw motions:
+from point_cloud_module.screw_motion import axis_angle_to_rotation
+from point_cloud_module.screw_motion import screw_transformations
 
 from time import perf_counter
 import argparse
@@ -40,27 +42,17 @@ def read_csv(filename):
     return datapoints
 
 ''' Function to get a rotation matrix given an axis and a angle:
-    Note the angle should be in radians and axis should be a numpy array.'''
+    Note the angle should be in radians and axis should be a numpy array. The rotation is computed using the closed form Rodrigues 
+    formula of point_cloud_module.screw_motion, which also accepts arrays of axes and angles.'''
 def axis_angle_to_rot(axis, angle):
-    axis = axis/la.norm(axis)
-
-    omega = np.asarray([[0, -axis[2], axis[1]],
-                        [axis[2], 0, -axis[0]],
-                        [-axis[1], axis[0], 0]])
-
-    R = np.eye(3) + (math.sin(angle)*omega) + ((1 - math.cos(angle))*la.matrix_power(omega, 2))
-    return R
+    return axis_angle_to_rotation(axis, angle)
 
 ''' Function to compute a 4x4 transformation matrix given a screw axis and the magnitude of displacement about
     that axis:
-    Note: By default for this function we always assume that the pitch is 0 i.e. pure rotation about the screw axis. '''
+    Note: By default for this function we always assume that the pitch is 0 i.e. pure rotation about the screw axis. 
+    Arrays of screw parameters give a stack of transformations (see point_cloud_module.screw_motion.screw_transformations). '''
 def get_transformation_for_screw(axis, pitch, theta, point):
-    R = axis_angle_to_rot(axis, theta)
-    p = np.reshape(np.matmul((np.eye(3) - R),point)  + (pitch*theta*axis), [3])
-    g = np.eye(4,4)
-    g[0:3, 0:3] = R
-    g[0:3, 3] = p
-    return g
+    return screw_transformations(axis, point, pitch, theta)
 
 '''Function builds an object of the point_cloud class'''
 def build_cloud_object(cloud_object, pcd):
@@ -87,9 +79,7 @@ def pivoting_motion(cloud_object, num_pose):
     
     # desired_grasp_pose_object_frame = cloud_object.computgrasping_poses, grasp_flaged_end_effector_poses[num_pose]
     desired_grasp_pose_object_frame_final = np.matmul(g, desired_grasp_pose_object_frame)
-    desired_grasp_pose_base_frame_final = np.eye(4,4)
-    desired_grasp_pose_base_frame_final[0:3, 0:3] = np.matmul(cloud_object.R_bounding_box, desired_grasp_pose_object_frame_final[0:3, 0:3])
-    desired_grasp_pose_base_frame_final[0:3, 3] = np.reshape(cloud_object.p_bounding_box + np.dot(cloud_object.R_bounding_box, np.reshape(desired_grasp_pose_object_frame_final[0:3, 3], [3,1])), [3])
+    desired_grasp_pose_base_frame_final = np.matmul(cloud_object.g_bounding_box, desired_grasp_pose_object_frame_final)
 
     # Storing the poses for preprocessing: 
     # grasping_poses = np.asarray([cloud_object.computed_end_effector_poses_inter_base[num_pose], cloud_object.computed_end_effector_poses_base[num_pose], desired_grasp_pose_base_frame_final])
@@ -118,10 +108,10 @@ def get_logs(cloud_object, data_dir):
     np.savetxt(f"{data_dir}/pose_bounding_box.csv", cloud_object.g_bounding_box, delimiter=',')
 
     # Extracting the Z and the Y axis:
-    cloud_object.computed_end_effector_axes_base = np.asarray([np.reshape(np.asarray([pose[0:3, 2], pose[0:3, 1]]), [6]) for pose in cloud_object.computed_end_effector_poses_base])
-    cloud_object.computed_end_effector_axes_inter_base = np.asarray([np.reshape(np.asarray([pose[0:3, 2], pose[0:3, 1]]), [6]) for pose in cloud_object.computed_end_effector_poses_inter_base])
-    cloud_object.computed_end_effector_locations_base = np.asarray([pose[0:3, 3] for pose in cloud_object.computed_end_effector_poses_base])
-    cloud_object.computed_end_effector_locations_inter_base = np.asarray([pose[0:3, 3] for pose in cloud_object.computed_end_effector_poses_inter_base])
+    cloud_object.computed_end_effector_axes_base = cloud_object.end_effector_poses_base.axes('poses')
+    cloud_object.computed_end_effector_axes_inter_base = cloud_object.end_effector_poses_base.axes('poses_inter')
+    cloud_object.computed_end_effector_locations_base = cloud_object.end_effector_poses_base.locations('poses')
+    cloud_object.computed_end_effector_locations_inter_base = cloud_object.end_effector_poses_base.locations('poses_inter')
 
     # Saving locations of the poses:
     np.savetxt(f"{data_dir}/computed_end_effector_locations_base.csv", cloud_object.computed_end_effector_locations_base, delimiter=',')
@@ -135,24 +125,15 @@ def get_logs(cloud_object, data_dir):
     # Saving the Z and Y axes corresponding to the pregrasp pose:
     np.savetxt(f"{data_dir}/computed_end_effector_axes_inter_base.csv", cloud_object.computed_end_effector_axes_inter_base, delimiter=',')
 
-'''Function to send the grasp poses through RPC:'''
-def trigger_motion_generator(cloud_object, hostname):
-    # Saving the screw transformation for pivoting:
-    # Computing the final end-effector pose after grasping based on the screw axis:
+'''Function to send the grasp poses through RPC. The end-effector poses of the num_grid_cells best grid cells of the ideal grasping region
+   (all of them when None) are sampled lazily in rank order and the search stops at the first feasible motion plan. The occupied grid 
+   cells below the metric threshold are tried as well if all_occupied is True:'''
+def trigger_motion_generator(cloud_object, hostname, num_grid_cells=None, all_occupied=False):
+    # Screw motion for pivoting, passed to generate_waypoint_bundles to compute the goal poses after the pivoting motion:
     pitch = 0
     theta = math.radians(90)
-    g = get_transformation_for_screw(cloud_object.screw_axis, pitch, theta, cloud_object.point)
-
-    # Extracting the Z and the Y axis:
-    cloud_object.computed_end_effector_axes_base = np.asarray([np.reshape(np.asarray([pose[0:3, 2], pose[0:3, 1]]), [6]) for pose in cloud_object.computed_end_effector_poses_base])
-    cloud_object.computed_end_effector_axes_inter_base = np.asarray([np.reshape(np.asarray([pose[0:3, 2], pose[0:3, 1]]), [6]) for pose in cloud_object.computed_end_effector_poses_inter_base])
-    cloud_object.computed_end_effector_locations_base = np.asarray([pose[0:3, 3] for pose in cloud_object.computed_end_effector_poses_base])
-    cloud_object.computed_end_effector_locations_inter_base = np.asarray([pose[0:3, 3] for pose in cloud_object.computed_end_effector_poses_inter_base])
 
     grasp_info = {
-        "screw_tf": g.tolist(),
-        "ee_axes": cloud_object.computed_end_effector_axes_base.tolist(),
-        "ee_pos": cloud_object.computed_end_effector_locations_base.tolist(),
         "bbox_dimensions": np.reshape(cloud_object.dimensions, 3).tolist(),
         "bbox_pose": cloud_object.g_bounding_box.tolist()
     }
@@ -212,77 +193,51 @@ def trigger_motion_generator(cloud_object, hostname):
         pose = (pos.tolist(), quat.tolist())
         # proxy.reload_box(pose, size)
 
-        ee_base_pos_array = np.array(grasp_info["ee_pos"])
-        ee_base_axes_array = np.array(grasp_info["ee_axes"])
-
-        pre_grasp_tf = np.identity(4)
-        pre_grasp_tf[2, 3] = -pre_grasp_dist
-
-        bbox_pose = np.array(grasp_info["bbox_pose"])
-
-        screw_tf = np.matmul(bbox_pose, np.array(grasp_info["screw_tf"]))
-
-        approach_tf = np.identity(4)
-        approach_tf[2, 3] = 0.1
-
-        for idx, (ee_base_pos, ee_base_axis) in enumerate(
-            zip(ee_base_pos_array, ee_base_axes_array)
-        ):
-            ee_base_pose = np.identity(4)
-            ee_base_pose[0:3, 3] = ee_base_pos
-            ee_base_pose[0:3, 2] = ee_base_axis[0:3]
-
-            for axis_sign in [-1.0]:
-                ee_base_pose[0:3, 1] = axis_sign * ee_base_axis[3:6]
-                ee_base_pose[0:3, 0] = np.cross(
-                    ee_base_pose[0:3, 1], ee_base_pose[0:3, 2]
-                )
-
-                ee_base_pose_obj_frame = np.matmul(
-                    np.linalg.inv(bbox_pose), ee_base_pose
-                )
-
-                pre_grasp_pose = np.matmul(ee_base_pose, pre_grasp_tf)
-
-                goal_pose = np.matmul(screw_tf, ee_base_pose_obj_frame)
-
-                grasp_release_pose = np.matmul(goal_pose, pre_grasp_tf)
-
-                waypoints = []
-                waypoints.append(homogeneous_to_waypoint(pre_grasp_pose, 1))
-                waypoints.append(homogeneous_to_waypoint(ee_base_pose, 1))
-                waypoints.append(
-                    homogeneous_to_waypoint(ee_base_pose, 0)
-                )  # Grasp object
-                waypoints.append(homogeneous_to_waypoint(goal_pose, 0))
-                waypoints.append(
-                    homogeneous_to_waypoint(goal_pose, 1)
-                )  # Release object
-                waypoints.append(homogeneous_to_waypoint(grasp_release_pose, 1))
-
-                # Feasibility check of waypoints
-                logging.info("Checking feasibility of motion plan %d ...", idx)
-                motion_feasibile = log_result(
-                    *proxy.check_feasibility(waypoints, joint_positions, 5)
-                )  # q_init=joint_positions, n_points=5
-                logging.info(
-                    "Checking collision of motion plan %d with bounding box ...",
-                    idx,
-                )
-                no_bbox_collision = log_result(
-                    *proxy.check_box_collision(waypoints[1], 16)
-                )
-
-                # guiding_poses = np.concatenate([pre_grasp_pose, ee_base_pose, goal_pose, grasp_release_pose])
-                # np.savetxt("/home/dharun/guiding_poses.csv", guiding_poses, delimiter=',')
-
-                # proxy.add_waypoints(waypoints)
-                # return
-
-                if motion_feasibile and no_bbox_collision:
-                    logging.info("Sending waypoints to motion generator")
-                    proxy.add_waypoints(waypoints)
-                    return
+        # The sampled poses are used with the Y axis reversed (rotation of 180 degrees about the Z axis of the end-effector):
+        axis_sign = -1.0
+        flip_tf = np.diag([axis_sign, axis_sign, 1.0, 1.0])
+
+        # Waypoint bundles (pre-grasp, grasp, goal after pivoting and release poses) of the best grid cells first. A bundle is only computed 
+        # when it is pulled, the remaining ones are never computed once a feasible motion plan is found:
+        bundles = cloud_object.generate_waypoint_bundles(num_grid_cells, pre_grasp_dist, flip_tf, all_occupied, theta, pitch)
+        for idx, (bundle, _) in enumerate(bundles):
+            pre_grasp_pose, ee_base_pose, goal_pose, grasp_release_pose = bundle
+
+            waypoints = []
+            waypoints.append(homogeneous_to_waypoint(pre_grasp_pose, 1))
+            waypoints.append(homogeneous_to_waypoint(ee_base_pose, 1))
+            waypoints.append(
+                homogeneous_to_waypoint(ee_base_pose, 0)
+            )  # Grasp object
+            waypoints.append(homogeneous_to_waypoint(goal_pose, 0))
+            waypoints.append(
+                homogeneous_to_waypoint(goal_pose, 1)
+            )  # Release object
+            waypoints.append(homogeneous_to_waypoint(grasp_release_pose, 1))
+
+            # Feasibility check of waypoints
+            logging.info("Checking feasibility of motion plan %d ...", idx)
+            motion_feasibile = log_result(
+                *proxy.check_feasibility(waypoints, joint_positions, 5)
+            )  # q_init=joint_positions, n_points=5
+            logging.info(
+                "Checking collision of motion plan %d with bounding box ...",
+                idx,
+            )
+            no_bbox_collision = log_result(
+                *proxy.check_box_collision(waypoints[1], 16)
+            )
+
+            # guiding_poses = np.concatenate([pre_grasp_pose, ee_base_pose, goal_pose, grasp_release_pose])
+            # np.savetxt("/home/dharun/guiding_poses.csv", guiding_poses, delimiter=',')
+
+            # proxy.add_waypoints(waypoints)
+            # return
+
+            if motion_feasibile and no_bbox_collision:
+                logging.info("Sending waypoints to motion generator")
+                proxy.add_waypoints(waypoints)
+                return
 
     logging.info("Motion not feasible for given waypoints")
 
@@ -441,6 +396,8 @@ if __name__ == "__main__":
     parser.add_argument('--filename', type=str, help='Path to the input point cloud file')
     parser.add_argument('--visualize', action='store_true', help='Enable visualize flag')
     parser.add_argument('--hostname', type=str, help='Hostname of the computer running the motion generator', default='localhost')
+    parser.add_argument('--top_k', type=int, default=None, help='Number of best grid cells for which end-effector poses are tried (all the grid cells of the ideal grasping region by default)')
+    parser.add_argument('--all_occupied', action='store_true', help='Also try the occupied grid cells below the metric threshold of the ideal grasping region')
 
     # Directory for saving the log files:
     data_dir = 'logs/'
@@ -504,7 +461,9 @@ if __name__ == "__main__":
     # Computing the ideal grasping region:
     cloud_object.get_ideal_grasping_region()
 
-    cloud_object.get_end_effector_poses()
+    # The end-effector poses are sampled lazily in the order of the metric values of the grid cells by trigger_motion_generator. 
+    # get_end_effector_poses computes all the poses of the ideal grasping region (required by get_logs and visualize):
+    # cloud_object.get_end_effector_poses()
 
     # END TOTAL TIME:
     total_time_end = perf_counter()
@@ -518,8 +477,8 @@ if __name__ == "__main__":
     # Number of contact locations generated on the surface:
     print("Number of contact locations generated on the bounding box: ", cloud_object.sampled_c1.shape[0])
 
-    # Computed end-effector poses:
-    print("Number of end-effector poses computed: ", len(cloud_object.computed_end_effector_poses_base))
+    # Grid cells of the ideal grasping region which are queried for end-effector poses:
+    print("Number of grid cells in the ideal grasping region: ", len(cloud_object.ideal_grasping_region_grid_centers))
 
     # Saving the necessary files:
     # get_logs(cloud_object, data_dir)
@@ -528,4 +487,4 @@ if __name__ == "__main__":
     #     visualize(cloud_object)
 
     print("Triggering motion generator")
-    trigger_motion_generator(cloud_object, args.hostname)
+    trigger_motion_generator(cloud_object, args.hostname, args.top_k, args.all_occupied)
@@ -1 +1 @@
-__all__ = {"process_point_cloud"}
\ No newline at end of file
+__all__ = {"process_point_cloud", "transforms", "pose_store", "metric_pyramid", "screw_motion"}
\ No newline at end of file
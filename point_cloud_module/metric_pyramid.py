@@ -0,0 +1,94 @@
+'''Python Script with a multi-resolution pyramid of the metric values of the grid cells generated by point_cloud.generate_grid.
+
+   Level 0 contains the grid cells of the contact lattice (cell size = increment) and every following level is computed by 2x2 average
+   pooling of the previous one, i.e. the cells of level l have the size increment*2^l. A trailing row or column which does not fill a 2x2
+   block is not pooled. The number of points of the point cloud in every cell (occupancy) is pooled by summation, so that the ideal
+   grasping region can be computed at every level from the occupied cells like in point_cloud.get_ideal_grasping_region.
+
+   All the levels are views of a single preallocated buffer.'''
+
+import numpy as np
+
+
+#### Class to store the metric values of the grid cells at multiple resolutions:
+class metric_pyramid(object):
+    """Metric values and occupancy of the grid cells with 2x2 pooling between the levels"""
+
+### Constructor to initialize an object of the class metric_pyramid:
+    def __init__(self, cell_values, origin, increment, occupancy=None, num_levels=None):
+        '''
+            cell_values: numpy array of shape (n_z, n_u), metric values of the grid cells at the finest level (Z axis as the first index)
+            origin: (u, z) coordinates of the corner of the first grid cell in the object reference frame
+            increment: float, size of the grid cells at the finest level
+            occupancy: numpy array of shape (n_z, n_u), number of points in every grid cell. All the cells are occupied when None
+            num_levels: int, maximum number of levels. By default levels are added until a dimension has a single cell
+        '''
+        cell_values = np.asarray(cell_values, dtype=np.float64)
+        self.origin = np.reshape(np.asarray(origin, dtype=np.float64), [2])
+        self.increment = increment
+
+        shapes = [cell_values.shape]
+        while (num_levels is None or len(shapes) < num_levels) and min(shapes[-1]) >= 2:
+            shapes.append((shapes[-1][0]//2, shapes[-1][1]//2))
+        sizes = [shape[0]*shape[1] for shape in shapes]
+        offsets = np.concatenate([[0], np.cumsum(sizes)])
+
+        # Single buffer for all the levels:
+        self.buffer = np.empty(offsets[-1])
+        self.occupancy_buffer = np.empty(offsets[-1])
+        self.num_levels = len(shapes)
+        self.levels = [self.buffer[offsets[l]:offsets[l+1]].reshape(shape) for l, shape in enumerate(shapes)]
+        self.occupancy = [self.occupancy_buffer[offsets[l]:offsets[l+1]].reshape(shape) for l, shape in enumerate(shapes)]
+
+        self.levels[0][:] = cell_values
+        if occupancy is None:
+            self.occupancy[0][:] = 1
+        else:
+            self.occupancy[0][:] = occupancy
+
+        for l in range(1, len(shapes)):
+            self.pool(self.levels[l-1], self.levels[l])
+            self.pool(self.occupancy[l-1], self.occupancy[l])
+            self.levels[l] /= 4
+
+    @staticmethod
+    def pool(source, out):
+        '''Sum of the 2x2 blocks of source written to out.'''
+        rows, cols = out.shape
+        blocks = source[:2*rows, :2*cols]
+        np.add(blocks[0::2, 0::2], blocks[1::2, 0::2], out=out)
+        out += blocks[0::2, 1::2]
+        out += blocks[1::2, 1::2]
+
+    def cell_size(self, level):
+        '''Size of the grid cells at the given level.'''
+        return self.increment*2**level
+
+    def centers(self, level):
+        '''Centers (u, z) of the grid cells at the given level as an array of shape (n_z, n_u, 2).'''
+        rows, cols = self.levels[level].shape
+        size = self.cell_size(level)
+        u = self.origin[0] + size*(np.arange(cols) + 0.5)
+        z = self.origin[1] + size*(np.arange(rows) + 0.5)
+        return np.stack(np.meshgrid(u, z), axis=2)
+
+    def region_mask(self, level, eta_ratio=0.85):
+        '''
+            Mask of shape (n_z, n_u) of the grid cells of the ideal grasping region at the given level: the occupied cells with a metric
+            value of at least eta_ratio times the maximum metric value of the occupied cells. Returns the mask and the threshold.
+        '''
+        values = self.levels[level]
+        occupied = self.occupancy[level] > 0
+        if not np.any(occupied):
+            return occupied, np.inf
+
+        eta_threshold = eta_ratio*np.max(values[occupied])
+        return occupied & (values >= eta_threshold), eta_threshold
+
+    def ideal_region(self, level, eta_ratio=0.85):
+        '''
+            Grid cells of the ideal grasping region at the given level (see region_mask). Returns the centers (M,2) and the metric
+            values (M,) of the cells.
+        '''
+        selected, _ = self.region_mask(level, eta_ratio)
+        return self.centers(level)[selected], self.levels[level][selected]
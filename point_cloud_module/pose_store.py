@@ -0,0 +1,188 @@
+'''Python Script with a structure of arrays container for the end-effector poses sampled by point_cloud.get_end_effector_poses.
+
+   Every sampled grasp is stored as the k-th row of contiguous arrays:
+   poses, poses_inter:          (K,4,4) end-effector grasp and pre-grasp (intermediate) poses, elements of SE(3)
+   contacts_c1, contacts_c2:    (K,4,4) poses of the object-end_effector contact reference frames C1 and C2
+   grasp_centers:               (K,3) grasp centers
+   normals_c1, normals_c2:      (K,3) contact normals (z axis of C1 and C2)
+   approach_dirs:               (K,3) unit vectors along the approach direction (z axis of the end-effector)
+   approach_labels:             (K,) approach direction (1 to 5) following the convention used in get_end_effector_poses
+
+   The four (K,4,4) arrays are views of a single (4,K,4,4) array frames.
+
+   Subsets of the poses (for example a single approach direction) are accessed through pose_view, which stores the indices
+   of the selected rows and does not copy the arrays.'''
+
+import numpy as np
+
+from point_cloud_module.transforms import transform_points
+
+
+#### Class to access a subset of the rows of an array without copying them:
+class pose_view(object):
+    """Sequence of the rows of an array selected by an array of indices"""
+
+    def __init__(self, array, indices):
+        '''
+            array: numpy array of shape (K, ...), for example the (K,4,4) poses of a pose_store
+            indices: numpy array of integers, indices of the selected rows
+        '''
+        self.array = array
+        self.indices = np.asarray(indices, dtype=np.int64)
+
+    def __len__(self):
+        return self.indices.shape[0]
+
+    def __getitem__(self, i):
+        # A single pose is returned as a view of the underlying array:
+        if isinstance(i, (int, np.integer)):
+            return self.array[self.indices[i]]
+        return pose_view(self.array, self.indices[i])
+
+    def __iter__(self):
+        for j in self.indices:
+            yield self.array[j]
+
+    def __array__(self, dtype=None):
+        # Only materializing the view (for example with np.asarray) copies the selected rows:
+        return np.asarray(self.array[self.indices], dtype=dtype)
+
+
+#### Structure of arrays container for the end-effector poses:
+class pose_store(object):
+    """Stacked end-effector poses with the corresponding contact frames, grasp centers and approach directions"""
+
+    # The elements of SE(3) are stored in a single (4,K,4,4) array frames, poses = frames[0], poses_inter = frames[1], etc.
+    # so that all of them are transformed to another reference frame by a single matrix multiplication:
+    frame_fields = ('poses', 'poses_inter', 'contacts_c1', 'contacts_c2')
+    vector_fields = ('grasp_centers', 'normals_c1', 'normals_c2', 'approach_dirs')
+
+### Constructor to initialize an object of the class pose_store:
+    def __init__(self, capacity=0):
+        '''
+            capacity: int, number of poses for which memory is allocated. The arrays grow automatically when more poses are appended.
+        '''
+        self.size = 0
+        self.frames = np.zeros((len(self.frame_fields), capacity, 4, 4))
+        for name in self.vector_fields:
+            setattr(self, name, np.zeros((capacity, 3)))
+        self.approach_labels = np.zeros(capacity, dtype=np.int64)
+        self.bind_frames()
+
+    def __len__(self):
+        return self.size
+
+    def bind_frames(self):
+        '''Sets poses, poses_inter, contacts_c1 and contacts_c2 as views of the stacked array frames.'''
+        for i, name in enumerate(self.frame_fields):
+            setattr(self, name, self.frames[i])
+
+    def reserve(self, capacity):
+        '''Reallocates the arrays so that they can store at least capacity poses.'''
+        if capacity <= self.approach_labels.shape[0]:
+            return
+        frames = np.zeros((len(self.frame_fields), capacity, 4, 4))
+        frames[:, :self.size] = self.frames[:, :self.size]
+        self.frames = frames
+        for name in self.vector_fields:
+            array = np.zeros((capacity, 3))
+            array[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, array)
+        labels = np.zeros(capacity, dtype=np.int64)
+        labels[:self.size] = self.approach_labels[:self.size]
+        self.approach_labels = labels
+        self.bind_frames()
+
+    def trim(self):
+        '''Restricts the arrays to the poses appended so far. The trimmed arrays are views of the allocated memory.'''
+        self.frames = self.frames[:, :self.size]
+        for name in self.vector_fields:
+            setattr(self, name, getattr(self, name)[:self.size])
+        self.approach_labels = self.approach_labels[:self.size]
+        self.bind_frames()
+        return self
+
+    def append(self, R_EE, p_EE, R_EE_inter, p_EE_inter, R_C1, p_C1, R_C2, p_C2, grasp_center, approach_dir, approach_label):
+        '''Appends a single sampled grasp. The rotation matrices are (3,3) arrays and the positions/vectors have 3 elements.'''
+        if self.size == self.approach_labels.shape[0]:
+            self.reserve(max(2*self.size, 8))
+        k = self.size
+
+        for name, R, p in (('poses', R_EE, p_EE), ('poses_inter', R_EE_inter, p_EE_inter), ('contacts_c1', R_C1, p_C1), ('contacts_c2', R_C2, p_C2)):
+            pose = getattr(self, name)[k]
+            pose[0:3, 0:3] = R
+            pose[0:3, 3] = np.reshape(p, [3])
+            pose[3, 0:3] = 0
+            pose[3, 3] = 1
+
+        self.grasp_centers[k] = np.reshape(grasp_center, [3])
+        self.normals_c1[k] = R_C1[:, 2]
+        self.normals_c2[k] = R_C2[:, 2]
+        self.approach_dirs[k] = np.reshape(approach_dir, [3])
+        self.approach_labels[k] = approach_label
+        self.size += 1
+
+    def extend(self, R_EE, p_EE, R_EE_inter, p_EE_inter, R_C1, p_C1, R_C2, p_C2, grasp_centers, approach_dirs, approach_labels):
+        '''
+            Appends M sampled grasps at once. The rotation matrices are (M,3,3) arrays, the positions/vectors are (M,3) arrays and
+            approach_labels has M elements.
+        '''
+        num_poses = np.shape(approach_labels)[0]
+        if self.size + num_poses > self.approach_labels.shape[0]:
+            self.reserve(max(2*self.size, self.size + num_poses))
+        k = slice(self.size, self.size + num_poses)
+
+        for name, R, p in (('poses', R_EE, p_EE), ('poses_inter', R_EE_inter, p_EE_inter), ('contacts_c1', R_C1, p_C1), ('contacts_c2', R_C2, p_C2)):
+            poses = getattr(self, name)[k]
+            poses[:, 0:3, 0:3] = R
+            poses[:, 0:3, 3] = p
+            poses[:, 3, 0:3] = 0
+            poses[:, 3, 3] = 1
+
+        self.grasp_centers[k] = grasp_centers
+        self.normals_c1[k] = R_C1[:, :, 2]
+        self.normals_c2[k] = R_C2[:, :, 2]
+        self.approach_dirs[k] = approach_dirs
+        self.approach_labels[k] = approach_labels
+        self.size += num_poses
+
+    def select(self, labels):
+        '''Indices of the poses whose approach direction is one of the given labels.'''
+        return np.flatnonzero(np.isin(self.approach_labels[:self.size], labels))
+
+    def view(self, name, indices=None):
+        '''
+            Rows of the array name selected by indices (all the poses when None). The returned pose_view does not copy the array.
+        '''
+        if indices is None:
+            indices = np.arange(self.size)
+        return pose_view(getattr(self, name), indices)
+
+    def axes(self, name='poses'):
+        '''Z and Y axes of the poses in the array name as a (K,6) array, i.e. [z_x, z_y, z_z, y_x, y_y, y_z] for every pose.'''
+        frames = getattr(self, name)[:self.size]
+        return np.concatenate([frames[:, 0:3, 2], frames[:, 0:3, 1]], axis=1)
+
+    def locations(self, name='poses'):
+        '''Positions of the poses in the array name as a (K,3) array (view).'''
+        return getattr(self, name)[:self.size, 0:3, 3]
+
+    def to_frame(self, R, p):
+        '''
+            Expresses all the poses in another reference frame. (R, p) is the pose of the reference frame in which the poses are currently 
+            expressed, with respect to the new reference frame, i.e. g_new = [[R, p], [0, 1]]*g. All the elements of SE(3) are converted
+            by a single batched matrix multiplication. Returns a new pose_store with the same approach labels.
+        '''
+        transformed = pose_store(self.size)
+        transformed.size = self.size
+
+        g = np.identity(4)
+        g[0:3, 0:3] = R
+        g[0:3, 3] = np.reshape(p, [3])
+        np.matmul(g, self.frames[:, :self.size], out=transformed.frames)
+
+        transform_points(self.grasp_centers[:self.size], R, p, out=transformed.grasp_centers)
+        for name in ('normals_c1', 'normals_c2', 'approach_dirs'):
+            transform_points(getattr(self, name)[:self.size], R, out=getattr(transformed, name))
+        transformed.approach_labels[:] = self.approach_labels[:self.size]
+        return transformed
@@ -7,22 +7,33 @@ import numpy as np
 import math
 from numpy import linalg as la
 from scipy.spatial import ConvexHull
+from scipy.interpolate import RegularGridInterpolator
+from scipy.ndimage import binary_dilation
 
 # Matplotlib for plotting and visualization in Python:
 import matplotlib.pyplot as plt
 
-# PyTorch for Neural Network Approximation: 
-import torch 
-import torch.nn as nn
-from torch.utils.data import Dataset, DataLoader
-from torchvision import transforms, utils
-from neural_network_module.neural_net import metric_nn
-from neural_network_module.neural_net import metric_nn_generic
-from neural_network_module.data_loader import metric_nn_dataset
-from neural_network_module.data_loader import to_tensor
+# Neural Network Approximation. PyTorch is only imported by the functions which use it so that the metric can be predicted 
+# with the NumPy backend without importing torch:
+from neural_network_module.numpy_inference import load_numpy_model
+from neural_network_module.numpy_inference import numpy_model_path
 
 from collections import Counter
 
+# Batched rigid body transformations:
+from point_cloud_module.transforms import transform_points
+from point_cloud_module.transforms import inverse_transform_points
+
+# Stacked storage of the sampled end-effector poses:
+from point_cloud_module.pose_store import pose_store
+
+# Multi-resolution metric values of the grid cells:
+from point_cloud_module.metric_pyramid import metric_pyramid
+
+# Batched screw motions:
+from point_cloud_module.screw_motion import screw_transformations
+from point_cloud_module.screw_motion import screw_path
+
 class point_cloud(object):
    
    def __init__(self): 
@@ -92,12 +103,41 @@ class point_cloud(object):
       self.screw_axis = None
       self.point = None
       self.moment = None
+      # Pitch and magnitude (radians) of the pivoting motion about the screw axis:
+      self.screw_pitch = 0
+      self.screw_angle = math.radians(90)
 
       # Attributes associated with sampling contact locations on the bounding box
       self.increment = None
       self.x_axis_increments = None
       self.y_axis_increments = None
       self.z_axis_increments = None
+      # Plane ('xz' or 'yz') of the faces on which the contacts are sampled:
+      self.contact_plane = None
+      # Spacing of the contact lattice used by generate_contacts:
+      self.contact_increment = 0.01
+      # Sampling on both pairs of parallel faces (XZ and YZ planes) when both dimensions of the bounding box fit within the gripper:
+      self.multi_face_sampling = False
+      # Planes on which the contacts were sampled and the offsets of their rows in x_data, i.e. the contacts of contact_planes[i] are the 
+      # rows contact_plane_offsets[i]:contact_plane_offsets[i+1]:
+      self.contact_planes = None
+      self.contact_plane_offsets = None
+
+      # Candidate screw axes evaluated by predict_metric_multi_screw (one row per candidate), the raw metric values of every candidate on 
+      # the contact lattice (candidate, Z axis, U axis), the score of every candidate and the index of the selected candidate:
+      self.screw_axis_candidates = None
+      self.screw_point_candidates = None
+      self.screw_metric_grids = None
+      self.screw_scores = None
+      self.best_screw_index = None
+
+      # Adaptive sampling (predict_metric_adaptive): spacing of the finest lattice and the normalized metric value above which the cells 
+      # of a coarser lattice are refined. The number of contacts evaluated by the neural network is stored as well:
+      self.target_increment = 0.001
+      self.refinement_threshold = 0.6
+      self.num_metric_evaluations = None
+      # Features of the contacts evaluated by the network during the adaptive sampling (x_data contains the complete finest lattice):
+      self.adaptive_x_data = None
 
       # Contacts generated on the faces of the bounding box:
       self.sampled_c1 = None
@@ -112,6 +152,14 @@ class point_cloud(object):
       self.hidden_size_2 = 3
       self.batch_size = 2
 
+      # Backend used for the metric prediction: 'torch' (checkpoint in Trained_Models/), 'torchscript', 'onnx' or 'numpy' (exported using 
+      # neural_network_module.export_model). When exported_model_path is None the exported model is expected next to the checkpoint.
+      self.metric_backend = 'torch'
+      self.exported_model_path = None
+      # Dynamic int8 quantization of the linear layers for the 'torch' backend. It is slower and less accurate than the float32 model and 
+      # only used by quantization_report.py:
+      self.metric_quantized = False
+
       self.test_datapoints = None
       self.predicted = None 
       self.ground_truth = None
@@ -120,6 +168,15 @@ class point_cloud(object):
       self.projected_points = None
       self.projected_points_local_frame = None
 
+      # Faces of the bounding box in the object reference frame, in the same order as in plot_cube (0: Y min, 1: X min, 2: Y max, 
+      # 3: X max, 4: Z min, 5: Z max), along with their outward unit normals and offsets (n.p = offset for every point p on the face),
+      # their centers and their extents (lengths of the two edges of every face starting at its first vertex):
+      self.face_vertex_indices = np.asarray([[1,0,3,6], [0,2,5,3], [2,7,4,5], [7,1,6,4], [1,0,2,7], [6,3,5,4]])
+      self.face_normals = None
+      self.face_offsets = None
+      self.face_centers = None
+      self.face_extents = None
+
       self.X_grid_points = None
       self.Y_grid_points = None
       self.Z_grid_points = None
@@ -158,6 +215,12 @@ class point_cloud(object):
       self.q_y_array = None
       self.q_z_array = None
 
+      # Linear index (q_u*len(z_axis_increments) + q_z) of the grid cell of every projected point, -1 for points outside the grid. 
+      # The occupied grid cells are stored along with the number of points in each of them:
+      self.grid_cell_ids = None
+      self.occupied_grid_cells = None
+      self.occupied_grid_cell_counts = None
+
       # Attributes to store the center of the grids:
       self.grid_centers = None
       self.grid_centers_matrix = None
@@ -177,6 +240,17 @@ class point_cloud(object):
 
       # Attribute associated with the grid centers of occupied grids corresponding to the ideal grasping region:
       self.ideal_grasping_region_grid_centers = None
+      # Plane ('xz' or 'yz') and metric value of every grid center of the ideal grasping region:
+      self.ideal_grasping_region_grid_planes = None
+      self.ideal_grasping_region_grid_metric_values = None
+
+      # Centers, metric values and planes of all the occupied grid cells, used to query the best grid cells (see get_top_k_grid_cells):
+      self.occupied_grid_centers = None
+      self.occupied_grid_metric_values = None
+      self.occupied_grid_planes = None
+
+      # Multi-resolution pyramid of the metric values of the grid cells (point_cloud_module.metric_pyramid):
+      self.metric_pyramid = None
 
       # Parameters associated with the bounding box corresponding to the ideal grasping region.
       # The bounding box computed will be with respect to the object reference frame. Therefore, it will always be axis-aligned
@@ -195,6 +269,15 @@ class point_cloud(object):
       self.g_delta = None
       self.g_delta_inter = None
 
+      # Offset along the Z axis of the end-effector of the pre-grasp and release waypoints (generate_waypoint_bundles). When None the 
+      # offset between the grasp and the pre-grasp poses (g_delta_inter - g_delta) is used:
+      self.pre_grasp_offset = None
+
+      # Stacked end-effector poses, contact reference frames, grasp centers and approach directions (point_cloud_module.pose_store)
+      # with respect to the object reference frame and the base reference frame:
+      self.end_effector_poses = None
+      self.end_effector_poses_base = None
+
       # List to store the computed end-effector poses with respect to the object reference frame. 
       self.computed_end_effector_poses = None
       self.computed_end_effector_poses_inter = None
@@ -388,11 +471,9 @@ class point_cloud(object):
       self.R_base_cam = self.g_base_cam[0:3, 0:3]
       self.p_base_cam = np.reshape(self.g_base_cam[0:3, 3], [3,1])
 
-      transformed_points = np.zeros([points.shape[0], points.shape[1]])
-      
-      # Transforming the points from the camera reference frame to the base reference frame: 
-      for i, point in enumerate(points):
-         transformed_points[i,:] = np.reshape(np.add(np.dot(self.R_base_cam, np.multiply(np.reshape(point, [3,1]), 0.001)), self.p_base_cam), [1,3])
+      # Transforming the points from the camera reference frame to the base reference frame (the points are converted from millimeters 
+      # to meters): 
+      transformed_points = transform_points(points, self.R_base_cam, self.p_base_cam, scale=0.001)
 
       transformed_cloud = o3d.geometry.PointCloud()
       transformed_cloud.points = o3d.utility.Vector3dVector(transformed_points)
@@ -423,11 +504,7 @@ class point_cloud(object):
       # We transform the points into the object reference frame computed using the axis aligned bounding box 
       # and then compute the oriented bounding box:
       projected_points_object_frame = np.zeros([self.transformed_points_object_frame.shape[0], self.transformed_points_object_frame.shape[1]])
-    
-      for i, point in enumerate(projected_points_object_frame):
-        projected_points_object_frame[i, 0] = self.transformed_points_object_frame[i, 0]
-        projected_points_object_frame[i, 1] = self.transformed_points_object_frame[i, 1]
-        projected_points_object_frame[i, 2] = 0
+      projected_points_object_frame[:, 0:2] = self.transformed_points_object_frame[:, 0:2]
 
       projected_points_object_frame_2D = projected_points_object_frame[:, 0:2]
 
@@ -492,24 +569,19 @@ class point_cloud(object):
       self.oriented_bounding_box_vertices[6, 2] = self.transformed_vertices_object_frame[6, 2]
       self.oriented_bounding_box_vertices[7, 2] = self.transformed_vertices_object_frame[7, 2]
 
-      # We need to transform the oriented_bounding_box_vertices back into the object base frame:
-      for i, vertex in enumerate(self.oriented_bounding_box_vertices):
-        self.oriented_bounding_box_vertices[i,:] = np.reshape(np.dot(np.transpose(np.add(np.reshape(self.oriented_bounding_box_vertices[i, :], [3,1]), self.p_bounding_box)), la.inv(self.R_object)), [1,3])
+      # We need to transform the oriented_bounding_box_vertices back into the object base frame (in place):
+      inverse_transform_points(self.oriented_bounding_box_vertices, la.inv(self.R_object), -self.p_bounding_box, out=self.oriented_bounding_box_vertices)
 
       # We need to compute the center of the oriented bounding and it cannot be the same as the
       # axis aligned bounding box. It should based upon the dimensions of the oriented bounding box.
-      self.oriented_bounding_box_center = np.reshape(np.dot(np.transpose(np.add(self.oriented_bounding_box_center, self.p_bounding_box)), la.inv(self.R_object)), [3])
+      self.oriented_bounding_box_center = np.reshape(inverse_transform_points(np.transpose(self.oriented_bounding_box_center), la.inv(self.R_object), -self.p_bounding_box), [3])
 
    '''Function to compute the oriented bounding box using the rotating calipers algorithm 
       after all the points have been transferred to the object base frame computed using the 
       axis aligned bounding box:'''
    def compute_obb_rotating_calipers(self):
       projected_points_object_frame = np.zeros([self.transformed_points_object_frame.shape[0], self.transformed_points_object_frame.shape[1]])
-    
-      for i, point in enumerate(projected_points_object_frame):
-        projected_points_object_frame[i, 0] = self.transformed_points_object_frame[i, 0]
-        projected_points_object_frame[i, 1] = self.transformed_points_object_frame[i, 1]
-        projected_points_object_frame[i, 2] = 0
+      projected_points_object_frame[:, 0:2] = self.transformed_points_object_frame[:, 0:2]
 
       projected_points_object_frame_2D = projected_points_object_frame[:, 0:2]
 
@@ -525,47 +597,53 @@ class point_cloud(object):
       points = projected_points_object_frame_2D
       hull = ConvexHull(points)
 
+      # Only the vertices of the hull are needed, the extremes of the point cloud along any direction are attained at one of them.
+      # For 2D point clouds the vertices of the hull are arranged in a counterclockwise order:
+      hull_points = points[hull.vertices]
+      num_edges = hull_points.shape[0]
+
       #### ROTATING CALIPERS #### added 7/23/23
-      min_area = 0
-      min_i = 0
-      for i, hull_vertex in enumerate(hull.vertices):
-
-          # Rotate by the unit vector pointing between adjacent points on the hull
-          cis = points[hull.vertices[i]] - points[hull.vertices[i-1]]
-          cis /= math.sqrt(cis[0]**2 + cis[1]**2)
-          rot = [[cis[0],cis[1]],[-cis[1],cis[0]]]
-          points_rotated = np.dot(rot,np.transpose(points))
-
-          # Min/Max bounding box (contains the adjacent points on an edge)
-          min_X = np.amin(points_rotated[0, :])
-          max_X = np.amax(points_rotated[0, :])
-          min_Y = np.amin(points_rotated[1, :])
-          max_Y = np.amax(points_rotated[1, :])
-
-          # Calculate the area and compare to minimum area, save if less
-          area = np.multiply(np.subtract(max_X,min_X),np.subtract(max_Y,min_Y))
-          if min_area == 0:
-             min_area = area
-          if area < min_area:
-              min_area = area
-              min_i = i
+      # Unit vectors pointing between adjacent points on the hull (edge i connects the hull vertices i-1 and i):
+      cis = hull_points - np.roll(hull_points, 1, axis = 0)
+      cis /= np.sqrt(cis[:, 0]**2 + cis[:, 1]**2)[:, np.newaxis]
+
+      # Rotating by the unit vector of edge i: rot = [[cis[i,0], cis[i,1]],[-cis[i,1], cis[i,0]]]. The rotated X axis is cis[i] and the 
+      # rotated Y axis is perpendicular to it:
+      axis_X = cis
+      axis_Y = np.stack([-cis[:, 1], cis[:, 0]], axis = 1)
+
+      # Since the edges of the hull are sorted by their angle, the vertex of the hull which is extreme along a direction is found using a 
+      # binary search over the edge angles. Vertex i is the extreme vertex for the directions between the outward normals of the edges
+      # i and i+1, i.e. for direction angles between edge_angles[i] - 90 and edge_angles[i+1] - 90 degrees:
+      edge_angles = np.unwrap(np.arctan2(cis[:, 1], cis[:, 0]))
+      edge_angles = np.concatenate([edge_angles + k*2*np.pi for k in range(-1, 3)])
+      def extreme(directions):
+         angles = np.arctan2(directions[:, 1], directions[:, 0]) + np.pi/2
+         angles = edge_angles[num_edges] + np.mod(angles - edge_angles[num_edges], 2*np.pi)
+         index = np.searchsorted(edge_angles, angles, side = 'right') - 1
+         # The neighbouring vertices are also checked to make the search robust to rounding of the angles:
+         candidates = np.mod(index[:, np.newaxis] + np.arange(-2, 3)[np.newaxis, :], num_edges)
+         return np.amax(np.einsum('ekj,ej->ek', hull_points[candidates], directions), axis = 1)
+
+      # Min/Max bounding box (contains the adjacent points on an edge) for all the edges at once:
+      max_X = extreme(axis_X)
+      min_X = -extreme(-axis_X)
+      max_Y = extreme(axis_Y)
+      min_Y = -extreme(-axis_Y)
+
+      # Calculate the area and find the minimum area bounding box (the first one when there are several):
+      area = np.multiply(np.subtract(max_X,min_X),np.subtract(max_Y,min_Y))
+      min_i = int(np.argmin(area))
 
       # Repeat the above steps for the minimum area bounding box
-      cis = points[hull.vertices[min_i]] - points[hull.vertices[min_i-1]]
-      cis /= math.sqrt(cis[0]**2 + cis[1]**2)
-      rot = [[cis[0],cis[1]],[-cis[1],cis[0]]]
-      points_rotated = np.dot(rot,np.transpose(points))
-
-      min_X = np.amin(points_rotated[0, :])
-      max_X = np.amax(points_rotated[0, :])
-      min_Y = np.amin(points_rotated[1, :])
-      max_Y = np.amax(points_rotated[1, :])
+      rot = np.asarray([[cis[min_i,0],cis[min_i,1]],[-cis[min_i,1],cis[min_i,0]]])
+      min_X, max_X, min_Y, max_Y = min_X[min_i], max_X[min_i], min_Y[min_i], max_Y[min_i]
 
-      # Transform Corners and Center of the Optimal Bounding Box to non-rotated frame
+      # Transform Corners and Center of the Optimal Bounding Box to non-rotated frame. The inverse of the rotation is its transpose:
       corners = [[min_X,max_X,max_X,min_X,min_X],[min_Y,min_Y,max_Y,max_Y,min_Y]]
-      corners = np.dot(la.inv(rot),corners)
+      corners = np.dot(np.transpose(rot),corners)
       center = [(min_X+max_X)/2,(min_Y+max_Y)/2]
-      center = np.dot(la.inv(rot),center)
+      center = np.dot(np.transpose(rot),center)
       
       # Computing the center of the 3D oriented bounding box in the reference frame of the axis aligned bounding box:
       self.oriented_bounding_box_center = np.zeros([3, 1])
@@ -594,13 +672,12 @@ class point_cloud(object):
       self.oriented_bounding_box_vertices[6, 2] = self.transformed_vertices_object_frame[6, 2]
       self.oriented_bounding_box_vertices[7, 2] = self.transformed_vertices_object_frame[7, 2]
 
-      # We need to transform the oriented_bounding_box_vertices back into the object base frame:
-      for i, vertex in enumerate(self.oriented_bounding_box_vertices):
-        self.oriented_bounding_box_vertices[i,:] = np.reshape(np.dot(np.transpose(np.add(np.reshape(self.oriented_bounding_box_vertices[i, :], [3,1]), self.p_bounding_box)), la.inv(self.R_object)), [1,3])
+      # We need to transform the oriented_bounding_box_vertices back into the object base frame (in place):
+      inverse_transform_points(self.oriented_bounding_box_vertices, la.inv(self.R_object), -self.p_bounding_box, out=self.oriented_bounding_box_vertices)
 
       # We need to compute the center of the oriented bounding and it cannot be the same as the
       # axis aligned bounding box. It should based upon the dimensions of the oriented bounding box.
-      self.oriented_bounding_box_center = np.reshape(np.dot(np.transpose(np.add(self.oriented_bounding_box_center, self.p_bounding_box)), la.inv(self.R_object)), [3])
+      self.oriented_bounding_box_center = np.reshape(inverse_transform_points(np.transpose(self.oriented_bounding_box_center), la.inv(self.R_object), -self.p_bounding_box), [3])
 
 
    ''' Function to get the pose of the bounding box (axis-aligned or oriented): '''
@@ -644,7 +721,6 @@ class point_cloud(object):
       # Transforming all the points such that they are expressed in the object reference frame:
       self.points = np.asarray(self.processed_cloud.points)
       self.R_object = np.matmul(self.R_base, self.R_bounding_box)
-      self.transformed_points_object_frame = np.zeros([self.points.shape[0], self.points.shape[1]])
 
       if self.bounding_box_flag == 0:
          vertices = self.aligned_bounding_box_vertices
@@ -653,14 +729,10 @@ class point_cloud(object):
       else:
          print('Please update the bounding box flag')
 
-      for i, point in enumerate(self.points):
-         self.transformed_points_object_frame[i,:] = np.reshape(np.dot(np.transpose(np.subtract(np.reshape(point, [3,1]), self.p_bounding_box)), self.R_object), [1,3])
+      self.transformed_points_object_frame = inverse_transform_points(self.points, self.R_object, self.p_bounding_box)
 
       # Transforming the vertices of the bounding box also to the object reference frame:
-      self.transformed_vertices_object_frame = np.zeros([vertices.shape[0], vertices.shape[1]])
-
-      for i, vertex in enumerate(vertices):
-         self.transformed_vertices_object_frame[i,:] = np.reshape(np.dot(np.transpose(np.subtract(np.reshape(vertex, [3,1]), self.p_bounding_box)), self.R_object), [1,3])
+      self.transformed_vertices_object_frame = inverse_transform_points(vertices, self.R_object, self.p_bounding_box)
 
       # Getting the dimensions of the box in terms of the X, Y and Z directions:
       self.x_dim = np.round(np.absolute(self.transformed_vertices_object_frame[0,0] - self.transformed_vertices_object_frame[1,0]),2)
@@ -691,11 +763,16 @@ class point_cloud(object):
        self.g_base[0:3, 3] = np.reshape(self.p_base, [3])
        self.g_base[3,3] = 1
 
-       # Getting the pose of the bounding box:
-       self.get_pose_bounding_box()
+       # The axis aligned bounding box is aligned with the base reference frame, i.e. its orientation is the identity and the points are 
+       # expressed in its reference frame by subtracting its center. This is all that is needed for computing the oriented bounding box, 
+       # so the points are only transformed once using the pose of the oriented bounding box:
+       self.R_bounding_box = np.identity(3)
+       self.p_bounding_box = np.reshape(self.aligned_bounding_box_center, [3,1])
+       self.R_object = np.matmul(self.R_base, self.R_bounding_box)
 
-       # Transforming the points to the object reference frame:
-       self.transform_to_object_frame()
+       self.points = np.asarray(self.processed_cloud.points)
+       self.transformed_points_object_frame = np.subtract(self.points, self.aligned_bounding_box_center)
+       self.transformed_vertices_object_frame = np.subtract(self.aligned_bounding_box_vertices, self.aligned_bounding_box_center)
        self.compute_obb_rotating_calipers()
 
        # We now change the bounding box flag and use the oriented bounding box to sample the contacts:
@@ -704,9 +781,12 @@ class point_cloud(object):
        # Getting the pose of the bounding box:
        self.get_pose_bounding_box()
 
-       # Transforming the points to the object reference frame:
+       # Transforming the points to the object reference frame (the array of points from the previous step is reused):
        self.transform_to_object_frame()
 
+       # Normals and offsets of the faces of the bounding box used for projecting the points:
+       self.compute_face_geometry()
+
        # Defining a dictionary containing the x, y and z dimensions along with the corresponding edges at the bottom face.
        # NOTE: This is especially useful while selecting the pivoting axis and it is based on the same convention which we use to assign the reference frame
        # 0 - x_dim, 1 - y_dim, 2 - z_dim
@@ -721,7 +801,7 @@ class point_cloud(object):
        # Saving the point cloud transformed to the object reference frame:
        # Creating a Open3d PointCloud Object for the cloud corresponding to just the bounding box
        self.cloud_object_frame = o3d.geometry.PointCloud()
-       self.cloud_object_frame.points = o3d.utility.Vector3dVector(self.transformed_points_object_frame.astype(np.float64))
+       self.cloud_object_frame.points = o3d.utility.Vector3dVector(self.transformed_points_object_frame)
        self.cloud_object_frame.paint_uniform_color([0, 0, 1])
 
        self.cloud_object_frame.estimate_normals(search_param=o3d.geometry.KDTreeSearchParamHybrid(radius=5, max_nn=30))
@@ -731,127 +811,140 @@ class point_cloud(object):
        self.normals_object_frame = np.asarray(self.cloud_object_frame.normals) 
 
 
-   '''Function to sample contacts from the two parallel faces of the bounding box and generate the feature vector to be used as input to the
-      neural network. In this function a single datapoint has dimensions 12x1 and contains plucker coordinates.'''
-   def generate_contacts_yz(self):
+   '''Function to build the feature vectors for a batch of antipodal contacts. The columns follow the layouts the networks were trained on:
+      12 (contacts and plucker coordinates), 15 (plucker as well as nonplucker coordinates) and 18 (additional features like the moment arms).
+      All the rows are filled at once using broadcasting instead of building one datapoint at a time. The screw parameters of the point cloud
+      (screw_axis, point and moment) are used unless a screw axis and a point on it are given.'''
+   def get_contact_features(self, c1, c2, num_features, screw_axis = None, point = None):
+      if screw_axis is None:
+         screw_axis, point, moment = self.screw_axis, self.point, self.moment
+      else:
+         moment = np.cross(point, screw_axis)
+
+      features = np.empty([c1.shape[0], num_features])
+      features[:, 0:3] = c1
+      features[:, 3:6] = c2
+      features[:, 6:9] = screw_axis
+      features[:, 9:12] = moment
+      if num_features >= 15:
+         features[:, 12:15] = point
+      if num_features == 18:
+         features[:, 15] = la.norm(c1, axis=1)
+         features[:, 16] = la.norm(point)
+         features[:, 17] = la.norm(np.subtract(c1, point), axis=1)
+      return features
+
+   '''Function to compute the antipodal contacts on the two parallel faces of the bounding box corresponding to the plane ('xz' or 'yz')
+      for the coordinates u (X or Y axis) and z of the contacts:'''
+   def get_contacts(self, plane, u, z):
+      c1 = np.empty([u.shape[0], 3])
+      c2 = np.empty([u.shape[0], 3])
+      if plane == 'xz':
+         c1[:, 0] = u
+         c1[:, 1] = self.transformed_vertices_object_frame[0,1]
+         c2[:, 0] = u
+         c2[:, 1] = self.transformed_vertices_object_frame[2,1]
+      else:
+         c1[:, 0] = self.transformed_vertices_object_frame[0,0]
+         c1[:, 1] = u
+         c2[:, 0] = self.transformed_vertices_object_frame[1,0]
+         c2[:, 1] = u
+      c1[:, 2] = z
+      c2[:, 2] = z
+      return c1, c2
+
+   '''Function to sample contacts from the two parallel faces of the bounding box corresponding to the plane ('xz' or 'yz') and generate 
+      the feature matrix with num_features columns. The contacts are sampled on a np.meshgrid of the axis increments so that the Z axis 
+      is the outer loop, which is the order expected by the grid generation.'''
+   def generate_contacts_features(self, plane, num_features):
       # Sampling contacts as input to the neural network. We will be using the transformed points and transformed 
       # vertices for sampling the antipodal contact locations. 
-      self.y_axis_increments = np.arange(self.transformed_vertices_object_frame[1,1], self.transformed_vertices_object_frame[7,1], self.increment)
+      if plane == 'xz':
+         self.x_axis_increments = np.arange(self.transformed_vertices_object_frame[0,0], self.transformed_vertices_object_frame[1,0], self.increment)
+         u_axis_increments = self.x_axis_increments
+      elif plane == 'yz':
+         self.y_axis_increments = np.arange(self.transformed_vertices_object_frame[1,1], self.transformed_vertices_object_frame[7,1], self.increment)
+         u_axis_increments = self.y_axis_increments
+      else:
+         raise ValueError(f'Invalid plane for sampling contacts: {plane}')
       self.z_axis_increments = np.arange(self.transformed_vertices_object_frame[0,2], self.transformed_vertices_object_frame[3,2], self.increment)
+      self.contact_plane = plane
+
+      u_grid, z_grid = np.meshgrid(u_axis_increments, self.z_axis_increments)
 
       # Efficiently sampling antipodal contacts:
-      self.sampled_c1 = np.asarray([[self.transformed_vertices_object_frame[0,0], y, z] for z in self.z_axis_increments for y in self.y_axis_increments])
-      self.sampled_c2 = np.asarray([[self.transformed_vertices_object_frame[1,0], y, z] for z in self.z_axis_increments for y in self.y_axis_increments])
-      self.x_data = np.asarray([np.reshape(np.asarray([[self.transformed_vertices_object_frame[0,0], y, z], [self.transformed_vertices_object_frame[1,0], y, z], 
-                                                       self.screw_axis, self.moment]), [1,12]) for z in self.z_axis_increments for y in self.y_axis_increments])
-      self.x_data = np.reshape(self.x_data, [self.x_data.shape[0], self.x_data.shape[1]*self.x_data.shape[2]])
+      self.sampled_c1, self.sampled_c2 = self.get_contacts(plane, u_grid.ravel(), z_grid.ravel())
+      self.contact_planes = [plane]
+      self.contact_plane_offsets = np.asarray([0, self.sampled_c1.shape[0]])
+
+      self.x_data = self.get_contact_features(self.sampled_c1, self.sampled_c2, num_features)
 
-      # Generate empty data for the corresponding y labels required as input to the Pytorch DataLoader class
-      self.y_data = np.zeros([len(self.y_axis_increments)*len(self.z_axis_increments), 1])
+      # Generate empty data for the corresponding y labels which are stored as the ground truth during the metric prediction
+      self.y_data = np.zeros([self.x_data.shape[0], 1])
+
+   '''Function to sample contacts from the two parallel faces of the bounding box and generate the feature vector to be used as input to the
+      neural network. In this function a single datapoint has dimensions 12x1 and contains plucker coordinates.'''
+   def generate_contacts_yz(self):
+      self.generate_contacts_features('yz', 12)
 
    '''Function to sample contacts from the two parallel faces of the bounding box and generate the feature vector to be used as input to the
       neural network. In this function a single datapoint has dimensions 15x1 and contains plucker as well as nonplucker coordinates.'''
    def generate_contacts_yz_plucker_non_plucker(self):
-      # Sampling contacts as input to the neural network. We will be using the transformed points and transformed 
-      # vertices for sampling the antipodal contact locations. 
-      self.y_axis_increments = np.arange(self.transformed_vertices_object_frame[1,1], self.transformed_vertices_object_frame[7,1], self.increment)
-      self.z_axis_increments = np.arange(self.transformed_vertices_object_frame[0,2], self.transformed_vertices_object_frame[3,2], self.increment)
-
-      # Efficiently sampling antipodal contacts:
-      self.sampled_c1 = np.asarray([[self.transformed_vertices_object_frame[0,0], y, z] for z in self.z_axis_increments for y in self.y_axis_increments])
-      self.sampled_c2 = np.asarray([[self.transformed_vertices_object_frame[1,0], y, z] for z in self.z_axis_increments for y in self.y_axis_increments])
-      self.x_data = np.asarray([np.reshape(np.asarray([[self.transformed_vertices_object_frame[0,0], y, z], [self.transformed_vertices_object_frame[1,0], y, z], self.screw_axis, self.moment, self.point]), [1,15]) for z in self.z_axis_increments for y in self.y_axis_increments])
-      self.x_data = np.reshape(self.x_data, [self.x_data.shape[0], self.x_data.shape[1]*self.x_data.shape[2]])
-
-      # Generate empty data for the corresponding y labels required as input to the Pytorch DataLoader class
-      self.y_data = np.zeros([len(self.y_axis_increments)*len(self.z_axis_increments), 1])
+      self.generate_contacts_features('yz', 15)
 
    '''Function to sample contacts from the two parallel faces of the bounding box and generate the feature vector to be used as input to the
       neural network. In this function a single datapoint has dimensions 18x1 and contains additional features like the moment arms.'''
    def generate_contacts_yz_additional_features(self):
-      # Sampling contacts as input to the neural network. We will be using the transformed points and transformed 
-      # vertices for sampling the antipodal contact locations. 
-      self.y_axis_increments = np.arange(self.transformed_vertices_object_frame[1,1], self.transformed_vertices_object_frame[7,1], self.increment)
-      self.z_axis_increments = np.arange(self.transformed_vertices_object_frame[0,2], self.transformed_vertices_object_frame[3,2], self.increment)
-
-      # Efficiently sampling antipodal contacts:
-      self.sampled_c1 = np.asarray([[self.transformed_vertices_object_frame[0,0], y, z] for z in self.z_axis_increments for y in self.y_axis_increments])
-      self.sampled_c2 = np.asarray([[self.transformed_vertices_object_frame[1,0], y, z] for z in self.z_axis_increments for y in self.y_axis_increments])
-      
-      self.x_data = np.zeros([self.sampled_c1.shape[0], 18])
-      for i, c1 in enumerate(self.sampled_c1):
-          self.x_data[i, :] = np.reshape(np.asarray([self.sampled_c1[i, 0], self.sampled_c1[i, 1], self.sampled_c1[i, 2], 
-                              self.sampled_c2[i, 0], self.sampled_c2[i, 1], self.sampled_c2[i, 2], 
-                              self.screw_axis[0], self.screw_axis[1], self.screw_axis[2],
-                              self.moment[0], self.moment[1], self.moment[2], 
-                              self.point[0], self.point[1],  self.point[2],
-                              la.norm(self.sampled_c1[i, :]), la.norm(self.point), la.norm((np.subtract(self.sampled_c1[i, :], self.point)))]), [1, 18])
-
-      # Generate empty data for the corresponding y labels required as input to the Pytorch DataLoader class
-      self.y_data = np.zeros([len(self.y_axis_increments)*len(self.z_axis_increments), 1])
+      self.generate_contacts_features('yz', 18)
 
    '''Function to sample contacts from the two parallel faces of the bounding box and generate the feature vector to be used as input to the
       neural network. In this function a single datapoint has dimensions 12x1 and contains plucker coordinates.'''
    def generate_contacts_xz(self):
-      # Sampling contacts as input to the neural network. We will be using the transformed points and transformed 
-      # vertices for sampling the antipodal contact locations. 
-      self.x_axis_increments = np.arange(self.transformed_vertices_object_frame[0,0], self.transformed_vertices_object_frame[1,0], self.increment)
-      self.z_axis_increments = np.arange(self.transformed_vertices_object_frame[0,2], self.transformed_vertices_object_frame[3,2], self.increment)
-
-      self.sampled_c1 = np.asarray([[x, self.transformed_vertices_object_frame[0,1], z] for z in self.z_axis_increments for x in self.x_axis_increments])
-      self.sampled_c2 = np.asarray([[x, self.transformed_vertices_object_frame[2,1], z] for z in self.z_axis_increments for x in self.x_axis_increments])
-      self.x_data = np.asarray([np.reshape(np.asarray([[x, self.transformed_vertices_object_frame[0,1], z], [x, self.transformed_vertices_object_frame[2,1], z], 
-                                                       self.screw_axis, self.moment]), [1,12]) for z in self.z_axis_increments for x in self.x_axis_increments])
-      self.x_data = np.reshape(self.x_data, [self.x_data.shape[0], self.x_data.shape[1]*self.x_data.shape[2]])
-      
-      # Generate empty data for the corresponding y labels required as input to the Pytorch DataLoader class
-      self.y_data = np.zeros([len(self.x_axis_increments)*len(self.z_axis_increments), 1])
-
+      self.generate_contacts_features('xz', 12)
 
    '''Function to sample contacts from the two parallel faces of the bounding box and generate the feature vector to be used as input to the
       neural network. In this function a single datapoint has dimensions 15x1 and contains plucker as well as nonplucker coordinates.'''
    def generate_contacts_xz_plucker_non_plucker(self):
-      # Sampling contacts as input to the neural network. We will be using the transformed points and transformed 
-      # vertices for sampling the antipodal contact locations. 
-      self.x_axis_increments = np.arange(self.transformed_vertices_object_frame[0,0], self.transformed_vertices_object_frame[1,0], self.increment)
-      self.z_axis_increments = np.arange(self.transformed_vertices_object_frame[0,2], self.transformed_vertices_object_frame[3,2], self.increment)
-
-      self.sampled_c1 = np.asarray([[x, self.transformed_vertices_object_frame[0,1], z] for z in self.z_axis_increments for x in self.x_axis_increments])
-      self.sampled_c2 = np.asarray([[x, self.transformed_vertices_object_frame[2,1], z] for z in self.z_axis_increments for x in self.x_axis_increments])
-      self.x_data = np.asarray([np.reshape(np.asarray([[x, self.transformed_vertices_object_frame[0,1], z], [x, self.transformed_vertices_object_frame[2,1], z], self.screw_axis, self.moment, self.point]), [1,15]) for z in self.z_axis_increments for x in self.x_axis_increments])
-      self.x_data = np.reshape(self.x_data, [self.x_data.shape[0], self.x_data.shape[1]*self.x_data.shape[2]])
-
-      # Generate empty data for the corresponding y labels required as input to the Pytorch DataLoader class
-      self.y_data = np.zeros([len(self.x_axis_increments)*len(self.z_axis_increments), 1])
+      self.generate_contacts_features('xz', 15)
 
    '''Function to sample contacts from the two parallel faces of the bounding box and generate the feature vector to be used as input to the
       neural network. In this function a single datapoint has dimensions 18x1 and contains additional features like the moment arms.'''
    def generate_contacts_xz_additional_features(self):
-      # Sampling contacts as input to the neural network. We will be using the transformed points and transformed 
-      # vertices for sampling the antipodal contact locations. 
-      self.x_axis_increments = np.arange(self.transformed_vertices_object_frame[0,0], self.transformed_vertices_object_frame[1,0], self.increment)
-      self.z_axis_increments = np.arange(self.transformed_vertices_object_frame[0,2], self.transformed_vertices_object_frame[3,2], self.increment)
-
-      self.sampled_c1 = np.asarray([[x, self.transformed_vertices_object_frame[0,1], z] for z in self.z_axis_increments for x in self.x_axis_increments])
-      self.sampled_c2 = np.asarray([[x, self.transformed_vertices_object_frame[2,1], z] for z in self.z_axis_increments for x in self.x_axis_increments])
-
-      self.x_data = np.zeros([self.sampled_c1.shape[0], 18])
-      for i, c1 in enumerate(self.sampled_c1):
-          self.x_data[i, :] = np.reshape(np.asarray([self.sampled_c1[i, 0], self.sampled_c1[i, 1], self.sampled_c1[i, 2], 
-                              self.sampled_c2[i, 0], self.sampled_c2[i, 1], self.sampled_c2[i, 2], 
-                              self.screw_axis[0], self.screw_axis[1], self.screw_axis[2],
-                              self.moment[0], self.moment[1], self.moment[2], 
-                              self.point[0], self.point[1],  self.point[2],
-                              la.norm(self.sampled_c1[i, :]), la.norm(self.point), la.norm((np.subtract(self.sampled_c1[i, :], self.point)))]), [1, 18])
-
-      # Generate empty data for the corresponding y labels required as input to the Pytorch DataLoader class
-      self.y_data = np.zeros([len(self.x_axis_increments)*len(self.z_axis_increments), 1])
+      self.generate_contacts_features('xz', 18)
+
+   '''Function to sample contacts from both pairs of parallel faces of the bounding box (XZ and YZ planes) and generate the feature matrix 
+      with num_features columns. The contacts of the XZ plane are followed by the contacts of the YZ plane in x_data (see 
+      contact_plane_offsets), so that the metric is predicted for both planes with a single evaluation of the network:'''
+   def generate_contacts_multi_face(self, num_features):
+      x_data, sampled_c1, sampled_c2 = [], [], []
+      for plane in ('xz', 'yz'):
+         self.generate_contacts_features(plane, num_features)
+         x_data.append(self.x_data)
+         sampled_c1.append(self.sampled_c1)
+         sampled_c2.append(self.sampled_c2)
+
+      # The contacts do not belong to a single plane anymore:
+      self.contact_plane = None
+      self.contact_planes = ['xz', 'yz']
+      self.contact_plane_offsets = np.cumsum([0] + [x.shape[0] for x in x_data])
+
+      self.x_data = np.concatenate(x_data, axis = 0)
+      self.sampled_c1 = np.concatenate(sampled_c1, axis = 0)
+      self.sampled_c2 = np.concatenate(sampled_c2, axis = 0)
+      self.y_data = np.zeros([self.x_data.shape[0], 1])
 
    '''Function to generate contacts depending on the gripper width and dimensions of the bounding box: '''
    def generate_contacts(self):
        # Define the increment:
-       self.increment = 0.01
-       if self.y_dim < self.gripper_width_tolerance:
+       self.increment = self.contact_increment
+       if self.x_dim < self.gripper_width_tolerance and self.y_dim < self.gripper_width_tolerance:
+           if self.multi_face_sampling:
+               print('Both dimensions with gripper width tolerance. Generating contacts along XZ and YZ planes')
+               self.generate_contacts_multi_face(18)
+           else:
+               print('Both dimensions with gripper width tolerance. Generating contacts along XZ plane')
+               self.generate_contacts_xz_additional_features()
+       elif self.y_dim < self.gripper_width_tolerance:
            print('Generating contacts along XZ plane')
            # self.generate_contacts_xz()
            # self.generate_contacts_xz_plucker_non_plucker()
@@ -861,8 +954,6 @@ class point_cloud(object):
            # self.generate_contacts_yz()
            # self.generate_contacts_yz_plucker_non_plucker()
            self.generate_contacts_yz_additional_features()
-       elif self.x_dim < self.gripper_width_tolerance and self.y_dim < self.gripper_width_tolerance:
-           print('Both dimensions with gripper width tolerance. Generating contacts along XZ plane')
        else:
            print('Invalid Data')
 
@@ -876,8 +967,12 @@ class point_cloud(object):
       self.hidden_size1 = 8
       self.hidden_size2 = 3
 
-      # Batch size to divide the dataset into batches:
-      self.batch_size = 2
+      # Number of datapoints evaluated in a single forward pass:
+      self.batch_size = 4096
+
+      import torch
+      from neural_network_module.neural_net import metric_nn
+      from neural_network_module.neural_net import batch_inference
 
       # Defining the neural network model
       model = metric_nn(self.input_size, self.hidden_size1, self.hidden_size2)
@@ -890,81 +985,45 @@ class point_cloud(object):
 
       model.load_state_dict(torch.load(PATH))
 
-      testing_dataset = metric_nn_dataset(self.x_data, self.y_data, transform = transforms.Compose([to_tensor()]))
-
-      # Using the DataLoader class from Pytorch to shuffle the data and divide it into batches:
-      testLoader = DataLoader(testing_dataset, self.batch_size, 
-                                 shuffle=True, num_workers=0)
-
       print('Weights Loaded!')
       # TESTING LOOP:
-      output_predicted = []
-      output_ground_truth = []
-      output_test_datapoints = []
+      # The complete feature matrix is evaluated in chunks of batch_size rows and the predictions stay aligned with x_data:
       model.eval()
-      with torch.no_grad():
-         for i, test_batch in enumerate(testLoader):
-            outputs = model(test_batch['X'])
-            output_predicted.append(outputs.tolist())
-            # predicted.append(outputs.flatten().tolist())
-            output_test_datapoints.append(test_batch['X'].tolist())
-            output_ground_truth.append(test_batch['Y'].tolist())
-
-      # Extracting the output in the required format since the output of the neural network is in the form of 
-      # multidimensional array which includes datapoints grouped together in batches.
-      self.predicted = []
-      self.ground_truth = []
-      self.test_datapoints = []
-      for i, output in enumerate(output_test_datapoints):
-         if i != len(output_test_datapoints)-1:
-               for j,v in enumerate(output_test_datapoints[0]):
-                  self.predicted.append(output_predicted[i][j])
-                  self.ground_truth.append(output_ground_truth[i][j])
-                  self.test_datapoints.append(output_test_datapoints[i][j])
-         elif i == len(output_test_datapoints)-1:
-               for j in range(len(output_test_datapoints[len(output_test_datapoints)-1])):
-                  self.predicted.append(output_predicted[i][j])
-                  self.ground_truth.append(output_ground_truth[i][j])
-                  self.test_datapoints.append(output_test_datapoints[i][j])
-         else:
-               print('Invalid data!')
-
-      self.test_datapoints = np.asarray(self.test_datapoints)
-      self.predicted = np.asarray(self.predicted)
-      self.ground_truth = np.asarray(self.ground_truth)
+      self.test_datapoints = self.x_data
+      self.predicted = batch_inference(model, self.x_data, self.batch_size).astype(np.float64)
+      self.ground_truth = self.y_data
       # Normalizing the values between 0 and 1:
       self.predicted = (self.predicted - np.min(self.predicted))/(np.max(self.predicted - np.min(self.predicted)))
 
    '''This function is used to predict the metric values using the datapoints as input'''
    def predict_metric_generic(self):
+      # TESTING LOOP:
+      # The complete feature matrix is evaluated in chunks of batch_size rows and the predictions stay aligned with x_data:
+      self.test_datapoints = self.x_data
+      self.predicted = self.evaluate_metric(self.x_data)
+
+      self.ground_truth = self.y_data
+      # Normalizing the values between 0 and 1:
+      self.predicted = (self.predicted - np.min(self.predicted))/(np.max(self.predicted - np.min(self.predicted)))
+
+   '''Function to load the metric network (see metric_backend). The returned model is evaluated by evaluate_metric, so that it can be 
+      loaded once and used for several feature matrices:'''
+   def load_metric_model(self):
       # NEWLY TRAINED NEURAL NETWORK
       # NEURAL NETWORK BASED METRIC PREDICTION: 
       # HYPER PARAMETERS: 
       # (1) Network Size:
 
-      # Batch size to divide the dataset into batches:
+      # Number of datapoints evaluated in a single forward pass:
       # Hyperparameters that are part of the pointCloud class
-      self.batch_size = 400
+      self.batch_size = 4096
       # elf.input_size = 12
       # self.input_size = 15
       self.input_size = 18
 
-      # Specifying the seed:
-      seed = 3
-      torch.manual_seed(seed)
-
       # Specifying the depth of the neural network:
       depth = 8
 
-      # Batch norm:
-      norm = nn.BatchNorm1d
-
-      # Activation function:
-      act = nn.ReLU
-
-      # Defining the neural network model
-      model = metric_nn_generic(self.input_size, depth=depth, residual=True, norm=norm, act_layer=act) 
-      
       ## Dataset: Variation 1
       # Plucker:
       # best_weights = 'depth_8_norm_batch_act_relu_residual_True_input_12_test_all_train_variation_1_plucker_extra_False.pth'
@@ -987,480 +1046,517 @@ class point_cloud(object):
       # Loading the trained models: 
       PATH = 'Trained_Models/' + best_weights
 
-      model.load_state_dict(torch.load(PATH, map_location = 'cpu'))
-
-      testing_dataset = metric_nn_dataset(self.x_data, self.y_data, transform = transforms.Compose([to_tensor()]))
-
-      # Using the DataLoader class from Pytorch to shuffle the data and divide it into batches:
-      testLoader = DataLoader(testing_dataset, self.batch_size, 
-                                 shuffle=True, num_workers=0)
+      if self.metric_backend == 'numpy':
+         # Weights of the same checkpoint exported to a .npz file and evaluated without torch:
+         if self.exported_model_path is None:
+            model = load_numpy_model(numpy_model_path(PATH))
+         else:
+            model = load_numpy_model(self.exported_model_path)
+      else:
+         import torch
+         import torch.nn as nn
+         from neural_network_module.model_cache import metric_model_cache
+         from neural_network_module.export_model import exported_model_path
+
+         # Specifying the seed:
+         seed = 3
+         torch.manual_seed(seed)
+
+         # Batch norm:
+         norm = nn.BatchNorm1d
+
+         # Activation function:
+         act = nn.ReLU
+
+         if self.metric_backend == 'torch':
+            # Defining the neural network model. The model is loaded only once per process and then reused from the cache.
+            # The batch normalization layers are folded into the linear layers since the model is only used for inference:
+            model = metric_model_cache.get_model(PATH, self.input_size, depth=depth, residual=True, norm=norm, act_layer=act, fuse=True, 
+                                                 quantize=self.metric_quantized)
+         elif self.metric_backend in ['torchscript', 'onnx']:
+            # Frozen TorchScript or ONNX graph exported from the same checkpoint:
+            if self.exported_model_path is None:
+               model = metric_model_cache.get_exported_model(exported_model_path(PATH, self.metric_backend))
+            else:
+               model = metric_model_cache.get_exported_model(self.exported_model_path)
+         else:
+            raise ValueError('Unknown metric backend: ' + str(self.metric_backend))
 
       print('Weights Loaded!')
-      # TESTING LOOP:
-      output_predicted = []
-      output_ground_truth = []
-      output_test_datapoints = []
-      model.eval()
-      with torch.no_grad():
-         for i, test_batch in enumerate(testLoader):
-            outputs = model(test_batch['X'])
-            output_predicted.append(outputs.tolist())
-            # predicted.append(outputs.flatten().tolist())
-            output_test_datapoints.append(test_batch['X'].tolist())
-            output_ground_truth.append(test_batch['Y'].tolist())
-
-      # Extracting the output in the required format since the output of the neural network is in the form of 
-      # multidimensional array which includes datapoints grouped together in batches.
-      self.predicted = []
-      self.ground_truth = []
-      self.test_datapoints = []
-      for i, output in enumerate(output_test_datapoints):
-         if i != len(output_test_datapoints)-1:
-               for j,v in enumerate(output_test_datapoints[0]):
-                  self.predicted.append(output_predicted[i][j])
-                  self.ground_truth.append(output_ground_truth[i][j])
-                  self.test_datapoints.append(output_test_datapoints[i][j])
-         elif i == len(output_test_datapoints)-1:
-               for j in range(len(output_test_datapoints[len(output_test_datapoints)-1])):
-                  self.predicted.append(output_predicted[i][j])
-                  self.ground_truth.append(output_ground_truth[i][j])
-                  self.test_datapoints.append(output_test_datapoints[i][j])
-         else:
-               print('Invalid data!')
+      return model
+
+   '''Function to evaluate the metric network (see metric_backend) on the feature matrix x_data. The model is loaded unless a model returned
+      by load_metric_model is given. Returns the raw (not normalized) metric values as a float64 array with one row per datapoint:'''
+   def evaluate_metric(self, x_data, model = None):
+      if model is None:
+         model = self.load_metric_model()
 
-      self.test_datapoints = np.asarray(self.test_datapoints)
-      self.predicted = np.asarray(self.predicted)
-      self.ground_truth = np.asarray(self.ground_truth)
+      if self.metric_backend == 'numpy':
+         return model.predict(x_data, self.batch_size).astype(np.float64)
+      else:
+         from neural_network_module.neural_net import batch_inference
+
+         # The feature matrix is evaluated in chunks of batch_size rows and the predictions stay aligned with x_data:
+         return batch_inference(model, x_data, self.batch_size).astype(np.float64)
+
+   '''Function to compute the candidate pivoting screw axes along the four edges of the bottom face of the bounding box (edge_dict_object).
+      Every axis passes through the midpoint of its edge and is oriented as the cross product of the Z axis (outward normal of the top face)
+      and the outward normal of the side face adjacent to the edge, so that a positive screw_angle lifts the box about that edge, like 
+      the default screw axis [0, 1, 0] at X max. It is checked that the motion keeps all the vertices at or above the bottom face:'''
+   def get_bottom_edge_screw_axes(self):
+      if self.face_normals is None:
+         self.compute_face_geometry()
+      edges = [(self.edge_dict_object[0][0], self.edge_dict_object[0][1]), (self.edge_dict_object[0][2], self.edge_dict_object[0][3]), 
+               (self.edge_dict_object[1][0], self.edge_dict_object[1][1]), (self.edge_dict_object[1][2], self.edge_dict_object[1][3])]
+      # Side faces adjacent to the edges (see face_vertex_indices): Y min, Y max, X min and X max:
+      side_faces = [0, 2, 1, 3]
+      start = np.asarray([edge[0] for edge in edges])
+      end = np.asarray([edge[1] for edge in edges])
+      screw_axes = np.cross(self.face_normals[5], self.face_normals[side_faces])
+      screw_axes = np.divide(screw_axes, la.norm(screw_axes, axis = 1)[:, np.newaxis])
+      points = (start + end)/2
+
+      # Vertices of the bounding box after the pivoting motion about every candidate:
+      g = screw_transformations(screw_axes, points, self.screw_pitch, self.screw_angle)
+      vertices = self.transformed_vertices_object_frame
+      z_moved = np.matmul(vertices, np.transpose(g[:, 2, 0:3], [1, 0])) + g[:, 2, 3]
+      z_bottom = np.min(vertices[:, 2])
+      if np.any(z_moved < z_bottom - 1e-9*max(1.0, np.max(np.abs(vertices)))):
+         raise ValueError('The pivoting motion about a bottom edge moves the bounding box below its bottom face (screw_angle must be positive)')
+      return screw_axes, points
+
+   '''Function to predict the metric for multiple candidate screw axes with a single evaluation of the network. It is called instead of 
+      predict_metric_generic after generate_contacts. The feature matrices of all the candidates are concatenated, the raw metric values of 
+      every candidate are stored in screw_metric_grids and the candidate with the highest metric value (screw_scores) is selected: its 
+      parameters are assigned to screw_axis, point and moment, and x_data and predicted correspond to it as after predict_metric_generic.
+      By default the candidates are the four edges of the bottom face of the bounding box (see get_bottom_edge_screw_axes):'''
+   def predict_metric_multi_screw(self, screw_axes = None, points = None):
+      if self.contact_plane is None:
+         raise ValueError('predict_metric_multi_screw requires the contacts of a single pair of faces')
+      if screw_axes is None:
+         screw_axes, points = self.get_bottom_edge_screw_axes()
+      self.screw_axis_candidates = np.reshape(np.asarray(screw_axes, dtype = np.float64), [-1, 3])
+      self.screw_point_candidates = np.reshape(np.asarray(points, dtype = np.float64), [-1, 3])
+      num_candidates = self.screw_axis_candidates.shape[0]
+      num_contacts, num_features = self.x_data.shape
+
+      x_data = np.empty([num_candidates*num_contacts, num_features])
+      for i in range(num_candidates):
+         x_data[i*num_contacts:(i+1)*num_contacts] = self.get_contact_features(self.sampled_c1, self.sampled_c2, num_features, 
+                                                                               self.screw_axis_candidates[i], self.screw_point_candidates[i])
+      metric_values = np.reshape(self.evaluate_metric(x_data), [num_candidates, num_contacts])
+
+      # The contacts are sampled on a lattice with the Z axis as the outer loop:
+      if self.contact_plane == 'xz':
+         u_axis_increments = self.x_axis_increments
+      else:
+         u_axis_increments = self.y_axis_increments
+      self.screw_metric_grids = np.reshape(metric_values, [num_candidates, len(self.z_axis_increments), len(u_axis_increments)])
+      self.screw_scores = np.max(metric_values, axis = 1)
+      self.best_screw_index = int(np.argmax(self.screw_scores))
+
+      # Selecting the best candidate:
+      self.screw_axis = self.screw_axis_candidates[self.best_screw_index]
+      self.point = self.screw_point_candidates[self.best_screw_index]
+      self.moment = np.cross(self.point, self.screw_axis)
+      self.x_data = x_data[self.best_screw_index*num_contacts:(self.best_screw_index+1)*num_contacts]
+      self.test_datapoints = self.x_data
+
+      self.predicted = np.reshape(metric_values[self.best_screw_index], [-1, 1])
+      self.ground_truth = self.y_data
       # Normalizing the values between 0 and 1:
       self.predicted = (self.predicted - np.min(self.predicted))/(np.max(self.predicted - np.min(self.predicted)))
+      return self.screw_metric_grids, self.best_screw_index
+
+   '''Function to evaluate the metric network (model returned by load_metric_model) at the lattice points (z_indices, u_indices) of the 
+      axes z_axis and u_axis. The features are appended to the list evaluated_x_data and the raw metric values are returned:'''
+   def evaluate_lattice_points(self, u_axis, z_axis, z_indices, u_indices, num_features, evaluated_x_data, model):
+      c1, c2 = self.get_contacts(self.contact_plane, u_axis[u_indices], z_axis[z_indices])
+      x_data = self.get_contact_features(c1, c2, num_features)
+      metric_values = self.evaluate_metric(x_data, model)
+
+      evaluated_x_data.append(x_data)
+      return np.reshape(metric_values, [-1])
+
+   '''Function to predict the metric values by adaptive coarse-to-fine sampling. It is called instead of predict_metric_generic after 
+      generate_contacts. The metric is first predicted on a lattice with the spacing of generate_contacts (contact_increment), then the 
+      lattice is refined only inside the cells whose normalized metric value is above refinement_threshold (and their neighbouring cells) 
+      until the spacing reaches target_increment. The metric values at the lattice points which are not evaluated by the network are 
+      linearly interpolated from the coarser lattice. Afterwards increment, the axis increments, sampled_c1, sampled_c2, x_data and 
+      predicted correspond to the uniform lattice with spacing target_increment, so that get_ideal_grasping_region is used as usual. The 
+      features of the contacts evaluated by the network are stored in adaptive_x_data:'''
+   def predict_metric_adaptive(self, target_increment = None):
+      if self.contact_plane is None:
+         raise ValueError('predict_metric_adaptive requires the contacts of a single pair of faces')
+      if target_increment is None:
+         target_increment = self.target_increment
+      num_features = self.x_data.shape[1]
+
+      # The lattices are nested, the coarse lattice contains every stride-th point of the finest lattice along both axes. The spacing of the
+      # coarse lattice is contact_increment, so that the result does not depend on a previous call which changed increment:
+      stride = int(round(self.contact_increment/target_increment))
+      if stride <= 1:
+         self.predict_metric_generic()
+         self.adaptive_x_data = self.x_data
+         self.num_metric_evaluations = self.x_data.shape[0]
+         return
+
+      vertices = self.transformed_vertices_object_frame
+      if self.contact_plane == 'xz':
+         u_axis = np.arange(vertices[0,0], vertices[1,0], target_increment)
+      else:
+         u_axis = np.arange(vertices[1,1], vertices[7,1], target_increment)
+      z_axis = np.arange(vertices[0,2], vertices[3,2], target_increment)
+
+      # Raw metric values at the points of the finest lattice evaluated by the network:
+      evaluated = np.zeros([len(z_axis), len(u_axis)], dtype = bool)
+      raw_values = np.zeros([len(z_axis), len(u_axis)])
+      evaluated_x_data = []
+
+      # The network is loaded once for all the levels of the lattice:
+      model = self.load_metric_model()
+
+      # Coarse lattice:
+      z_indices = np.arange(0, len(z_axis), stride)
+      u_indices = np.arange(0, len(u_axis), stride)
+      Z_indices, U_indices = np.meshgrid(z_indices, u_indices, indexing = 'ij')
+      raw_values[Z_indices, U_indices] = np.reshape(self.evaluate_lattice_points(u_axis, z_axis, Z_indices.ravel(), U_indices.ravel(), num_features, evaluated_x_data, model), Z_indices.shape)
+      evaluated[Z_indices, U_indices] = True
+      values = raw_values[Z_indices, U_indices]
+
+      while stride > 1:
+         # The next stride is the largest divisor of the current stride which is at most half of it:
+         next_stride = max(d for d in range(1, stride//2 + 1) if stride % d == 0)
+         next_z_indices = np.arange(0, len(z_axis), next_stride)
+         next_u_indices = np.arange(0, len(u_axis), next_stride)
+         Z_indices, U_indices = np.meshgrid(next_z_indices, next_u_indices, indexing = 'ij')
+
+         if len(z_indices) > 1 and len(u_indices) > 1:
+            # Normalized metric value of the cells of the current lattice (average of the 4 corners as in generate_grid):
+            normalized = (values - np.min(values))/max(np.max(values) - np.min(values), np.finfo(float).tiny)
+            cells = (normalized[:-1, :-1] + normalized[:-1, 1:] + normalized[1:, 1:] + normalized[1:, :-1])/4 >= self.refinement_threshold
+            cells = binary_dilation(cells, structure = np.ones([3,3], dtype = bool))
+
+            # Cell of the current lattice containing every point of the next lattice (the points beyond the last row/column of the 
+            # current lattice belong to the last cell):
+            refined = cells[np.minimum(Z_indices//stride, len(z_indices)-2), np.minimum(U_indices//stride, len(u_indices)-2)]
+
+            interpolator = RegularGridInterpolator((z_axis[z_indices], u_axis[u_indices]), values, bounds_error = False, fill_value = None)
+            next_values = interpolator(np.stack([z_axis[Z_indices.ravel()], u_axis[U_indices.ravel()]], axis = 1))
+            next_values = np.reshape(next_values, Z_indices.shape)
+         else:
+            # A lattice with a single row or column cannot be interpolated and is refined everywhere:
+            refined = np.ones(Z_indices.shape, dtype = bool)
+            next_values = np.zeros(Z_indices.shape)
 
-   '''# Function to project the points onto a one of the surfaces of the bounding box:'''
-   def project_points_yz(self):
-      # PROJECTING THE POINTS ON TO ONE OF THE PLANES: 
-      # Computing the equation of the plane. For our case we will be considering two planes. But for the sake of implementation 
-      # we are only considering one plane: 
-      # plane_points = [transformed_vertices[1, :], transformed_vertices[6, :], transformed_vertices[4, :], transformed_vertices[7, :]]
-
-      # Computing the two vectors associated with three points: 
-      vect_1 = np.subtract(self.transformed_vertices_object_frame[7, :], self.transformed_vertices_object_frame[4, :])
-      vect_2 = np.subtract(self.transformed_vertices_object_frame[7, :], self.transformed_vertices_object_frame[1, :])
+         # Evaluating the network only at the new points inside the refined cells:
+         new_points = refined & ~evaluated[Z_indices, U_indices]
+         raw_values[Z_indices[new_points], U_indices[new_points]] = self.evaluate_lattice_points(u_axis, z_axis, Z_indices[new_points], U_indices[new_points], num_features, evaluated_x_data, model)
+         evaluated[Z_indices[new_points], U_indices[new_points]] = True
 
-      # Computing the center point on the plane just for visualization: 
-      center_point_plane = [self.transformed_vertices_object_frame[1, 0], self.p_base[1], self.p_base[2]]
+         known = evaluated[Z_indices, U_indices]
+         next_values[known] = raw_values[Z_indices[known], U_indices[known]]
 
-      # Normal vector corresponding to the plane:
-      n = np.cross(vect_1, vect_2)
-      unit_n = np.divide(n, la.norm(n))
+         stride, z_indices, u_indices, values = next_stride, next_z_indices, next_u_indices, next_values
 
-      # Translating each of the points by a specified distance: 
-      # Computing the D in the equation of the plane Ax + By + Cz + D = 0:
-      D = np.dot(center_point_plane, unit_n)
+      # The finest lattice is used for generating the grid:
+      self.increment = target_increment
+      if self.contact_plane == 'xz':
+         self.x_axis_increments = u_axis
+      else:
+         self.y_axis_increments = u_axis
+      self.z_axis_increments = z_axis
+
+      # Features of the contacts evaluated by the network:
+      self.adaptive_x_data = np.concatenate(evaluated_x_data, axis = 0)
+      self.num_metric_evaluations = self.adaptive_x_data.shape[0]
+
+      # Contacts and features of the finest lattice (Z axis as the outer loop), aligned with the predicted metric values:
+      u_grid, z_grid = np.meshgrid(u_axis, z_axis)
+      self.sampled_c1, self.sampled_c2 = self.get_contacts(self.contact_plane, u_grid.ravel(), z_grid.ravel())
+      self.x_data = self.get_contact_features(self.sampled_c1, self.sampled_c2, num_features)
+      self.y_data = np.zeros([self.x_data.shape[0], 1])
+      self.test_datapoints = self.x_data
+      self.ground_truth = self.y_data
+
+      # Metric values on the finest lattice (Z axis as the outer loop) normalized between 0 and 1:
+      self.predicted = np.reshape(values, [-1, 1])
+      self.predicted = (self.predicted - np.min(self.predicted))/(np.max(self.predicted - np.min(self.predicted)))
 
-      # Initializing an empty array to store the projected points: 
-      self.projected_points = np.zeros([self.transformed_points_object_frame.shape[0], self.transformed_points_object_frame.shape[1]])
+   '''Function to compute the outward unit normals, the offsets, the centers and the extents of the six faces of the bounding box in the 
+      object reference frame. It is called once per bounding box by compute_bounding_box:'''
+   def compute_face_geometry(self):
+      vertices = self.transformed_vertices_object_frame
+      corners = vertices[self.face_vertex_indices]
+
+      # Normal vectors computed using two edges of every face and oriented away from the center of the bounding box:
+      normals = np.cross(corners[:, 1, :] - corners[:, 0, :], corners[:, 3, :] - corners[:, 0, :])
+      normals = np.divide(normals, la.norm(normals, axis = 1)[:, np.newaxis])
+      outward = np.sum(normals*(corners[:, 0, :] - np.mean(vertices, axis = 0)), axis = 1)
+      normals[outward < 0] = -normals[outward < 0]
+
+      self.face_normals = normals
+      self.face_offsets = np.sum(normals*corners[:, 0, :], axis = 1)
+      self.face_centers = np.mean(corners, axis = 1)
+      self.face_extents = np.stack([la.norm(corners[:, 1, :] - corners[:, 0, :], axis = 1), la.norm(corners[:, 3, :] - corners[:, 0, :], axis = 1)], axis = 1)
+
+   '''Function to compute the distances of K points (array of shape (K,3) in the object reference frame) to the planes of the given faces 
+      of the bounding box. Returns an array of shape (K, len(face_indices)):'''
+   def get_face_distances(self, points, face_indices):
+      if self.face_normals is None:
+         self.compute_face_geometry()
+      face_indices = np.asarray(face_indices)
+      return np.abs(np.matmul(points, self.face_normals[face_indices].T) - self.face_offsets[face_indices])
+
+   '''Function to project points orthogonally onto one of the faces of the bounding box (see face_vertex_indices). By default the points of 
+      the point cloud expressed in the object reference frame are projected:'''
+   def project_points_to_face(self, face_index, points = None):
+      if self.face_normals is None:
+         self.compute_face_geometry()
+      if points is None:
+         points = self.transformed_points_object_frame
+
+      unit_n = self.face_normals[face_index]
+      # Signed distance of every point from the plane of the face (negative inside the bounding box):
+      distance = np.dot(points, unit_n) - self.face_offsets[face_index]
+      return points - distance[:, np.newaxis]*unit_n
 
-      for i, point in enumerate(self.transformed_points_object_frame):
-        distance = np.divide(la.norm(unit_n[0]*point[0] + unit_n[1]*point[1] + unit_n[2]*point[2] - D), np.sqrt(unit_n[0]**2 + unit_n[1]**2 + unit_n[2]**2))
-        self.projected_points[i, :] = np.add(point, np.dot(distance, unit_n))
+   '''# Function to project the points onto a one of the surfaces of the bounding box:'''
+   def project_points_yz(self):
+      # PROJECTING THE POINTS ON TO ONE OF THE PLANES: 
+      # The points are projected onto the face at X max: plane_points = [transformed_vertices[7, :], transformed_vertices[1, :], 
+      # transformed_vertices[6, :], transformed_vertices[4, :]]
+      self.projected_points = self.project_points_to_face(3)
 
    '''# Function to project the points onto a one of the surfaces of the bounding box:'''
    def project_points_xz(self):
       # PROJECTING THE POINTS ON TO ONE OF THE PLANES: 
-      # Computing the equation of the plane. For our case we will be considering two planes. But for the sake of implementation 
-      # we are only considering one plane: 
-      # plane_points = [transformed_vertices[1, :], transformed_vertices[6, :], transformed_vertices[4, :], transformed_vertices[7, :]]
-
-      # Computing the two vectors associated with three points: 
-      vect_1 = np.subtract(self.transformed_vertices_object_frame[3, :], self.transformed_vertices_object_frame[6, :])
-      vect_2 = np.subtract(self.transformed_vertices_object_frame[1, :], self.transformed_vertices_object_frame[6, :])
-
-      # Computing the center point on the plane just for visualization: 
-      center_point_plane = [self.p_base[1], self.transformed_vertices_object_frame[1, 1], self.p_base[2]]
-
-      # Normal vector corresponding to the plane:
-      n = np.cross(vect_1, vect_2)
-      unit_n = np.divide(n, la.norm(n))
-
-      # Translating each of the points by a specified distance: 
-      # Computing the D in the equation of the plane Ax + By + Cz + D = 0:
-      D = np.dot(center_point_plane, unit_n)
-
-      # Initializing an empty array to store the projected points: 
-      self.projected_points = np.zeros([self.transformed_points_object_frame.shape[0], self.transformed_points_object_frame.shape[1]])
-
-      for i, point in enumerate(self.transformed_points_object_frame):
-        distance = np.divide(la.norm(unit_n[0]*point[0] + unit_n[1]*point[1] + unit_n[2]*point[2] - D), np.sqrt(unit_n[0]**2 + unit_n[1]**2 + unit_n[2]**2))
-        self.projected_points[i, :] = np.add(point, np.dot(distance, unit_n))
+      # The points are projected onto the face at Y min: plane_points = [transformed_vertices[1, :], transformed_vertices[0, :], 
+      # transformed_vertices[3, :], transformed_vertices[6, :]]
+      self.projected_points = self.project_points_to_face(0)
    
-   ''' Function to generate a grid on the surface of the bounding box based on the computed metric values:''' 
-   def generate_grid_yz(self):
+   ''' Function to generate a grid on the surface of the bounding box based on the computed metric values. The grid is generated on the 
+       XZ or the YZ plane depending on where the contacts were sampled. The predicted metric values are used unless the metric values of 
+       the lattice of the plane are given: '''
+   def generate_grid(self, plane, metric_values = None):
       # GRID GENERATION: 
-      '''Now we generate the grid using the multidimensional arrays 'x_data' and 'metric_values'
-         Since we are sampling contact locations along the Y and Z axis of the object lcoal reference frame: '''
-      self.y_counter = 0
-      self.z_counter = 0
-      counter = 0
-      
-      # Create a dictionary of test_datapoints and predicted metric values. 
-      '''This is being done to access the predicted metric values so that it can efficiently used for grid generation'''
-      dictionary_test_data = {}
-      for test_point, label in zip(self.test_datapoints, self.predicted):
-          test_point = np.around(test_point, 3)
-          dictionary_test_data[tuple([test_point[0].item(), test_point[1].item(), test_point[2].item(), test_point[3].item(), 
-                                      test_point[4].item(), test_point[5].item(),test_point[6].item(), test_point[7].item(), 
-                                      test_point[8].item(), test_point[9].item(), test_point[10].item(), test_point[11].item()])] = label.item()
-          
-      # Query the dictionary for x_data to get the corresponding metric_values: 
-      self.metric_values = np.zeros([self.predicted.shape[0], self.predicted.shape[1]])
-      for i, x in enumerate(self.x_data):
-          x = np.around(x, 3)    
-          self.metric_values[i, :] = np.asarray(dictionary_test_data[tuple([x[0].item(), x[1].item(), x[2].item(), x[3].item(), 
-                                      x[4].item(), x[5].item(), x[6].item(), x[7].item(), 
-                                      x[8].item(), x[9].item(), x[10].item(), x[11].item()])])
-
-      self.grid_points = np.around(np.asarray([np.reshape(np.asarray([y, z]), [2,1]) for z in self.z_axis_increments for y in self.y_axis_increments]), 3)
-      
-      # Create a dictionary of grid points and metric_values 
-      dictionary_grid_points = {}
-      for grid_point, metric_value in zip(self.grid_points, self.metric_values):
-          dictionary_grid_points[tuple([grid_point[0].item(), grid_point[1].item()])] = metric_value.item()
+      '''Now we generate the grid using the multidimensional arrays 'x_data' and 'metric_values'. The contacts are sampled on a lattice
+         with the Z axis as the outer loop, therefore the metric values can be reshaped into a 2D array of shape (len(z), len(u)) where u 
+         is the X or the Y axis of the object local reference frame. The value of every grid cell is the average of the metric values at 
+         its 4 corners, which is computed using shifted slices of this array: '''
+      if plane == 'xz':
+         u_axis_increments = self.x_axis_increments
+      elif plane == 'yz':
+         u_axis_increments = self.y_axis_increments
+      else:
+         raise ValueError(f'Invalid plane for generating the grid: {plane}')
+      n_u = len(u_axis_increments)
+      n_z = len(self.z_axis_increments)
 
-      # Initializing the empty arrays:
-      self.grid_metric_values = np.zeros([len(self.y_axis_increments), len(self.z_axis_increments), 1])
-      self.grid_centers_matrix = np.zeros([len(self.y_axis_increments), len(self.z_axis_increments), 2])
-      self.Y_grid_points_matrix = np.zeros([len(self.y_axis_increments), len(self.z_axis_increments), 4])
-      self.Z_grid_points_matrix = np.zeros([len(self.y_axis_increments), len(self.z_axis_increments), 4])
+      # The predicted metric values are aligned with x_data, therefore they can be used directly for grid generation:
+      self.metric_values = self.predicted if metric_values is None else metric_values
+      # The metric pyramid of a previous grid is not valid anymore (see build_metric_pyramid):
+      self.metric_pyramid = None
 
-      self.grid_centers = np.zeros([len(self.y_axis_increments)*len(self.z_axis_increments), 2])
-      self.Y_grid_points = np.zeros([len(self.y_axis_increments)*len(self.z_axis_increments), 4])
-      self.Z_grid_points = np.zeros([len(self.y_axis_increments)*len(self.z_axis_increments), 4])
+      u_grid, z_grid = np.meshgrid(u_axis_increments, self.z_axis_increments)
+      self.grid_points = np.around(np.stack([u_grid.ravel(), z_grid.ravel()], axis=1), 3)[:, :, np.newaxis]
 
-      self.metric_grid = np.zeros([len(self.y_axis_increments)*len(self.z_axis_increments), 1])
-      self.X_grid_points = self.transformed_vertices_object_frame[1,0]*np.ones([self.Y_grid_points.shape[0], self.Y_grid_points.shape[1]])
+      # Initializing the empty arrays. The last row and column are not part of any grid cell and stay zero:
+      self.grid_metric_values = np.zeros([n_u, n_z, 1])
+      self.grid_centers_matrix = np.zeros([n_u, n_z, 2])
+      U_grid_points_matrix = np.zeros([n_u, n_z, 4])
+      self.Z_grid_points_matrix = np.zeros([n_u, n_z, 4])
 
-      # Resetting the counter value back to 0 so that it doesn't cause any further errors.
-      counter = 0
+      self.grid_centers = np.zeros([n_u*n_z, 2])
+      U_grid_points = np.zeros([n_u*n_z, 4])
+      self.Z_grid_points = np.zeros([n_u*n_z, 4])
+      self.metric_grid = np.zeros([n_u*n_z, 1])
 
       print('Generating Grid ... ')
-      for i, z in enumerate(self.z_axis_increments):
-         # Termination criteria for the Z Axis:
-         if self.z_axis_increments[i] == self.z_axis_increments[len(self.z_axis_increments)-1]:
-               break
-         else:
-               self.y_counter = 0
-               for j, y in enumerate(self.y_axis_increments):
-                  if self.y_axis_increments[j] == self.y_axis_increments[len(self.y_axis_increments)-1]:
-                     break
-                  else:
-                     # For the grid the points are arranged in an anticlockwise order:
-                     p_1 = np.reshape(np.around(np.asarray([self.y_axis_increments[j], self.z_axis_increments[i]]), 3), [2,1])
-                     p_2 = np.reshape(np.around(np.asarray([self.y_axis_increments[j+1], self.z_axis_increments[i]]), 3), [2,1])
-                     p_3 = np.reshape(np.around(np.asarray([self.y_axis_increments[j+1], self.z_axis_increments[i+1]]), 3), [2,1])
-                     p_4 = np.reshape(np.around(np.asarray([self.y_axis_increments[j], self.z_axis_increments[i+1]]), 3), [2,1])
-
-                     # Get the corresponding metric values:
-                     eta_1 = np.asarray(dictionary_grid_points[tuple([p_1[0].item(), p_1[1].item()])])
-                     eta_2 = np.asarray(dictionary_grid_points[tuple([p_2[0].item(), p_2[1].item()])])
-                     eta_3 = np.asarray(dictionary_grid_points[tuple([p_3[0].item(), p_3[1].item()])])
-                     eta_4 = np.asarray(dictionary_grid_points[tuple([p_4[0].item(), p_4[1].item()])])
-
-                     # Concatenate and store the values in a single numpy array:
-                     eta_values = np.asarray([eta_1, eta_2, eta_3, eta_4])
-
-                     # Computing the average of the 4 points:
-                     eta_avg = np.mean(eta_values)
-
-                     # Storing the grid points and the metric values:
-                     self.grid_metric_values[self.y_counter, self.z_counter, :] = eta_avg
-                     self.metric_grid[counter, :] = eta_avg
-
-                     # Storing the grid intervals and the transformed grid intervals in the same format:
-                     self.Y_grid_points_matrix[self.y_counter, self.z_counter, :] = np.reshape(np.asarray([self.y_axis_increments[j], self.y_axis_increments[j] + self.increment, self.y_axis_increments[j] + self.increment, self.y_axis_increments[j]]), [4])
-                     self.Z_grid_points_matrix[self.y_counter, self.z_counter, :] = np.reshape(np.asarray([self.z_axis_increments[i], self.z_axis_increments[i], self.z_axis_increments[i] + self.increment, self.z_axis_increments[i] + self.increment]), [4])
-                     self.grid_centers_matrix[self.y_counter, self.z_counter, :] = np.reshape(np.asarray([self.y_axis_increments[j] + (self.increment/2), self.z_axis_increments[i] + (self.increment/2)]), [2])
-                     
-                     self.Y_grid_points[counter, :] = np.reshape(np.asarray([self.y_axis_increments[j], self.y_axis_increments[j] + self.increment, self.y_axis_increments[j] + self.increment, self.y_axis_increments[j]]), [4])
-                     self.Z_grid_points[counter, :] = np.reshape(np.asarray([self.z_axis_increments[i], self.z_axis_increments[i], self.z_axis_increments[i] + self.increment, self.z_axis_increments[i] + self.increment]), [4])
-                     self.grid_centers[counter, :] = np.reshape(np.asarray([self.y_axis_increments[j] + (self.increment/2), self.z_axis_increments[i] + (self.increment/2)]), [2])
-
-                     # Updating the two inner loop counters.
-                     self.y_counter += 1
-                     counter += 1
-
-               # Updating outer loop counter.
-               self.z_counter += 1
+      if n_u > 1 and n_z > 1:
+         eta = np.reshape(self.metric_values, [n_z, n_u])
+
+         # For the grid the points are arranged in an anticlockwise order (p_1, p_2, p_3, p_4) and the average of the 4 points is computed:
+         eta_avg = (eta[:-1, :-1] + eta[:-1, 1:] + eta[1:, 1:] + eta[1:, :-1])/4
+
+         # Corners and centers of the grid cells, the first index is along the Z axis and the second index is along the U axis:
+         u = u_axis_increments[np.newaxis, :-1]*np.ones([n_z-1, 1])
+         z = self.z_axis_increments[:-1, np.newaxis]*np.ones([1, n_u-1])
+         U_points = np.stack([u, u + self.increment, u + self.increment, u], axis=2)
+         Z_points = np.stack([z, z, z + self.increment, z + self.increment], axis=2)
+         centers = np.stack([u + (self.increment/2), z + (self.increment/2)], axis=2)
+
+         # Storing the grid points and the metric values. The matrices are indexed by (u, z) and the flattened arrays are ordered with the
+         # Z axis as the outer loop:
+         num_cells = (n_u-1)*(n_z-1)
+         self.grid_metric_values[:-1, :-1, 0] = eta_avg.T
+         self.metric_grid[:num_cells, 0] = eta_avg.ravel()
+
+         U_grid_points_matrix[:-1, :-1, :] = np.transpose(U_points, [1, 0, 2])
+         self.Z_grid_points_matrix[:-1, :-1, :] = np.transpose(Z_points, [1, 0, 2])
+         self.grid_centers_matrix[:-1, :-1, :] = np.transpose(centers, [1, 0, 2])
+         U_grid_points[:num_cells, :] = np.reshape(U_points, [num_cells, 4])
+         self.Z_grid_points[:num_cells, :] = np.reshape(Z_points, [num_cells, 4])
+         self.grid_centers[:num_cells, :] = np.reshape(centers, [num_cells, 2])
+
+      # Number of grid cells along each axis:
+      u_counter = max(n_u-1, 0) if n_z > 1 else 0
+      self.z_counter = max(n_z-1, 0)
+
+      if plane == 'xz':
+         self.x_counter = u_counter
+         self.X_grid_points_matrix = U_grid_points_matrix
+         self.X_grid_points = U_grid_points
+         self.Y_grid_points = self.transformed_vertices_object_frame[1,1]*np.ones([self.X_grid_points.shape[0], self.X_grid_points.shape[1]])
+      else:
+         self.y_counter = u_counter
+         self.Y_grid_points_matrix = U_grid_points_matrix
+         self.Y_grid_points = U_grid_points
+         self.X_grid_points = self.transformed_vertices_object_frame[1,0]*np.ones([self.Y_grid_points.shape[0], self.Y_grid_points.shape[1]])
+
+   ''' Function to generate a grid on the surface of the bounding box based on the computed metric values:''' 
+   def generate_grid_yz(self):
+      self.generate_grid('yz')
 
    ''' Function to generate a grid on the surface of the bounding box based on the computed metric values: ''' 
    def generate_grid_xz(self):
-      # GRID GENERATION: 
-      '''Now we generate the grid using the multidimensional arrays 'x_data' and 'metric_values'
-         Since we are sampling contact locations along the Y and Z axis, we also need to do something similar to 
-         X and Z axis of the object lcoal reference frame: '''
-      self.x_counter = 0
-      self.z_counter = 0
-      counter = 0
-
-      # Create a dictionary of test_datapoints and predicted metric values.
-      '''This is being done to access the predicted metric values so that it can efficiently used for grid generation'''
-      dictionary_test_data = {}
-      for test_point, label in zip(self.test_datapoints, self.predicted):
-          test_point = np.around(test_point, 3)
-          dictionary_test_data[tuple([test_point[0].item(), test_point[1].item(), test_point[2].item(), test_point[3].item(), 
-                                      test_point[4].item(), test_point[5].item(),test_point[6].item(), test_point[7].item(), 
-                                      test_point[8].item(), test_point[9].item(), test_point[10].item(), test_point[11].item()])] = label.item()
-          
-      # Query the dictionary for x_data to get the corresponding metric_values: 
-      self.metric_values = np.zeros([self.predicted.shape[0], self.predicted.shape[1]])
-      for i, x in enumerate(self.x_data):
-          x = np.around(x, 3)    
-          self.metric_values[i, :] = np.asarray(dictionary_test_data[tuple([x[0].item(), x[1].item(), x[2].item(), x[3].item(), 
-                                      x[4].item(), x[5].item(), x[6].item(), x[7].item(), 
-                                      x[8].item(), x[9].item(), x[10].item(), x[11].item()])])
-      
-      self.grid_points = np.around(np.asarray([np.reshape(np.asarray([x, z]), [2,1]) for z in self.z_axis_increments for x in self.x_axis_increments]), 3)
-      # Create a dictionary of grid points and metric_values 
-      dictionary_grid_points = {}
-      for grid_point, metric_value in zip(self.grid_points, self.metric_values):
-          dictionary_grid_points[tuple([grid_point[0].item(), grid_point[1].item()])] = metric_value.item()
-
-      # Initializing the empty arrays:
-      self.grid_metric_values = np.zeros([len(self.x_axis_increments), len(self.z_axis_increments), 1])
-      self.grid_centers_matrix = np.zeros([len(self.x_axis_increments), len(self.z_axis_increments), 2])
-      self.X_grid_points_matrix = np.zeros([len(self.x_axis_increments), len(self.z_axis_increments), 4])
-      self.Z_grid_points_matrix = np.zeros([len(self.x_axis_increments), len(self.z_axis_increments), 4])
-
-      self.grid_centers = np.zeros([len(self.x_axis_increments)*len(self.z_axis_increments), 2])
-      self.X_grid_points = np.zeros([len(self.x_axis_increments)*len(self.z_axis_increments), 4])
-      self.Z_grid_points = np.zeros([len(self.x_axis_increments)*len(self.z_axis_increments), 4])
-
-      self.metric_grid = np.zeros([len(self.x_axis_increments)*len(self.z_axis_increments), 1])
-      self.Y_grid_points = self.transformed_vertices_object_frame[1,1]*np.ones([self.X_grid_points.shape[0], self.X_grid_points.shape[1]])
-
-      # Resetting the counter value back to 0 so that it doesn't cause any further errors.
-      counter = 0
-
-      print('Generating Grid ... ')
-      for i, z in enumerate(self.z_axis_increments):
-         # Termination criteria for the Z Axis:
-         if self.z_axis_increments[i] == self.z_axis_increments[len(self.z_axis_increments)-1]:
-               break
-         else:
-               self.x_counter = 0
-               for j, x in enumerate(self.x_axis_increments):
-                  if self.x_axis_increments[j] == self.x_axis_increments[len(self.x_axis_increments)-1]:
-                     break
-                  else:
-                     # For the grid the points are arranged in an anticlockwise order:
-                     p_1 = np.reshape(np.around(np.asarray([self.x_axis_increments[j], self.z_axis_increments[i]]), 3), [2,1])
-                     p_2 = np.reshape(np.around(np.asarray([self.x_axis_increments[j+1], self.z_axis_increments[i]]), 3), [2,1])
-                     p_3 = np.reshape(np.around(np.asarray([self.x_axis_increments[j+1], self.z_axis_increments[i+1]]), 3), [2,1])
-                     p_4 = np.reshape(np.around(np.asarray([self.x_axis_increments[j], self.z_axis_increments[i+1]]), 3), [2,1])
-
-                    # Get the corresponding metric values:
-                     eta_1 = np.asarray(dictionary_grid_points[tuple([p_1[0].item(), p_1[1].item()])])
-                     eta_2 = np.asarray(dictionary_grid_points[tuple([p_2[0].item(), p_2[1].item()])])
-                     eta_3 = np.asarray(dictionary_grid_points[tuple([p_3[0].item(), p_3[1].item()])])
-                     eta_4 = np.asarray(dictionary_grid_points[tuple([p_4[0].item(), p_4[1].item()])])
-
-                     # Concatenate and store the values in a single numpy array:
-                     eta_values = np.asarray([eta_1, eta_2, eta_3, eta_4])
-
-                     # Computing the average of the 4 points:
-                     eta_avg = np.mean(eta_values)
-
-                     # Storing the grid points and the metric values:
-                     self.grid_metric_values[self.x_counter, self.z_counter, :] = eta_avg
-                     self.metric_grid[counter, :] = eta_avg
-
-                     # Storing the grid intervals and the transformed grid intervals in the same format:
-                     self.X_grid_points_matrix[self.x_counter, self.z_counter, :] = np.reshape(np.asarray([self.x_axis_increments[j], self.x_axis_increments[j] + self.increment, self.x_axis_increments[j] + self.increment, self.x_axis_increments[j]]), [4])
-                     self.Z_grid_points_matrix[self.x_counter, self.z_counter, :] = np.reshape(np.asarray([self.z_axis_increments[i], self.z_axis_increments[i], self.z_axis_increments[i] + self.increment, self.z_axis_increments[i] + self.increment]), [4])
-                     self.grid_centers_matrix[self.x_counter, self.z_counter, :] = np.reshape(np.asarray([self.x_axis_increments[j] + (self.increment/2), self.z_axis_increments[i] + (self.increment/2)]), [2])
-                     self.X_grid_points[counter, :] = np.reshape(np.asarray([self.x_axis_increments[j], self.x_axis_increments[j] + self.increment, self.x_axis_increments[j] + self.increment, self.x_axis_increments[j]]), [4])
-                     self.Z_grid_points[counter, :] = np.reshape(np.asarray([self.z_axis_increments[i], self.z_axis_increments[i], self.z_axis_increments[i] + self.increment, self.z_axis_increments[i] + self.increment]), [4])
-                     self.grid_centers[counter, :] = np.reshape(np.asarray([self.x_axis_increments[j] + (self.increment/2), self.z_axis_increments[i] + (self.increment/2)]), [2])
-                     
-                     # Updating the two inner loop counters.
-                     self.x_counter += 1
-                     counter += 1
-
-               # Updating outer loop counter.
-               self.z_counter += 1
+      self.generate_grid('xz')
 
-   ''' Function to check the occupancy of the the point corresponding to the point cloud within the generate grid:'''
-   def check_occupancy_yz(self):
+   ''' Function to check the occupancy of the the point corresponding to the point cloud within the generated grid. The occupancy check is 
+       carried out for all the points at once on the XZ or the YZ plane:'''
+   def check_occupancy(self, plane):
       # TRANSFORMING THE POINTS WITH RESPECT TO THE REFERENCE FRAME ATTACHED AT THE CORNER OF THE BOUNDING BOX:
       ''' This will be different for sampling points along the XZ axes as compared to the YZ axes, but it will be same for different instances
          of both. '''
+      if plane == 'xz':
+         corner, u_index, u_counter = 0, 0, self.x_counter
+         U_grid_points_matrix = self.X_grid_points_matrix
+      elif plane == 'yz':
+         corner, u_index, u_counter = 1, 1, self.y_counter
+         U_grid_points_matrix = self.Y_grid_points_matrix
+      else:
+         raise ValueError(f'Invalid plane for checking the occupancy: {plane}')
 
       # Rotation matrix of the new local reference frame with respect to the object base reference frame:
       self.R_local = self.R_bounding_box
 
       # Position vector of the new local reference frame with respec to the object base reference frame:
-      self.p_local = self.transformed_vertices_object_frame[1,:]
+      self.p_local = self.transformed_vertices_object_frame[corner,:]
 
       '''Transforming the projected points from the object reference frame {O} to the local reference {L}: 
          This computation is important and may not always be valid for all instances of sampling along XZ and YZ planes.
          In this case we are essentially shifting the reference frame to the
          corner'''
-
-      self.projected_points_local_frame = np.asarray([np.subtract(p, self.p_local) for p in self.projected_points])
+      self.projected_points_local_frame = np.subtract(self.projected_points, self.p_local)
 
       # OCCUPANCY CHECK:
       '''The main reason for transforming the points to a local reference frame in the corner of the bounding box is 
          so that we can perform a 2D occupancy check over the generated grid. This will allow us to only have the grids 
          and associated grid points which have points belonging to the point cloud within their 2D bounds.'''
-
-      # IMPORTANT: The FOR loop will be slightly different for the XZ and YZ planes.
       print('Checking Occupancy ... ')
-
-      self.X_grid_points_occupied = self.transformed_vertices_object_frame[1,0]*np.ones([self.projected_points.shape[0],self.X_grid_points.shape[1]])
-      self.Y_grid_points_occupied = np.zeros([self.projected_points.shape[0], self.Y_grid_points.shape[1]])
-      self.Z_grid_points_occupied = np.zeros([self.projected_points.shape[0], self.Z_grid_points.shape[1]])
-      self.grid_centers_occupied = np.zeros([self.projected_points.shape[0], self.grid_centers.shape[1]])
-      self.grid_metric_values_occupied = np.zeros([self.projected_points.shape[0], 1])
+      num_points = self.projected_points.shape[0]
+
+      self.X_grid_points_occupied = np.zeros([num_points, self.X_grid_points.shape[1]])
+      self.Y_grid_points_occupied = np.zeros([num_points, self.Y_grid_points.shape[1]])
+      self.Z_grid_points_occupied = np.zeros([num_points, self.Z_grid_points.shape[1]])
+      if plane == 'xz':
+         self.Y_grid_points_occupied[:] = self.transformed_vertices_object_frame[1,1]
+         U_grid_points_occupied = self.X_grid_points_occupied
+      else:
+         self.X_grid_points_occupied[:] = self.transformed_vertices_object_frame[1,0]
+         U_grid_points_occupied = self.Y_grid_points_occupied
+      self.grid_centers_occupied = np.zeros([num_points, self.grid_centers.shape[1]])
+      self.grid_metric_values_occupied = np.zeros([num_points, 1])
       self.grid_centers_dict = {}
       self.grid_centers_unique_dict = {}
 
-      # Arrays to store the q_y and q_z values so that they can be studied and understood properly:
-      self.q_x_array = np.zeros([self.projected_points.shape[0], 1])
-      self.q_y_array = np.zeros([self.projected_points.shape[0], 1])
-      self.q_z_array = np.zeros([self.projected_points.shape[0], 1])
-
-      for i, point in enumerate(self.projected_points_local_frame):
-         q_y = np.around(np.divide(point[1], self.increment))
-         q_z = np.around(np.divide(point[2], self.increment))
-         q_y_actual = np.divide(point[1], self.increment)
-         q_z_actual = np.divide(point[2], self.increment)
-         if q_y == 0 and q_z != 0:
-               q_y = 1
-         elif q_z == 0 and q_y != 0:
-               q_z = 1
-         elif q_y == 0 and q_z == 0:
-               q_y = 1
-               q_z = 1 
-         elif q_y <= q_y_actual and q_y_actual <= self.y_counter:
-               q_y = q_y + 1
-         elif q_z <= q_z_actual and q_z_actual <= self.z_counter:
-               q_z = q_z + 1
-
-         q_y = int(q_y)
-         q_z = int(q_z)
-
-         if q_y <= self.y_counter and q_z <= self.z_counter:
-               self.q_y_array[i, :] = q_y
-               self.q_z_array[i, :] = q_z
-               self.Y_grid_points_occupied[i, :] = np.reshape(self.Y_grid_points_matrix[q_y, q_z, :], [1,4])
-               self.Z_grid_points_occupied[i, :] = np.reshape(self.Z_grid_points_matrix[q_y, q_z, :], [1,4])
-               self.grid_centers_occupied[i, :] = np.reshape(self.grid_centers_matrix[q_y, q_z, :], [1,2])
-               self.grid_metric_values_occupied[i, :] = np.reshape(self.grid_metric_values[q_y, q_z, :], [1])
-               self.grid_centers_dict[tuple([self.grid_centers_occupied[i, 0].item(), self.grid_centers_occupied[i, 1].item()])] = self.grid_metric_values_occupied[i, :].item()
-         else:
-            continue
-      
-      # Extracting the unique grid centers and corresponding metric values and storing them in a dictionary.
-      self.grid_centers_unique = np.unique(self.grid_centers_occupied, axis = 0)
+      # Arrays to store the q_u and q_z values so that they can be studied and understood properly:
+      self.q_x_array = np.zeros([num_points, 1])
+      self.q_y_array = np.zeros([num_points, 1])
+      self.q_z_array = np.zeros([num_points, 1])
+
+      # Grid cell of every point. The rounded values are corrected at the edges of the grid, for every point only the first of the 
+      # following cases which applies is used:
+      q_u_actual = np.divide(self.projected_points_local_frame[:, u_index], self.increment)
+      q_z_actual = np.divide(self.projected_points_local_frame[:, 2], self.increment)
+      q_u = np.around(q_u_actual)
+      q_z = np.around(q_z_actual)
+
+      u_zero = q_u == 0
+      z_zero = q_z == 0
+      # (1) q_u == 0 and q_z != 0, (2) q_z == 0 and q_u != 0, (3) q_u == 0 and q_z == 0:
+      case_1 = u_zero & ~z_zero
+      case_2 = z_zero & ~u_zero
+      case_3 = u_zero & z_zero
+      # (4) q_u has been rounded down and the point lies within the grid along U, (5) the same for q_z:
+      case_4 = ~(u_zero | z_zero) & (q_u <= q_u_actual) & (q_u_actual <= u_counter)
+      case_5 = ~(u_zero | z_zero | case_4) & (q_z <= q_z_actual) & (q_z_actual <= self.z_counter)
+
+      q_u[case_1 | case_3] = 1
+      q_z[case_2 | case_3] = 1
+      q_u[case_4] += 1
+      q_z[case_5] += 1
+      q_u = q_u.astype(int)
+      q_z = q_z.astype(int)
+
+      # Only the points which lie within the grid are stored:
+      occupied = (q_u <= u_counter) & (q_z <= self.z_counter)
+      q_u = q_u[occupied]
+      q_z = q_z[occupied]
+
+      if plane == 'xz':
+         self.q_x_array[occupied, 0] = q_u
+      else:
+         self.q_y_array[occupied, 0] = q_u
+      self.q_z_array[occupied, 0] = q_z
+      U_grid_points_occupied[occupied, :] = U_grid_points_matrix[q_u, q_z, :]
+      self.Z_grid_points_occupied[occupied, :] = self.Z_grid_points_matrix[q_u, q_z, :]
+      self.grid_centers_occupied[occupied, :] = self.grid_centers_matrix[q_u, q_z, :]
+      self.grid_metric_values_occupied[occupied, :] = self.grid_metric_values[q_u, q_z, :]
+
+      # Linear index of the grid cells (negative indices refer to the last rows of the grid matrices like above):
+      n_u, n_z = self.grid_centers_matrix.shape[0:2]
+      self.grid_cell_ids = -np.ones(num_points, dtype=int)
+      self.grid_cell_ids[occupied] = np.mod(q_u, n_u)*n_z + np.mod(q_z, n_z)
+      self.occupied_grid_cells, first_index, self.occupied_grid_cell_counts = np.unique(self.grid_cell_ids[occupied], return_index=True, return_counts=True)
+
+      # The grid centers are added to the dictionary in the order in which they are first occupied by the points:
+      occupied_indices = np.flatnonzero(occupied)[np.sort(first_index)]
+      for grid_center, metric_value in zip(self.grid_centers_occupied[occupied_indices].tolist(), self.grid_metric_values_occupied[occupied_indices, 0].tolist()):
+         self.grid_centers_dict[tuple(grid_center)] = metric_value
+
+      # Extracting the unique grid centers and corresponding metric values and storing them in a dictionary. The unique rows of 
+      # grid_centers_occupied are the centers of the occupied grid cells and the zero rows of the points outside the grid:
+      unique_candidates = self.grid_centers_occupied[occupied_indices]
+      if not np.all(occupied):
+         unique_candidates = np.concatenate([unique_candidates, np.zeros([1, self.grid_centers_occupied.shape[1]])], axis = 0)
+      self.grid_centers_unique = np.unique(unique_candidates, axis = 0)
       for i, grid_center in enumerate(self.grid_centers_unique):
          self.grid_centers_unique_dict[tuple([grid_center[0].item(), grid_center[1].item()])] = self.grid_centers_dict[tuple([grid_center[0].item(), grid_center[1].item()])]
 
+   ''' Function to check the occupancy of the the point corresponding to the point cloud within the generate grid:'''
+   def check_occupancy_yz(self):
+      self.check_occupancy('yz')
 
    ''' Function to check the occupancy of the the point corresponding to the point cloud within the generate grid:'''
    def check_occupancy_xz(self):
-      # TRANSFORMING THE POINTS WITH RESPECT TO THE REFERENCE FRAME ATTACHED AT THE CORNER OF THE BOUNDING BOX:
-      ''' This will be different for sampling points along the XZ axes as compared to the YZ axes, but it will be same for different instances
-         of both. '''
-
-      # Rotation matrix of the new local reference frame with respect to the object base reference frame:
-      self.R_local = self.R_bounding_box
+      self.check_occupancy('xz')
 
-      # Position vector of the new local reference frame with respec to the object base reference frame:
-      self.p_local = self.transformed_vertices_object_frame[0,:]
-
-      '''Transforming the projected points from the object reference frame {O} to the local reference {L}: 
-         This computation is important and may not always be valid for all instances of sampling along XZ and YZ planes.
-         In this case we are essentially shifting the reference frame to the
-         corner:'''
-      
-      self.projected_points_local_frame = np.asarray([np.subtract(p, self.p_local) for p in self.projected_points])
-      # OCCUPANCY CHECK:
-      '''The main reason for transforming the points to a local reference frame in the corner of the bounding box is 
-         so that we can perform a 2D occupancy check over the generated grid. This will allow us to only have the grids 
-         and associated grid points which have points belonging to the point cloud within their 2D bounds.'''
-
-      # IMPORTANT: The FOR loop will be slightly different for the XZ and YZ planes.
-      print('Checking Occupancy ... ')
-
-      self.Y_grid_points_occupied = self.transformed_vertices_object_frame[1,1]*np.ones([self.projected_points.shape[0],self.Y_grid_points.shape[1]])
-      self.X_grid_points_occupied = np.zeros([self.projected_points.shape[0], self.X_grid_points.shape[1]])
-      self.Z_grid_points_occupied = np.zeros([self.projected_points.shape[0], self.Z_grid_points.shape[1]])
-      self.grid_centers_occupied = np.zeros([self.projected_points.shape[0], self.grid_centers.shape[1]])
-      self.grid_metric_values_occupied = np.zeros([self.projected_points.shape[0], 1])
-      self.grid_centers_dict = {}
-      self.grid_centers_unique_dict = {}
-
-      # Arrays to store the q_y and q_z values so that they can be studied and understood properly:
-      self.q_x_array = np.zeros([self.projected_points.shape[0], 1])
-      self.q_y_array = np.zeros([self.projected_points.shape[0], 1])
-      self.q_z_array = np.zeros([self.projected_points.shape[0], 1])
-
-      # 2D Occupancy Check using projected 
-      for i, point in enumerate(self.projected_points_local_frame):
-         q_x = np.around(np.divide(point[0], self.increment))
-         q_z = np.around(np.divide(point[2], self.increment))
-         q_x_actual = np.divide(point[0], self.increment)
-         q_z_actual = np.divide(point[2], self.increment)
-         if q_x == 0 and q_z != 0:
-               q_x = 1
-         elif q_z == 0 and q_x != 0:
-               q_z = 1
-         elif q_x == 0 and q_z == 0:
-               q_x = 1
-               q_z = 1 
-         elif q_x <= q_x_actual and q_x_actual <= self.x_counter:
-               q_x = q_x + 1
-         elif q_z <= q_z_actual and q_z_actual <= self.z_counter:
-               q_z = q_z + 1
-
-         q_x = int(q_x)
-         q_z = int(q_z)
-
-         if q_x <= self.x_counter and q_z <= self.z_counter:
-               self.q_x_array[i, :] = q_x
-               self.q_z_array[i, :] = q_z
-               self.X_grid_points_occupied[i, :] = np.reshape(self.X_grid_points_matrix[q_x, q_z, :], [1,4])
-               self.Z_grid_points_occupied[i, :] = np.reshape(self.Z_grid_points_matrix[q_x, q_z, :], [1,4])
-               self.grid_centers_occupied[i, :] = np.reshape(self.grid_centers_matrix[q_x, q_z, :], [1,2])
-               self.grid_metric_values_occupied[i, :] = np.reshape(self.grid_metric_values[q_x, q_z, :], [1]) 
-               self.grid_centers_dict[tuple([self.grid_centers_occupied[i, 0].item(), self.grid_centers_occupied[i, 1].item()])] = self.grid_metric_values_occupied[i, :].item()      
-         else:
-            continue
-      
-      # Extracting the unique grid centers and corresponding metric values and storing them in a dictionary.
-      self.grid_centers_unique = np.unique(self.grid_centers_occupied, axis = 0)
-      for i, grid_center in enumerate(self.grid_centers_unique):
-         self.grid_centers_unique_dict[tuple([grid_center[0].item(), grid_center[1].item()])] = self.grid_centers_dict[tuple([grid_center[0].item(), grid_center[1].item()])]
-
-   '''Function to compute the distance from a point to a plane'''
-   def get_distance(self, plane_points, center_point, grasp_center):
-      # We need to compute the distance of the grasp center to the first plane only:
-      vect_1 = np.subtract(plane_points[3, :], plane_points[0, :])
-      vect_2 = np.subtract(plane_points[1, :], plane_points[0, :])
-      # vect_2 = np.subtract(plane_points[1, :], plane_points[2, :])
-
-      # Normal vector corresponding to the plane:
-      unit_u = np.divide(np.cross(vect_1, vect_2), la.norm(np.cross(vect_1, vect_2)))
-
-      # Translating each of the points by a specified distance: 
-      # Computing the D in the equation of the plane Ax + By + Cz + D = 0:
-      D = np.dot(center_point, unit_u)
-
-      distance = np.divide(la.norm(unit_u[0]*grasp_center[0] + unit_u[1]*grasp_center[1] + unit_u[2]*grasp_center[2] - D), np.sqrt(unit_u[0]**2 + unit_u[1]**2 + unit_u[2]**2))
-      return distance, unit_u
-   
    '''Function to extract and store the points corresponding to the ideal grasping region: '''
    def get_ideal_grasping_region(self):
         
-        if self.y_dim < self.gripper_width_tolerance:
+        if self.x_dim < self.gripper_width_tolerance and self.y_dim < self.gripper_width_tolerance:
+            if len(self.contact_planes) > 1:
+                print('Both dimensions with gripper width tolerance. Merging the grids of the XZ and YZ planes')
+                self.get_ideal_grasping_region_multi_face()
+                return
+            print('Both dimensions with gripper width tolerance. Generating contacts along XZ plane')
+            self.project_points_xz()
+            print('Points projected on the surface now generating grid ...')
+            self.generate_grid_xz()
+            self.check_occupancy_xz()
+            print('Occupancy check completed, proceed towards sampling poses ... ')
+        elif self.y_dim < self.gripper_width_tolerance:
             self.project_points_xz()
             print('Points projected on the surface now generating grid ...')
             self.generate_grid_xz()
@@ -1472,16 +1568,10 @@ class point_cloud(object):
             self.generate_grid_yz()
             self.check_occupancy_yz()
             print('Occupancy check completed, proceed towards sampling poses ... ')
-        elif self.x_dim < self.gripper_width_tolerance and self.y_dim < self.gripper_width_tolerance:
-            print('Both dimensions with gripper width tolerance. Generating contacts along XZ plane')
-            self.project_points_xz()
-            print('Points projected on the surface now generating grid ...')
-            self.generate_grid_xz()
-            self.check_occupancy_xz()
-            print('Occupancy check completed, proceed towards sampling poses ... ')
         else:
             print('Invalid Data')
 
+        self.get_occupied_grid_cells(self.contact_plane)
         self.grid_metric_values_occupied = self.grid_metric_values_occupied.flatten()
         self.max_metric_value = max(self.grid_metric_values_occupied)
 
@@ -1494,10 +1584,200 @@ class point_cloud(object):
         self.ideal_grasping_region_metric_values = np.asarray([self.grid_metric_values_occupied[i] for i in range(0, self.grid_metric_values_occupied.shape[0]) if self.grid_metric_values_occupied[i] >= self.eta_threshold])
         self.ideal_grasping_region_indices = [i for i in range(0, self.grid_metric_values_occupied.shape[0]) if self.grid_metric_values_occupied[i] >= self.eta_threshold]
         self.ideal_grasping_region_grid_centers = [gc for gc in self.grid_centers_unique if self.grid_centers_unique_dict[tuple([gc[0].item(), gc[1].item(),])] >= self.eta_threshold]
+        self.ideal_grasping_region_grid_metric_values = np.asarray([self.grid_centers_unique_dict[tuple([gc[0].item(), gc[1].item(),])] for gc in self.ideal_grasping_region_grid_centers])
+        self.ideal_grasping_region_grid_planes = np.full(len(self.ideal_grasping_region_grid_centers), self.contact_plane)
                 
         self.ideal_grasping_region_points = self.transformed_points_object_frame[self.ideal_grasping_region_indices, :]
         self.ideal_grasping_region_normals = self.normals_object_frame[self.ideal_grasping_region_indices, :]
+
+   '''Function to extract the ideal grasping region after sampling contacts on both pairs of parallel faces (generate_contacts_multi_face).
+      The grid and the occupancy are computed for every plane from its rows of the predicted metric values, which are normalized over both 
+      planes, and a common threshold is applied. The grid centers of both planes are merged into a single candidate set ranked by their 
+      metric values and tagged with their plane (ideal_grasping_region_grid_planes). The grid attributes like grid_centers_matrix are the 
+      ones of the last plane (YZ):'''
+   def get_ideal_grasping_region_multi_face(self):
+        num_points = self.transformed_points_object_frame.shape[0]
+        point_metric_values = np.zeros([len(self.contact_planes), num_points])
+        grid_centers, grid_metric_values, grid_planes = [], [], []
+
+        for i, plane in enumerate(self.contact_planes):
+            if plane == 'xz':
+                self.project_points_xz()
+            else:
+                self.project_points_yz()
+            self.generate_grid(plane, self.predicted[self.contact_plane_offsets[i]:self.contact_plane_offsets[i+1]])
+            self.check_occupancy(plane)
+
+            # Metric value of the grid cell of every point (zero outside the grid) and the occupied grid cells of the plane:
+            point_metric_values[i] = self.grid_metric_values_occupied[:, 0]
+            self.get_occupied_grid_cells(plane)
+            grid_centers.append(self.occupied_grid_centers)
+            grid_metric_values.append(self.occupied_grid_metric_values)
+            grid_planes.append(self.occupied_grid_planes)
+        print('Occupancy check completed, proceed towards sampling poses ... ')
+
+        self.occupied_grid_centers = np.concatenate(grid_centers, axis = 0)
+        self.occupied_grid_metric_values = np.concatenate(grid_metric_values)
+        self.occupied_grid_planes = np.concatenate(grid_planes)
+
+        # A point belongs to the ideal grasping region if its grid cell on any of the planes is above the threshold:
+        self.grid_metric_values_occupied = np.max(point_metric_values, axis = 0)
+        self.max_metric_value = max(self.grid_metric_values_occupied)
+        self.eta_threshold = 0.85*self.max_metric_value
+
+        self.ideal_grasping_region_indices = np.flatnonzero(self.grid_metric_values_occupied >= self.eta_threshold)
+        self.ideal_grasping_region_metric_values = self.grid_metric_values_occupied[self.ideal_grasping_region_indices]
+
+        # Grid centers of both planes ranked by their metric values:
+        selected = np.flatnonzero(self.occupied_grid_metric_values >= self.eta_threshold)
+        selected = selected[np.argsort(-self.occupied_grid_metric_values[selected], kind = 'stable')]
+        self.ideal_grasping_region_grid_centers = list(self.occupied_grid_centers[selected])
+        self.ideal_grasping_region_grid_metric_values = self.occupied_grid_metric_values[selected]
+        self.ideal_grasping_region_grid_planes = self.occupied_grid_planes[selected]
+
+        self.ideal_grasping_region_points = self.transformed_points_object_frame[self.ideal_grasping_region_indices, :]
+        self.ideal_grasping_region_normals = self.normals_object_frame[self.ideal_grasping_region_indices, :]
        
+   '''Function to store the centers, the metric values and the plane of the occupied grid cells (occupied_grid_cells) after check_occupancy
+      on the given plane. The last row and column of the grid matrices are not part of any grid cell (see generate_grid), the points 
+      assigned to them are not considered:'''
+   def get_occupied_grid_cells(self, plane):
+      n_u, n_z = self.grid_centers_matrix.shape[0:2]
+      cells = self.occupied_grid_cells[(self.occupied_grid_cells//n_z < n_u-1) & (self.occupied_grid_cells % n_z < n_z-1)]
+      self.occupied_grid_centers = np.reshape(self.grid_centers_matrix, [-1, 2])[cells]
+      self.occupied_grid_metric_values = np.reshape(self.grid_metric_values, [-1])[cells]
+      self.occupied_grid_planes = np.full(cells.shape[0], plane)
+
+   '''Function to query the k best grid cells of the ideal grasping region (occupied grid cells with a metric value of at least 
+      eta_threshold) ranked by their metric values. All the occupied grid cells are candidates if all_occupied is True. np.argpartition 
+      selects the k best grid cells without sorting all of them and only these are sorted. All the candidates are ranked when k is None. 
+      Returns the centers (k,2), the metric values (k,) and the planes (k,) of the grid cells in decreasing order of the metric values:'''
+   def get_top_k_grid_cells(self, k = None, all_occupied = False):
+      if all_occupied:
+         candidates = np.arange(self.occupied_grid_metric_values.shape[0])
+      else:
+         candidates = np.flatnonzero(self.occupied_grid_metric_values >= self.eta_threshold)
+      metric_values = self.occupied_grid_metric_values[candidates]
+      num_cells = metric_values.shape[0]
+      if k is None or k >= num_cells:
+         top = np.arange(num_cells)
+      elif k <= 0:
+         top = np.zeros(0, dtype = int)
+      else:
+         top = np.argpartition(-metric_values, k-1)[:k]
+      top = top[np.argsort(-metric_values[top], kind = 'stable')]
+      return self.occupied_grid_centers[candidates[top]], metric_values[top], self.occupied_grid_planes[candidates[top]]
+
+   '''Generator of the end-effector poses of the k best grid cells (see get_top_k_grid_cells) in rank order. The poses of a grid 
+      cell are only sampled once the poses of the previous grid cells have been consumed, therefore a caller which stops at the first 
+      feasible pose does not compute the remaining ones. Every item is a tuple with the grasp pose and the pre-grasp pose in the base 
+      reference frame (4x4 arrays) and the approach direction:'''
+   def generate_ranked_end_effector_poses(self, k = None, all_occupied = False):
+      grid_centers, metric_values, grid_planes = self.get_top_k_grid_cells(k, all_occupied)
+      for i in range(grid_centers.shape[0]):
+         poses_base = self.sample_end_effector_poses(grid_centers[i:i+1], grid_planes[i:i+1]).to_frame(self.R_bounding_box, self.p_bounding_box)
+         for j in range(len(poses_base)):
+            yield poses_base.poses[j], poses_base.poses_inter[j], poses_base.approach_labels[j]
+
+   '''Function to compute the transformation (element of SE(3)) corresponding to the pivoting motion about the screw axis (screw_axis 
+      through point) in the object reference frame. The magnitude and the pitch of the motion are screw_angle and screw_pitch unless they 
+      are given (see point_cloud_module.screw_motion):'''
+   def get_screw_transformation(self, theta = None, pitch = None):
+      if theta is None:
+         theta = self.screw_angle
+      if pitch is None:
+         pitch = self.screw_pitch
+      return screw_transformations(self.screw_axis, np.reshape(self.point, [3]), pitch, theta)
+
+   '''Function to compute the end-effector poses along the pivoting motion for all the computed end-effector poses at once. The poses 
+      (by default poses of end_effector_poses_base) are transformed at num_samples equally spaced angles from 0 to screw_angle, the 
+      screw axis being expressed in the base reference frame. Returns an array of shape (num_samples,K,4,4), the last sample contains the 
+      goal poses after the pivoting motion:'''
+   def get_pivoting_path(self, num_samples = 10, poses = None):
+      if poses is None:
+         poses = self.end_effector_poses_base.poses
+      axis_base = np.matmul(self.R_bounding_box, np.reshape(self.screw_axis, [3]))
+      point_base = np.matmul(self.R_bounding_box, np.reshape(self.point, [3])) + np.reshape(self.p_bounding_box, [3])
+      return screw_path(poses, axis_base, point_base, self.screw_pitch, self.screw_angle, num_samples)
+
+   '''Generator of the waypoints of the pivoting motion for the end-effector poses of the k best grid cells in rank order (see 
+      generate_ranked_end_effector_poses). Every item is a tuple with an array of shape (4,4,4) containing the pre-grasp pose, the grasp pose,
+      the goal pose after the pivoting motion and the release pose in the base reference frame, and the approach direction. A bundle is only
+      computed when it is pulled from the generator. tool_transform (4x4) is applied to the sampled poses in the end-effector reference 
+      frame, for example to change the convention of the gripper axes, and the pre-grasp and release poses are offset by pre_grasp_offset 
+      (see the attribute) along the Z axis of the end-effector. The grid cells below eta_threshold are only used if all_occupied is True. 
+      The magnitude theta and the pitch of the pivoting motion are screw_angle and screw_pitch unless they are given:'''
+   def generate_waypoint_bundles(self, k = None, pre_grasp_offset = None, tool_transform = None, all_occupied = False, theta = None, pitch = None):
+      if pre_grasp_offset is None:
+         pre_grasp_offset = self.pre_grasp_offset
+      if pre_grasp_offset is None:
+         pre_grasp_offset = self.g_delta_inter - self.g_delta
+      g_offset = np.identity(4)
+      g_offset[2, 3] = -pre_grasp_offset
+
+      # Transformation of the pivoting motion expressed in the base reference frame:
+      g_bounding_box_inverse = np.identity(4)
+      g_bounding_box_inverse[0:3, 0:3] = np.transpose(self.R_bounding_box)
+      g_bounding_box_inverse[0:3, 3] = -np.matmul(np.transpose(self.R_bounding_box), np.reshape(self.p_bounding_box, [3]))
+      g_screw_base = np.matmul(self.g_bounding_box, np.matmul(self.get_screw_transformation(theta, pitch), g_bounding_box_inverse))
+
+      for pose, _, approach_label in self.generate_ranked_end_effector_poses(k, all_occupied):
+         bundle = np.empty([4, 4, 4])
+         bundle[1] = pose if tool_transform is None else np.matmul(pose, tool_transform)
+         np.matmul(bundle[1], g_offset, out = bundle[0])
+         np.matmul(g_screw_base, bundle[1], out = bundle[2])
+         np.matmul(bundle[2], g_offset, out = bundle[3])
+         yield bundle, approach_label
+
+   '''Function to build the multi-resolution pyramid of the metric values of the grid cells after get_ideal_grasping_region. Level 0 contains
+      the grid cells of generate_grid and every level halves the resolution, so that the ideal grasping region can be queried at coarser 
+      levels (see get_ideal_grasping_region_level) without predicting the metric again:'''
+   def build_metric_pyramid(self, num_levels = None):
+      if self.contact_plane is None:
+         raise ValueError('build_metric_pyramid requires the contacts of a single pair of faces')
+      if self.contact_plane == 'xz':
+         u_axis_increments = self.x_axis_increments
+      else:
+         u_axis_increments = self.y_axis_increments
+      n_u, n_z = self.grid_centers_matrix.shape[0:2]
+
+      # Number of points of the point cloud in every grid cell (the last row and column of the grid matrices are not part of any cell):
+      occupancy = np.bincount(self.grid_cell_ids[self.grid_cell_ids >= 0], minlength = n_u*n_z)
+      occupancy = np.reshape(occupancy, [n_u, n_z])[:-1, :-1].T
+
+      self.metric_pyramid = metric_pyramid(self.grid_metric_values[:-1, :-1, 0].T, [u_axis_increments[0], self.z_axis_increments[0]], 
+                                           self.increment, occupancy = occupancy, num_levels = num_levels)
+
+   '''Function to compute the ideal grasping region at a level of the metric pyramid. All the attributes of the ideal grasping region are 
+      replaced by the ones of the level: the grid centers (used by get_end_effector_poses) with their metric values and planes, as well as 
+      the points whose grid cell at the level belongs to the region, with their normals and the metric values of their grid cells:'''
+   def get_ideal_grasping_region_level(self, level):
+      if self.metric_pyramid is None:
+         self.build_metric_pyramid()
+
+      selected, self.eta_threshold = self.metric_pyramid.region_mask(level)
+      values = self.metric_pyramid.levels[level]
+      self.max_metric_value = np.max(values[self.metric_pyramid.occupancy[level] > 0], initial = 0)
+      self.ideal_grasping_region_grid_centers = list(self.metric_pyramid.centers(level)[selected])
+      self.ideal_grasping_region_grid_metric_values = values[selected]
+      self.ideal_grasping_region_grid_planes = np.full(len(self.ideal_grasping_region_grid_centers), self.contact_plane)
+
+      # Grid cell of every point at the level. The points outside the grid, in the last row or column of the grid matrices or in the rows 
+      # and columns which are not pooled at the level are not part of the region:
+      n_u, n_z = self.grid_centers_matrix.shape[0:2]
+      q_u, q_z = np.divmod(self.grid_cell_ids, n_z)
+      rows, cols = values.shape
+      inside = (self.grid_cell_ids >= 0) & ((q_z >> level) < rows) & ((q_u >> level) < cols) & (q_u < n_u-1) & (q_z < n_z-1)
+      point_rows = np.where(inside, q_z >> level, 0)
+      point_cols = np.where(inside, q_u >> level, 0)
+      in_region = inside & selected[point_rows, point_cols]
+
+      self.ideal_grasping_region_indices = np.flatnonzero(in_region)
+      self.ideal_grasping_region_metric_values = values[point_rows[in_region], point_cols[in_region]]
+      self.ideal_grasping_region_points = self.transformed_points_object_frame[self.ideal_grasping_region_indices, :]
+      self.ideal_grasping_region_normals = self.normals_object_frame[self.ideal_grasping_region_indices, :]
+      return self.ideal_grasping_region_grid_centers
+
    '''Function to compute the bounding box the points corresponding to the ideal grasping region: '''
    def get_bb_ideal_grasping_region(self):
       # The o3d.geometry.PointCloud() object associated with the ideal grasping region is assigned to self.ideal_grasping_region_object_frame.
@@ -1515,589 +1795,147 @@ class point_cloud(object):
 
       # Using the dimensions of the newer bounding box of the ideal grasping region:
       
+   '''Function to compute the orientation of the contact reference frames with the z axis along the normal z_C and random x axes: '''
+   def get_contact_frames(self, z_C, random_axes):
+      # random_axes: numpy array of shape (M,3) with one random vector for every contact reference frame
+      x_C = np.subtract(random_axes, np.multiply(np.matmul(random_axes, z_C)[:, None], z_C))
+      x_C /= la.norm(x_C, axis=1)[:, None]
+      y_C = np.cross(z_C, x_C)
+
+      R_C = np.zeros([random_axes.shape[0], 3, 3])
+      R_C[:, :, 0] = x_C
+      R_C[:, :, 1] = y_C
+      R_C[:, :, 2] = z_C
+      return R_C
+
+   '''Function to sample the end-effector poses for an array of grid centers of shape (M,2). grid_planes contains the plane ('xz' or 'yz')
+      of every grid center, when it is None the grid centers are used on all the pairs of faces which fit within the gripper. Returns a 
+      pose_store with the feasible poses in the object reference frame ordered by grid center and then by approach direction:'''
+   def sample_end_effector_poses(self, grid_centers, grid_planes = None):
+      # All the grid centers are processed at once: 
+      grid_centers = np.reshape(np.asarray(grid_centers, dtype=np.float64), [-1, 2])
+      num_centers = grid_centers.shape[0]
+      vertices = self.transformed_vertices_object_frame
+
+      # Every pair of faces along which the object can be grasped is described by the plane of its grid centers, the normal of the contact 
+      # reference frame C1, the positions of the contacts C1 and C2, the grasping dimension, the faces of the bounding box corresponding to 
+      # the three approach directions (see face_vertex_indices) and the numbers of the approach directions:
+      grasp_face_pairs = []
+
+      # Outer conditional statement to check whether the dimensions along which we are grasping are less than the gripper width tolerance:
+      if self.y_dim < self.gripper_width_tolerance:
+         # Approach directions 2, 3 and 5 (faces at Z max, X min and X max):
+         positions_C1 = np.stack([grid_centers[:, 0], np.full(num_centers, vertices[0, 1]), grid_centers[:, 1]], axis=1)
+         positions_C2 = np.stack([grid_centers[:, 0], np.full(num_centers, vertices[2, 1]), grid_centers[:, 1]], axis=1)
+         grasp_face_pairs.append(('xz', np.asarray([0, 1, 0]), positions_C1, positions_C2, self.y_dim, [5, 1, 3], [2, 3, 5]))
+
+      if self.x_dim < self.gripper_width_tolerance:
+         # Approach directions 2, 1 and 4 (faces at Z max, Y min and Y max):
+         positions_C1 = np.stack([np.full(num_centers, vertices[1, 0]), grid_centers[:, 0], grid_centers[:, 1]], axis=1)
+         positions_C2 = np.stack([np.full(num_centers, vertices[0, 0]), grid_centers[:, 0], grid_centers[:, 1]], axis=1)
+         grasp_face_pairs.append(('yz', np.asarray([-1, 0, 0]), positions_C1, positions_C2, self.x_dim, [5, 0, 2], [2, 1, 4]))
+
+      # Random x axes of the contact reference frames. They are drawn in the same order as when sampling one grid center at a time, 
+      # i.e. C1 and C2 for every pair of faces for every grid center:
+      random_axes = np.random.randn(num_centers, len(grasp_face_pairs), 2, 3)
+
+      # Candidate poses for every grid center (rows) and every approach direction of every pair of faces (columns):
+      num_approaches = 3*len(grasp_face_pairs)
+      feasible = np.zeros([num_centers, num_approaches], dtype=bool)
+      R_EE = np.zeros([num_approaches, 3, 3])
+      approach_dirs = np.zeros([num_approaches, 3])
+      approach_labels = np.zeros(num_approaches, dtype=np.int64)
+      p_EE = np.zeros([num_centers, num_approaches, 3])
+      p_EE_inter = np.zeros([num_centers, num_approaches, 3])
+
+      R_C1 = np.zeros([num_centers, len(grasp_face_pairs), 3, 3])
+      R_C2 = np.zeros([num_centers, len(grasp_face_pairs), 3, 3])
+      positions_C1 = np.zeros([num_centers, len(grasp_face_pairs), 3])
+      positions_C2 = np.zeros([num_centers, len(grasp_face_pairs), 3])
+      grasp_centers = np.zeros([num_centers, len(grasp_face_pairs), 3])
+
+      for b, (plane, z_C1, position_C1, position_C2, grasp_dim, faces, labels) in enumerate(grasp_face_pairs):
+         # Orientation of the contact reference frames with the z axis along the normal:
+         R_C1[:, b] = self.get_contact_frames(z_C1, random_axes[:, b, 0])
+         R_C2[:, b] = self.get_contact_frames(-1*z_C1, random_axes[:, b, 1])
+         positions_C1[:, b] = position_C1
+         positions_C2[:, b] = position_C2
+         grasp_centers[:, b] = np.add(position_C1, np.dot(grasp_dim/2, z_C1))
+
+         # Distances from the grasp centers to the three approach faces, and the approach directions (inward normals of the faces):
+         distances = self.get_face_distances(grasp_centers[:, b], faces)
+         feasible[:, 3*b:3*b+3] = distances < self.gripper_height_tolerance
+
+         # The grid centers are coordinates on the plane on which they were computed, i.e. only on the faces of that plane:
+         if grid_planes is not None:
+            feasible[:, 3*b:3*b+3] &= (np.asarray(grid_planes) == plane)[:, np.newaxis]
+
+         for j in range(3):
+            a = 3*b + j
+            unit_u = -1*self.face_normals[faces[j]]
+
+            # End Effector Orientation (From Baseline 3), the orientation is the same for all the grid centers:
+            if labels[j] == 2:
+               y_EE = np.asarray([0, -1, 0])
+               x_EE = np.cross(y_EE, unit_u)
+            else:
+               x_EE = np.asarray([0, 0, 1])
+               y_EE = np.cross(unit_u, x_EE)
+            R_EE[a, :, 0] = x_EE
+            R_EE[a, :, 1] = y_EE
+            R_EE[a, :, 2] = unit_u
+            approach_dirs[a] = unit_u
+            approach_labels[a] = labels[j]
+
+            # End Effector Positions for the grasp and the intermediate (pre-grasp) poses:
+            p_EE[:, a] = np.add(grasp_centers[:, b], np.dot(-1*(self.g_delta + self.gripper_height_tolerance), unit_u))
+            p_EE_inter[:, a] = np.add(grasp_centers[:, b], np.dot(-1*(self.g_delta_inter + self.gripper_height_tolerance), unit_u))
+
+      # Selecting the feasible poses ordered by grid center and then by approach direction:
+      k, a = np.nonzero(feasible)
+      b = a//3
+
+      # Storing the end-effector poses (SE(3)) along with the poses of the corresponding object-end_effector contact reference frames.
+      # The intermediate end-effector poses have the same orientation as the end-effector poses:
+      poses = pose_store(k.shape[0])
+      poses.extend(R_EE[a], p_EE[k, a], R_EE[a], p_EE_inter[k, a], R_C1[k, b], positions_C1[k, b], R_C2[k, b], positions_C2[k, b], 
+                   grasp_centers[k, b], approach_dirs[a], approach_labels[a])
+      return poses
+
    '''Function to COMPUTE end effector poses based on the predicted metric values.'''
    def get_end_effector_poses(self):
-
-      # Saving the sampled end effector poses:
-      self.computed_end_effector_poses = []
-      self.computed_end_effector_poses_inter = []
-      self.sampled_contacts_c1 = []
-      self.sampled_contacts_c2 = []
-      self.grasp_centers = []
-      self.normals_c1 = []
-      self.normals_c2 = []
-      self.unit_ulist = []
-
-      # Additional lists for experimental purposes:
-      self.approach_dir_2_poses = []
-      self.approach_dir_2_inter_poses = []
-      self.approach_dir_other_poses = []
-      self.approach_dir_other_inter_poses = []
-
-      for i,v in enumerate(self.ideal_grasping_region_grid_centers):
-          
-         # Outer conditional statement to check whether the dimensions along which we are grasping are less than the gripper width tolerance:
-         if self.y_dim < self.gripper_width_tolerance:
-            # Approach Direction 2:
-            self.plane_points_1 = np.asarray([self.transformed_vertices_object_frame[3], self.transformed_vertices_object_frame[6], self.transformed_vertices_object_frame[4], self.transformed_vertices_object_frame[5]])
-            # Approach direction 3:
-            self.plane_points_2 = np.asarray([self.transformed_vertices_object_frame[3], self.transformed_vertices_object_frame[5], self.transformed_vertices_object_frame[2], self.transformed_vertices_object_frame[0]])
-            # Approach direction 5:
-            self.plane_points_3 = np.asarray([self.transformed_vertices_object_frame[6], self.transformed_vertices_object_frame[1], self.transformed_vertices_object_frame[7], self.transformed_vertices_object_frame[4]])
-            
-            # Center points of each of the planes corresponding to the three approach directions:
-            self.center_point_plane_1 = np.asarray([self.p_base[0], self.p_base[1], self.plane_points_1[0, 2]])
-            self.center_point_plane_2 = np.asarray([self.plane_points_2[0, 0], self.p_base[1], self.p_base[2]])
-            self.center_point_plane_3 = np.asarray([self.plane_points_3[0, 0], self.p_base[1], self.p_base[2]])
-
-            # Orientation of the contact reference frames: 
-            # Getting an orthogonal reference frame where the z axis is along the normal: 
-            # Frame C1:
-            self.z_C1 = np.asarray([0, 1, 0])
-            self.x_C1 = np.random.randn(3)
-            self.x_C1 -= self.x_C1.dot(self.z_C1)*self.z_C1
-            self.x_C1 /= la.norm(self.x_C1)
-            self.y_C1 = np.cross(self.z_C1, self.x_C1)
-            R_C1 = np.zeros([3,3])
-            R_C1[:, 0] = self.x_C1
-            R_C1[:, 1] = self.y_C1
-            R_C1[:, 2] = self.z_C1
-
-            # Frame C2:
-            self.z_C2 = np.asarray([0, -1, 0])
-            self.x_C2 = np.random.randn(3)
-            self.x_C2 -= self.x_C2.dot(self.z_C2)*self.z_C2
-            self.x_C2 /= la.norm(self.x_C2)
-            self.y_C2 = np.cross(self.z_C2, self.x_C2)
-            R_C2 = np.zeros([3,3])
-            R_C2[:, 0] = self.x_C2
-            R_C2[:, 1] = self.y_C2
-            R_C2[:, 2] = self.z_C2
-
-            self.position_C1 = np.asarray([self.ideal_grasping_region_grid_centers[i][0], self.transformed_vertices_object_frame[0,1], self.ideal_grasping_region_grid_centers[i][1]])
-            self.position_C2 = np.asarray([self.ideal_grasping_region_grid_centers[i][0], self.transformed_vertices_object_frame[2,1], self.ideal_grasping_region_grid_centers[i][1]])
-            self.grasp_center = np.add(self.position_C1, np.dot((self.y_dim)/2, self.z_C1)) 
-
-            self.distance_1, self.unit_u1 = self.get_distance(self.plane_points_1, self.center_point_plane_1, self.grasp_center)
-            self.distance_2, self.unit_u2 = self.get_distance(self.plane_points_2, self.center_point_plane_2, self.grasp_center)
-            self.distance_3, self.unit_u3 = self.get_distance(self.plane_points_3, self.center_point_plane_3, self.grasp_center)
-
-            # Checking the second approach direction:
-            if self.distance_1 < self.gripper_height_tolerance:
-               # End Effector Orientation Based on the Franka Panda Convention: 
-               '''self.z_EE = -1*self.unit_u1
-               self.y_EE = self.z_C1
-               self.x_EE = np.cross(self.y_EE, self.z_EE)
-               self.R_EE = np.zeros([3,3])
-               self.R_EE[:, 0] = self.x_EE
-               self.R_EE[:, 1] = self.y_EE
-               self.R_EE[:, 2] = self.z_EE'''
-
-               # From Baseline 3:
-               self.z_EE = self.unit_u1
-               # self.y_EE = np.asarray([0,1,0])
-               self.y_EE = np.asarray([0,-1,0])
-               # self.y_EE = np.asarray([-1,0,0])
-               self.x_EE = np.cross(self.y_EE, self.z_EE)
-               self.R_EE = np.zeros([3,3])
-               self.R_EE[:, 0] = self.x_EE
-               self.R_EE[:, 1] = self.y_EE
-               self.R_EE[:, 2] = self.z_EE
-
-               # Intermediate end-effector pose orientation:
-               self.R_EE_inter = self.R_EE
-
-               # End Effector Position: 
-               self.p_EE = np.add(self.grasp_center, np.dot(-1*(self.g_delta + self.gripper_height_tolerance), self.unit_u1))
-               self.p_EE_inter = np.add(self.grasp_center, np.dot(-1*(self.g_delta_inter + self.gripper_height_tolerance), self.unit_u1))    
-
-               # End Effector pose as an element of SE(3) (4x4 transformation matrix):
-               self.gripper_pose = np.zeros([4,4])
-               self.gripper_pose[0:3, 0:3] = self.R_EE
-               self.gripper_pose[0:3, 3] = np.reshape(self.p_EE, [3])
-               self.gripper_pose[3,3] = 1
-               self.computed_end_effector_poses.append(self.gripper_pose)
-
-               # End Effector pose as an element of SE(3) (4x4 transformation matrix):
-               self.gripper_pose_inter = np.zeros([4,4])
-               self.gripper_pose_inter[0:3, 0:3] = self.R_EE_inter
-               self.gripper_pose_inter[0:3, 3] = np.reshape(self.p_EE_inter, [3])
-               self.gripper_pose[3,3] = 1
-               self.computed_end_effector_poses_inter.append(self.gripper_pose_inter)
-
-               # Saving the pose of the corresponding object-end_effector contact reference frames:
-               self.sampled_pose_c1 = np.zeros([4,4])
-               self.sampled_pose_c1[0:3, 0:3] = R_C1
-               self.sampled_pose_c1[0:3, 3] = np.reshape(self.position_C1, [3])
-               self.sampled_pose_c1[3,3] = 1
-               self.sampled_contacts_c1.append(self.sampled_pose_c1)
-
-               self.sampled_pose_c2 = np.zeros([4,4])
-               self.sampled_pose_c2[0:3, 0:3] = R_C2
-               self.sampled_pose_c2[0:3, 3] = np.reshape(self.position_C2, [3])
-               self.sampled_pose_c2[3,3] = 1
-               self.sampled_contacts_c2.append(self.sampled_pose_c2)
-
-               # Appending the grasp center and normals for visualization:
-               self.grasp_centers.append(self.grasp_center)
-               self.normals_c1.append(R_C1[:, 2])
-               self.normals_c2.append(R_C2[:, 2])
-               self.unit_ulist.append(self.unit_u1)
-
-               # Additional attribute for experimental purposes:
-               self.approach_dir_2_poses.append(self.gripper_pose)
-               self.approach_dir_2_inter_poses.append(self.gripper_pose_inter)
-               
-            # Checking the third approach direction:
-            if self.distance_2 < self.gripper_height_tolerance: 
-               # End Effector Orientation Based on the Franka Panda Convention: 
-               '''self.z_EE = self.unit_u2
-               self.x_EE = np.asarray([0,0,1])
-               self.y_EE = self.z_C1
-               self.x_EE = np.cross(self.y_EE, self.z_EE)
-               self.R_EE = np.zeros([3,3])
-               self.R_EE[:, 0] = self.x_EE
-               self.R_EE[:, 1] = self.y_EE
-               self.R_EE[:, 2] = self.z_EE'''
-
-               # From Baseline 3:
-               self.z_EE = self.unit_u2
-               # self.x_EE = np.asarray([0,0,-1])
-               self.x_EE = np.asarray([0,0,1])
-               self.y_EE = np.cross(self.z_EE, self.x_EE)
-               self.R_EE = np.zeros([3,3])
-               self.R_EE[:, 0] = self.x_EE
-               self.R_EE[:, 1] = self.y_EE
-               self.R_EE[:, 2] = self.z_EE
-
-               # Intermediate end-effector pose orientation:
-               self.R_EE_inter = self.R_EE
-
-               # End Effector Position: 
-               self.p_EE = np.add(self.grasp_center, np.dot(-1*(self.g_delta + self.gripper_height_tolerance), self.unit_u2))
-               self.p_EE_inter = np.add(self.grasp_center, np.dot(-1*(self.g_delta_inter + self.gripper_height_tolerance), self.unit_u2)) 
-
-               # End Effector pose as an element of SE(3) (4x4 transformation matrix):
-               self.gripper_pose = np.zeros([4,4])
-               self.gripper_pose[0:3, 0:3] = self.R_EE
-               self.gripper_pose[0:3, 3] = np.reshape(self.p_EE, [3])
-               self.gripper_pose[3,3] = 1
-               self.computed_end_effector_poses.append(self.gripper_pose)
-
-               # End Effector pose as an element of SE(3) (4x4 transformation matrix):
-               self.gripper_pose_inter = np.zeros([4,4])
-               self.gripper_pose_inter[0:3, 0:3] = self.R_EE_inter
-               self.gripper_pose_inter[0:3, 3] = np.reshape(self.p_EE_inter, [3])
-               self.gripper_pose[3,3] = 1
-               self.computed_end_effector_poses_inter.append(self.gripper_pose_inter)
-
-               # Saving the pose of the corresponding object-end_effector contact reference frames:
-               self.sampled_pose_c1 = np.zeros([4,4])
-               self.sampled_pose_c1[0:3, 0:3] = R_C1
-               self.sampled_pose_c1[0:3, 3] = np.reshape(self.position_C1, [3])
-               self.sampled_pose_c1[3,3] = 1
-               self.sampled_contacts_c1.append(self.sampled_pose_c1)
-
-               self.sampled_pose_c2 = np.zeros([4,4])
-               self.sampled_pose_c2[0:3, 0:3] = R_C2
-               self.sampled_pose_c2[0:3, 3] = np.reshape(self.position_C2, [3])
-               self.sampled_pose_c2[3,3] = 1
-               self.sampled_contacts_c2.append(self.sampled_pose_c2)
-
-               # Appending the grasp center and normals for visualization:
-               self.grasp_centers.append(self.grasp_center)
-               self.normals_c1.append(R_C1[:, 2])
-               self.normals_c2.append(R_C2[:, 2])
-               self.unit_ulist.append(self.unit_u2)
-
-               # Additional attribute for experimental purposes:
-               self.approach_dir_other_poses.append(self.gripper_pose)
-               self.approach_dir_other_inter_poses.append(self.gripper_pose_inter)
-
-            # Checking the fifth approach direction:
-            if self.distance_3 < self.gripper_height_tolerance: 
-               # End Effector Orientation Based on the Franka Panda Convention: 
-               '''self.z_EE = self.unit_u3
-               self.y_EE = self.z_C2
-               self.x_EE = np.cross(self.y_EE, self.z_EE)
-               self.R_EE = np.zeros([3,3])
-               self.R_EE[:, 0] = self.x_EE
-               self.R_EE[:, 1] = self.y_EE
-               self.R_EE[:, 2] = self.z_EE'''
-
-               # From Baseline 3:
-               self.z_EE = self.unit_u3
-               # self.x_EE = np.asarray([0,0,-1])
-               self.x_EE = np.asarray([0,0,1])
-               self.y_EE = np.cross(self.z_EE, self.x_EE)
-               self.R_EE = np.zeros([3,3])
-               self.R_EE[:, 0] = self.x_EE
-               self.R_EE[:, 1] = self.y_EE
-               self.R_EE[:, 2] = self.z_EE
-
-               # Intermediate end-effector pose orientation:
-               self.R_EE_inter = self.R_EE
-
-               # End Effector Position: 
-               self.p_EE = np.add(self.grasp_center, np.dot(-1*(self.g_delta + self.gripper_height_tolerance), self.unit_u3))
-               self.p_EE_inter = np.add(self.grasp_center, np.dot(-1*(self.g_delta_inter + self.gripper_height_tolerance), self.unit_u3)) 
-
-               # End Effector pose as an element of SE(3) (4x4 transformation matrix):
-               self.gripper_pose = np.zeros([4,4])
-               self.gripper_pose[0:3, 0:3] = self.R_EE
-               self.gripper_pose[0:3, 3] = np.reshape(self.p_EE, [3])
-               self.gripper_pose[3,3] = 1
-               self.computed_end_effector_poses.append(self.gripper_pose)
-
-               # End Effector pose as an element of SE(3) (4x4 transformation matrix):
-               self.gripper_pose_inter = np.zeros([4,4])
-               self.gripper_pose_inter[0:3, 0:3] = self.R_EE_inter
-               self.gripper_pose_inter[0:3, 3] = np.reshape(self.p_EE_inter, [3])
-               self.gripper_pose[3,3] = 1
-               self.computed_end_effector_poses_inter.append(self.gripper_pose_inter)
-
-               # Saving the pose of the corresponding object-end_effector contact reference frames:
-               self.sampled_pose_c1 = np.zeros([4,4])
-               self.sampled_pose_c1[0:3, 0:3] = R_C1
-               self.sampled_pose_c1[0:3, 3] = np.reshape(self.position_C1, [3])
-               self.sampled_pose_c1[3,3] = 1
-               self.sampled_contacts_c1.append(self.sampled_pose_c1)
-
-               self.sampled_pose_c2 = np.zeros([4,4])
-               self.sampled_pose_c2[0:3, 0:3] = R_C2
-               self.sampled_pose_c2[0:3, 3] = np.reshape(self.position_C2, [3])
-               self.sampled_pose_c2[3,3] = 1
-               self.sampled_contacts_c2.append(self.sampled_pose_c2)
-
-               # Appending the grasp center and normals for visualization:
-               self.grasp_centers.append(self.grasp_center)
-               self.normals_c1.append(R_C1[:, 2])
-               self.normals_c2.append(R_C2[:, 2])
-               self.unit_ulist.append(self.unit_u3)
-               
-               # Additional attribute for experimental purposes:
-               self.approach_dir_other_poses.append(self.gripper_pose)
-               self.approach_dir_other_inter_poses.append(self.gripper_pose_inter)
-
-         # Outer conditional statement to check whether the dimensions along which we are grasping are less than the gripper width tolerance:
-         if self.x_dim < self.gripper_width_tolerance:
-            # Approach Direction 2:
-            self.plane_points_1 = np.asarray([self.transformed_vertices_object_frame[3], self.transformed_vertices_object_frame[6], self.transformed_vertices_object_frame[4], self.transformed_vertices_object_frame[5]])
-            # Approach Direction 1:
-            self.plane_points_2 = np.asarray([self.transformed_vertices_object_frame[3], self.transformed_vertices_object_frame[0], self.transformed_vertices_object_frame[1], self.transformed_vertices_object_frame[6]])
-            # Approach Direction 4:
-            self.plane_points_3 = np.asarray([self.transformed_vertices_object_frame[4], self.transformed_vertices_object_frame[7], self.transformed_vertices_object_frame[2], self.transformed_vertices_object_frame[5]])
-
-            self.center_point_plane_1 = np.asarray([self.p_base[0], self.p_base[1], self.plane_points_1[0, 2]])
-            self.center_point_plane_2 = np.asarray([self.p_base[0], self.plane_points_2[0, 1], self.p_base[2]])
-            self.center_point_plane_3 = np.asarray([self.p_base[0], self.plane_points_3[0, 1], self.p_base[2]]) 
-
-            # Orientation of the contact reference frames: 
-            # Getting an orthogonal reference frame where the z axis is along the normal: 
-            # Frame C1:
-            self.z_C1 = np.asarray([-1, 0, 0])
-            self.x_C1 = np.random.randn(3)
-            self.x_C1 -= self.x_C1.dot(self.z_C1)*self.z_C1
-            self.x_C1 /= la.norm(self.x_C1)
-            self.y_C1 = np.cross(self.z_C1, self.x_C1)
-            R_C1 = np.zeros([3,3])
-            R_C1[:, 0] = self.x_C1
-            R_C1[:, 1] = self.y_C1
-            R_C1[:, 2] = self.z_C1
-
-            # Frame C2:
-            self.z_C2 = np.asarray([1, 0, 0])
-            self.x_C2 = np.random.randn(3)
-            self.x_C2 -= self.x_C2.dot(self.z_C2)*self.z_C2
-            self.x_C2 /= la.norm(self.x_C2)
-            self.y_C2 = np.cross(self.z_C2, self.x_C2)
-            R_C2 = np.zeros([3,3])
-            R_C2[:, 0] = self.x_C2
-            R_C2[:, 1] = self.y_C2
-            R_C2[:, 2] = self.z_C2
-
-            self.position_C1 = np.asarray([self.transformed_vertices_object_frame[1,0], self.ideal_grasping_region_grid_centers[i][0], self.ideal_grasping_region_grid_centers[i][1]])
-            self.position_C2 = np.asarray([self.transformed_vertices_object_frame[0,0], self.ideal_grasping_region_grid_centers[i][0], self.ideal_grasping_region_grid_centers[i][1]])
-            self.grasp_center = np.add(self.position_C1, np.dot((self.x_dim)/2, self.z_C1)) 
-
-            self.distance_1, self.unit_u1 = self.get_distance(self.plane_points_1, self.center_point_plane_1, self.grasp_center)
-            self.distance_2, self.unit_u2 = self.get_distance(self.plane_points_2, self.center_point_plane_2, self.grasp_center)
-            self.distance_3, self.unit_u3 = self.get_distance(self.plane_points_3, self.center_point_plane_3, self.grasp_center)
-
-            # Checking the second approach direction:
-            if self.distance_1 < self.gripper_height_tolerance:
-               # End Effector Orientation Based on the Franka Panda Convention: 
-               '''self.z_EE = -1*self.unit_u1
-               self.y_EE = self.z_C2
-               self.x_EE = np.cross(self.y_EE, self.z_EE)
-               self.R_EE = np.zeros([3,3])
-               self.R_EE[:, 0] = self.x_EE
-               self.R_EE[:, 1] = self.y_EE
-               self.R_EE[:, 2] = self.z_EE'''
-
-               # From Baseline 3:
-               self.z_EE = self.unit_u1
-               # self.y_EE = np.asarray([0,1,0])
-               self.y_EE = np.asarray([0,-1,0])
-               # self.y_EE = np.asarray([1,0,0])
-               self.x_EE = np.cross(self.y_EE, self.z_EE)
-               self.R_EE = np.zeros([3,3])
-               self.R_EE[:, 0] = self.x_EE
-               self.R_EE[:, 1] = self.y_EE
-               self.R_EE[:, 2] = self.z_EE
-
-               # Intermediate end-effector pose orientation:
-               self.R_EE_inter = self.R_EE
-
-               # End Effector Position: 
-               self.p_EE = np.add(self.grasp_center, np.dot(-1*(self.g_delta + self.gripper_height_tolerance), self.unit_u1)) 
-               self.p_EE_inter = np.add(self.grasp_center, np.dot(-1*(self.g_delta_inter + self.gripper_height_tolerance), self.unit_u1))  
-
-               # End Effector pose as an element of SE(3) (4x4 transformation matrix):
-               self.gripper_pose = np.zeros([4,4])
-               self.gripper_pose[0:3, 0:3] = self.R_EE
-               self.gripper_pose[0:3, 3] = np.reshape(self.p_EE, [3])
-               self.gripper_pose[3,3] = 1
-               self.computed_end_effector_poses.append(self.gripper_pose)
-
-               # End Effector pose as an element of SE(3) (4x4 transformation matrix):
-               self.gripper_pose_inter = np.zeros([4,4])
-               self.gripper_pose_inter[0:3, 0:3] = self.R_EE_inter
-               self.gripper_pose_inter[0:3, 3] = np.reshape(self.p_EE_inter, [3])
-               self.gripper_pose[3,3] = 1
-               self.computed_end_effector_poses_inter.append(self.gripper_pose_inter)
-
-               # Saving the pose of the corresponding object-end_effector contact reference frames:
-               self.sampled_pose_c1 = np.zeros([4,4])
-               self.sampled_pose_c1[0:3, 0:3] = R_C1
-               self.sampled_pose_c1[0:3, 3] = np.reshape(self.position_C1, [3])
-               self.sampled_pose_c1[3,3] = 1
-               self.sampled_contacts_c1.append(self.sampled_pose_c1)
-
-               self.sampled_pose_c2 = np.zeros([4,4])
-               self.sampled_pose_c2[0:3, 0:3] = R_C2
-               self.sampled_pose_c2[0:3, 3] = np.reshape(self.position_C2, [3])
-               self.sampled_pose_c2[3,3] = 1
-               self.sampled_contacts_c2.append(self.sampled_pose_c2)
-
-               # Appending the grasp center and normals for visualization:
-               self.grasp_centers.append(self.grasp_center)
-               self.normals_c1.append(R_C1[:, 2])
-               self.normals_c2.append(R_C2[:, 2])
-               self.unit_ulist.append(self.unit_u1)
-
-               # Additional attribute for experimental purposes:
-               self.approach_dir_2_poses.append(self.gripper_pose)
-               self.approach_dir_2_inter_poses.append(self.gripper_pose_inter)
-               
-            # Checking the first approach direction:
-            if self.distance_2 < self.gripper_height_tolerance: 
-               # End Effector Orientation Based on the Franka Panda Convention: 
-               '''self.z_EE = self.unit_u2
-               self.y_EE = self.z_C2
-               self.x_EE = np.cross(self.y_EE, self.z_EE)
-               self.R_EE = np.zeros([3,3])
-               self.R_EE[:, 0] = self.x_EE
-               self.R_EE[:, 1] = self.y_EE
-               self.R_EE[:, 2] = self.z_EE'''
-
-               # From Baseline 3:
-               self.z_EE = self.unit_u2
-               # self.x_EE = np.asarray([0,0,-1])
-               self.x_EE = np.asarray([0,0,1])
-               self.y_EE = np.cross(self.z_EE, self.x_EE)
-               self.R_EE = np.zeros([3,3])
-               self.R_EE[:, 0] = self.x_EE
-               self.R_EE[:, 1] = self.y_EE
-               self.R_EE[:, 2] = self.z_EE
-
-               # Intermediate end-effector pose orientation:
-               self.R_EE_inter = self.R_EE
-
-               # End Effector Position: 
-               self.p_EE = np.add(self.grasp_center, np.dot(-1*(self.g_delta + self.gripper_height_tolerance), self.unit_u2))
-               self.p_EE_inter = np.add(self.grasp_center, np.dot(-1*(self.g_delta_inter + self.gripper_height_tolerance), self.unit_u2)) 
-
-               # End Effector pose as an element of SE(3) (4x4 transformation matrix):
-               self.gripper_pose = np.zeros([4,4])
-               self.gripper_pose[0:3, 0:3] = self.R_EE
-               self.gripper_pose[0:3, 3] = np.reshape(self.p_EE, [3])
-               self.gripper_pose[3,3] = 1
-               self.computed_end_effector_poses.append(self.gripper_pose)
-
-               # End Effector pose as an element of SE(3) (4x4 transformation matrix):
-               self.gripper_pose_inter = np.zeros([4,4])
-               self.gripper_pose_inter[0:3, 0:3] = self.R_EE_inter
-               self.gripper_pose_inter[0:3, 3] = np.reshape(self.p_EE_inter, [3])
-               self.gripper_pose[3,3] = 1
-               self.computed_end_effector_poses_inter.append(self.gripper_pose_inter)
-
-               # Saving the pose of the corresponding object-end_effector contact reference frames:
-               self.sampled_pose_c1 = np.zeros([4,4])
-               self.sampled_pose_c1[0:3, 0:3] = R_C1
-               self.sampled_pose_c1[0:3, 3] = np.reshape(self.position_C1, [3])
-               self.sampled_pose_c1[3,3] = 1
-               self.sampled_contacts_c1.append(self.sampled_pose_c1)
-
-               self.sampled_pose_c2 = np.zeros([4,4])
-               self.sampled_pose_c2[0:3, 0:3] = R_C2
-               self.sampled_pose_c2[0:3, 3] = np.reshape(self.position_C2, [3])
-               self.sampled_pose_c2[3,3] = 1
-               self.sampled_contacts_c2.append(self.sampled_pose_c2)
-
-               # Appending the grasp center and normals for visualization:
-               self.grasp_centers.append(self.grasp_center)
-               self.normals_c1.append(R_C1[:, 2])
-               self.normals_c2.append(R_C2[:, 2])
-               self.unit_ulist.append(self.unit_u2)
-
-               # Additional attribute for experimental purposes:
-               self.approach_dir_other_poses.append(self.gripper_pose)
-               self.approach_dir_other_inter_poses.append(self.gripper_pose_inter)
-
-            # Checking the fourth approach direction:
-            if self.distance_3 < self.gripper_height_tolerance: 
-               # End Effector Orientation Based on the Franka Panda Convention: 
-               '''self.z_EE = self.unit_u3
-               self.y_EE = self.z_C2
-               self.x_EE = np.cross(self.y_EE, self.z_EE)
-               self.R_EE = np.zeros([3,3])
-               self.R_EE[:, 0] = self.x_EE
-               self.R_EE[:, 1] = self.y_EE
-               self.R_EE[:, 2] = self.z_EE'''
-
-               # From Baseline 3:
-               self.z_EE = self.unit_u3
-               # self.x_EE = np.asarray([0,0,-1])
-               self.x_EE = np.asarray([0,0,1])
-               self.y_EE = np.cross(self.z_EE, self.x_EE)
-               self.R_EE = np.zeros([3,3])
-               self.R_EE[:, 0] = self.x_EE
-               self.R_EE[:, 1] = self.y_EE
-               self.R_EE[:, 2] = self.z_EE
-
-               # Intermediate end-effector pose orientation:
-               self.R_EE_inter = self.R_EE
-
-               # End Effector Position: 
-               self.p_EE = np.add(self.grasp_center, np.dot(-1*(self.g_delta + self.gripper_height_tolerance), self.unit_u3))
-               self.p_EE_inter = np.add(self.grasp_center, np.dot(-1*(self.g_delta_inter + self.gripper_height_tolerance), self.unit_u3)) 
-
-               # End Effector pose as an element of SE(3) (4x4 transformation matrix):
-               self.gripper_pose = np.zeros([4,4])
-               self.gripper_pose[0:3, 0:3] = self.R_EE
-               self.gripper_pose[0:3, 3] = np.reshape(self.p_EE, [3])
-               self.gripper_pose[3,3] = 1
-               self.computed_end_effector_poses.append(self.gripper_pose)
-
-               # End Effector pose as an element of SE(3) (4x4 transformation matrix):
-               self.gripper_pose_inter = np.zeros([4,4])
-               self.gripper_pose_inter[0:3, 0:3] = self.R_EE_inter
-               self.gripper_pose_inter[0:3, 3] = np.reshape(self.p_EE_inter, [3])
-               self.gripper_pose[3,3] = 1
-               self.computed_end_effector_poses_inter.append(self.gripper_pose_inter)
-
-               # Saving the pose of the corresponding object-end_effector contact reference frames:
-               self.sampled_pose_c1 = np.zeros([4,4])
-               self.sampled_pose_c1[0:3, 0:3] = R_C1
-               self.sampled_pose_c1[0:3, 3] = np.reshape(self.position_C1, [3])
-               self.sampled_pose_c1[3,3] = 1
-               self.sampled_contacts_c1.append(self.sampled_pose_c1)
-
-               self.sampled_pose_c2 = np.zeros([4,4])
-               self.sampled_pose_c2[0:3, 0:3] = R_C2
-               self.sampled_pose_c2[0:3, 3] = np.reshape(self.position_C2, [3])
-               self.sampled_pose_c2[3,3] = 1
-               self.sampled_contacts_c2.append(self.sampled_pose_c2)
-
-               # Appending the grasp center and normals for visualization:
-               self.grasp_centers.append(self.grasp_center)
-               self.normals_c1.append(R_C1[:, 2])
-               self.normals_c2.append(R_C2[:, 2])
-               self.unit_ulist.append(self.unit_u3)
-
-               # Additional attribute for experimental purposes:
-               self.approach_dir_other_poses.append(self.gripper_pose)
-               self.approach_dir_other_inter_poses.append(self.gripper_pose_inter)
-      
-      # Transforming the sampled end-effector poses back to the base reference frame.
-      self.computed_end_effector_poses_base = []
-      self.computed_end_effector_poses_inter_base = []
-
-      # Additional attributes for the purposes of conducting experiments:
-      self.approach_dir_2_poses_base = []
-      self.approach_dir_2_inter_poses_base = []
-      self.approach_dir_other_poses_base = []
-      self.approach_dir_other_inter_poses_base = []
- 
-      for pose in self.computed_end_effector_poses:
-         R_pose = pose[0:3, 0:3]
-         p_pose = np.reshape(pose[0:3, 3], [3,1])
-         self.R_EE_base = np.matmul(self.R_bounding_box, R_pose) 
-         self.p_EE_base = self.p_bounding_box + np.dot(self.R_bounding_box, p_pose)
-         self.gripper_pose_base = np.zeros([4,4])
-         self.gripper_pose_base[0:3, 0:3] = self.R_EE_base
-         self.gripper_pose_base[0:3, 3] = np.reshape(self.p_EE_base, [3])
-         self.gripper_pose_base[3,3] = 1
-         self.computed_end_effector_poses_base.append(self.gripper_pose_base) 
-
-      # The intermediate end-effector poses are also transformed from the object reference frame to the base reference frame. 
-      for pose in self.computed_end_effector_poses_inter:
-         R_pose_inter = pose[0:3, 0:3]
-         p_pose_inter = np.reshape(pose[0:3, 3], [3,1])
-         self.R_EE_inter_base = np.matmul(self.R_bounding_box, R_pose_inter) 
-         self.p_EE_inter_base = self.p_bounding_box + np.dot(self.R_bounding_box, p_pose_inter)
-         self.gripper_pose_inter_base = np.zeros([4,4])
-         self.gripper_pose_inter_base[0:3, 0:3] = self.R_EE_inter_base
-         self.gripper_pose_inter_base[0:3, 3] = np.reshape(self.p_EE_inter_base, [3])
-         self.gripper_pose_inter_base[3,3] = 1
-         self.computed_end_effector_poses_inter_base.append(self.gripper_pose_inter_base)
-
-      # Additional loop for the purpose of conducting experiments:
-      for pose in self.approach_dir_2_poses:
-         R_pose = pose[0:3, 0:3]
-         p_pose = np.reshape(pose[0:3, 3], [3,1])
-         self.R_EE_base = np.matmul(self.R_bounding_box, R_pose) 
-         self.p_EE_base = self.p_bounding_box + np.dot(self.R_bounding_box, p_pose)
-         self.gripper_pose_base = np.zeros([4,4])
-         self.gripper_pose_base[0:3, 0:3] = self.R_EE_base
-         self.gripper_pose_base[0:3, 3] = np.reshape(self.p_EE_base, [3])
-         self.gripper_pose_base[3,3] = 1
-         self.approach_dir_2_poses_base.append(self.gripper_pose_base)
-
-      for pose in self.approach_dir_2_inter_poses:
-         R_pose_inter = pose[0:3, 0:3]
-         p_pose_inter = np.reshape(pose[0:3, 3], [3,1])
-         self.R_EE_inter_base = np.matmul(self.R_bounding_box, R_pose_inter) 
-         self.p_EE_inter_base = self.p_bounding_box + np.dot(self.R_bounding_box, p_pose_inter)
-         self.gripper_pose_inter_base = np.zeros([4,4])
-         self.gripper_pose_inter_base[0:3, 0:3] = self.R_EE_inter_base
-         self.gripper_pose_inter_base[0:3, 3] = np.reshape(self.p_EE_inter_base, [3])
-         self.gripper_pose_inter_base[3,3] = 1
-         self.approach_dir_2_inter_poses_base.append(self.gripper_pose_inter_base)
-
-      # Additional loop for the purpose of conducting experiments:
-      for pose in self.approach_dir_other_poses:
-         R_pose = pose[0:3, 0:3]
-         p_pose = np.reshape(pose[0:3, 3], [3,1])
-         self.R_EE_base = np.matmul(self.R_bounding_box, R_pose) 
-         self.p_EE_base = self.p_bounding_box + np.dot(self.R_bounding_box, p_pose)
-         self.gripper_pose_base = np.zeros([4,4])
-         self.gripper_pose_base[0:3, 0:3] = self.R_EE_base
-         self.gripper_pose_base[0:3, 3] = np.reshape(self.p_EE_base, [3])
-         self.gripper_pose_base[3,3] = 1
-         self.approach_dir_other_poses_base.append(self.gripper_pose_base)
-
-      for pose in self.approach_dir_other_inter_poses:
-         R_pose_inter = pose[0:3, 0:3]
-         p_pose_inter = np.reshape(pose[0:3, 3], [3,1])
-         self.R_EE_inter_base = np.matmul(self.R_bounding_box, R_pose_inter) 
-         self.p_EE_inter_base = self.p_bounding_box + np.dot(self.R_bounding_box, p_pose_inter)
-         self.gripper_pose_inter_base = np.zeros([4,4])
-         self.gripper_pose_inter_base[0:3, 0:3] = self.R_EE_inter_base
-         self.gripper_pose_inter_base[0:3, 3] = np.reshape(self.p_EE_inter_base, [3])
-         self.gripper_pose_inter_base[3,3] = 1
-         self.approach_dir_other_inter_poses_base.append(self.gripper_pose_inter_base)
+      # All the grid centers of the ideal grasping region are processed at once: 
+      self.end_effector_poses = self.sample_end_effector_poses(self.ideal_grasping_region_grid_centers, self.ideal_grasping_region_grid_planes)
+
+      # Transforming the sampled end-effector poses back to the base reference frame in a single batched operation:
+      self.end_effector_poses_base = self.end_effector_poses.to_frame(self.R_bounding_box, self.p_bounding_box)
+
+      # The attributes below are the stacked arrays of the pose stores and views of them, i.e. the poses are not copied:
+      self.computed_end_effector_poses = self.end_effector_poses.poses
+      self.computed_end_effector_poses_inter = self.end_effector_poses.poses_inter
+      self.sampled_contacts_c1 = self.end_effector_poses.contacts_c1
+      self.sampled_contacts_c2 = self.end_effector_poses.contacts_c2
+      self.grasp_centers = self.end_effector_poses.grasp_centers
+      self.normals_c1 = self.end_effector_poses.normals_c1
+      self.normals_c2 = self.end_effector_poses.normals_c2
+      self.unit_ulist = self.end_effector_poses.approach_dirs
+
+      self.computed_end_effector_poses_base = self.end_effector_poses_base.poses
+      self.computed_end_effector_poses_inter_base = self.end_effector_poses_base.poses_inter
+
+      # Additional attributes for the purposes of conducting experiments (approach direction 2 and the other approach directions):
+      indices_dir_2 = self.end_effector_poses.select([2])
+      indices_dir_other = self.end_effector_poses.select([1, 3, 4, 5])
+
+      self.approach_dir_2_poses = self.end_effector_poses.view('poses', indices_dir_2)
+      self.approach_dir_2_inter_poses = self.end_effector_poses.view('poses_inter', indices_dir_2)
+      self.approach_dir_other_poses = self.end_effector_poses.view('poses', indices_dir_other)
+      self.approach_dir_other_inter_poses = self.end_effector_poses.view('poses_inter', indices_dir_other)
+
+      self.approach_dir_2_poses_base = self.end_effector_poses_base.view('poses', indices_dir_2)
+      self.approach_dir_2_inter_poses_base = self.end_effector_poses_base.view('poses_inter', indices_dir_2)
+      self.approach_dir_other_poses_base = self.end_effector_poses_base.view('poses', indices_dir_other)
+      self.approach_dir_other_inter_poses_base = self.end_effector_poses_base.view('poses_inter', indices_dir_other)
 
    ''' Function for plotting a CUBE:'''
    def plot_cube(self):
@@ -0,0 +1,94 @@
+'''Python Script with batched screw motions (elements of SE(3) obtained by rotating about a screw axis and translating along it).
+
+   A screw motion is described by the unit vector along the screw axis, a point on the axis, the pitch and the magnitude (angle in radians).
+   All the functions accept arrays of screw parameters with the shapes (...,3) for the axes and the points and (...) for the pitches and the
+   angles, which are broadcast against each other, so that many screw motions are computed at once. The rotations are computed using the
+   closed form of the Rodrigues formula: R = cos(theta)*I + sin(theta)*[w] + (1 - cos(theta))*w*w^T.'''
+
+import numpy as np
+from numpy import linalg as la
+
+
+def skew(vectors):
+    '''
+        Skew symmetric matrices [w] of shape (...,3,3) such that [w]*x = w x x for every vector w of vectors (array of shape (...,3)).
+    '''
+    vectors = np.asarray(vectors, dtype=np.float64)
+    matrices = np.zeros(vectors.shape + (3,))
+    matrices[..., 0, 1] = -vectors[..., 2]
+    matrices[..., 0, 2] = vectors[..., 1]
+    matrices[..., 1, 0] = vectors[..., 2]
+    matrices[..., 1, 2] = -vectors[..., 0]
+    matrices[..., 2, 0] = -vectors[..., 1]
+    matrices[..., 2, 1] = vectors[..., 0]
+    return matrices
+
+
+def axis_angle_to_rotation(axes, angles):
+    '''
+        Rotation matrices of shape (...,3,3) about the given axes by the given angles.
+        axes: numpy array of shape (...,3), the axes are normalized
+        angles: numpy array of shape (...) (or a float), angles in radians
+    '''
+    axes = np.asarray(axes, dtype=np.float64)
+    axes = axes/la.norm(axes, axis=-1, keepdims=True)
+    angles = np.asarray(angles, dtype=np.float64)
+    shape = np.broadcast_shapes(axes.shape[:-1], angles.shape)
+    axes = np.broadcast_to(axes, shape + (3,))
+
+    cos = np.cos(angles)[..., np.newaxis, np.newaxis]
+    sin = np.sin(angles)[..., np.newaxis, np.newaxis]
+    return cos*np.identity(3) + sin*skew(axes) + (1 - cos)*(axes[..., :, np.newaxis]*axes[..., np.newaxis, :])
+
+
+def screw_transformations(axes, points, pitches, angles):
+    '''
+        Transformations of shape (...,4,4) of the screw motions g = [[R, (I - R)*q + h*theta*w], [0, 1]].
+        axes: numpy array of shape (...,3), unit vectors w along the screw axes (they are normalized)
+        points: numpy array of shape (...,3), points q on the screw axes
+        pitches: numpy array of shape (...) (or a float), pitches h of the screw motions, 0 for a pure rotation
+        angles: numpy array of shape (...) (or a float), magnitudes theta of the screw motions in radians
+    '''
+    axes = np.asarray(axes, dtype=np.float64)
+    axes = axes/la.norm(axes, axis=-1, keepdims=True)
+    points = np.asarray(points, dtype=np.float64)
+    pitches = np.asarray(pitches, dtype=np.float64)
+    angles = np.asarray(angles, dtype=np.float64)
+    shape = np.broadcast_shapes(axes.shape[:-1], points.shape[:-1], pitches.shape, angles.shape)
+
+    R = axis_angle_to_rotation(axes, np.broadcast_to(angles, shape))
+    points = np.broadcast_to(points, shape + (3,))
+
+    g = np.zeros(shape + (4, 4))
+    g[..., 0:3, 0:3] = R
+    g[..., 0:3, 3] = points - np.matmul(R, points[..., np.newaxis])[..., 0] + (pitches*angles)[..., np.newaxis]*axes
+    g[..., 3, 3] = 1
+    return g
+
+
+def apply_screw_motion(poses, axes, points, pitches, angles, out=None):
+    '''
+        Applies the screw motions to a stack of poses, i.e. g*pose for every pose, with a single batched matrix multiplication.
+        poses: numpy array of shape (K,4,4), elements of SE(3) expressed in the same reference frame as the screw axes
+        axes, points, pitches, angles: screw parameters (see screw_transformations), either a single screw motion or one per pose
+        out: numpy array of shape (K,4,4) used to store the result, a new array is created when None
+    '''
+    g = screw_transformations(axes, points, pitches, angles)
+    return np.matmul(g, np.asarray(poses, dtype=np.float64), out=out)
+
+
+def screw_path(poses, axes, points, pitches, angles, num_samples):
+    '''
+        Poses along the screw motions at num_samples equally spaced fractions of the angles (from 0 to the angles, both included), for
+        example to preview the trajectory of the grasps while pivoting. Returns an array of shape (num_samples,K,4,4) where the first
+        index is the sample along the path.
+        poses: numpy array of shape (K,4,4)
+        axes, points, pitches, angles: screw parameters (see screw_transformations), either a single screw motion or one per pose
+    '''
+    # The samples along the path are stacked along a new first axis of the screw parameters:
+    batch_ndim = max(np.ndim(axes) - 1, np.ndim(points) - 1, np.ndim(pitches), np.ndim(angles))
+    fractions = np.reshape(np.linspace(0, 1, num_samples), (num_samples,) + (1,)*batch_ndim)
+    g = screw_transformations(axes, points, pitches, fractions*np.asarray(angles, dtype=np.float64))
+    if batch_ndim == 0:
+        g = g[:, np.newaxis]
+    return np.matmul(g, np.asarray(poses, dtype=np.float64))
@@ -0,0 +1,47 @@
+'''Python Script with batched rigid body transformations (elements of SE(3)) for arrays of points stored as rows of an (N,3) array.
+   Both functions accept an optional output buffer, which can also be the input array itself to transform the points in place.'''
+
+import numpy as np
+
+
+def transform_points(points, R, p=None, scale=None, out=None):
+    '''
+        Applies y = R*(scale*x) + p to every row x of points.
+        points: numpy array of shape (N,3)
+        R: numpy array of shape (3,3), rotation matrix
+        p: numpy array with 3 elements (any shape), position vector. No translation is applied when None
+        scale: float, scale factor applied to the points before the rotation (for example 0.001 to convert millimeters to meters)
+        out: numpy array of shape (N,3) used to store the result, a new array is created when None
+    '''
+    points = np.asarray(points, dtype=np.float64)
+    if out is None:
+        out = np.empty(points.shape)
+
+    if scale is None:
+        np.matmul(points, np.transpose(R), out=out)
+    else:
+        np.matmul(points*scale, np.transpose(R), out=out)
+
+    if p is not None:
+        out += np.reshape(p, [1,3])
+    return out
+
+
+def inverse_transform_points(points, R, p=None, out=None):
+    '''
+        Applies y = R^T*(x - p) to every row x of points, i.e. the inverse of transform_points when R is a rotation matrix.
+        This expresses points given in a fixed frame in the reference frame whose pose with respect to the fixed frame is (R, p).
+        points: numpy array of shape (N,3)
+        R: numpy array of shape (3,3)
+        p: numpy array with 3 elements (any shape), position vector. No translation is applied when None
+        out: numpy array of shape (N,3) used to store the result, a new array is created when None
+    '''
+    points = np.asarray(points, dtype=np.float64)
+    if out is None:
+        out = np.empty(points.shape)
+
+    if p is None:
+        np.matmul(points, R, out=out)
+    else:
+        np.matmul(points - np.reshape(p, [1,3]), R, out=out)
+    return out
@@ -0,0 +1,83 @@
+'''Script to compare the dynamic int8 quantized metric network with the float32 metric network on the sample point clouds.
+   For every point cloud the metric values predicted by point_cloud.predict_metric_generic are compared after the min-max normalization,
+   along with the ideal grasping regions computed from them and the number of contacts evaluated per second.
+
+   Usage:
+   python -u quantization_report.py --folder partial_point_cloud --repeats 20'''
+
+# Open3D for point cloud processing and visualization
+import open3d as o3d
+
+import numpy as np
+import os
+import io
+import contextlib
+
+# Functionalities for point cloud processing and computing the ideal grasping region:
+from point_cloud_module.process_point_cloud import point_cloud
+from main_pivoting import build_cloud_object
+
+from time import perf_counter
+import argparse
+
+'''Function to sample the contacts on the bounding box of a point cloud using the same parameters as main_pivoting.py'''
+def sample_contacts(filename):
+    cloud_object = point_cloud()
+    pcd = o3d.io.read_point_cloud(filename)
+    cloud_object = build_cloud_object(cloud_object, pcd)
+
+    # Specifying gripper tolerances:
+    cloud_object.gripper_width_tolerance = 0.08
+    cloud_object.gripper_height_tolerance = 0.041
+
+    cloud_object.compute_bounding_box()
+
+    # Screw Parameters:
+    cloud_object.screw_axis = np.asarray([0, 1, 0])
+    cloud_object.point = np.asarray([cloud_object.transformed_vertices_object_frame[1,0], np.divide((cloud_object.transformed_vertices_object_frame[1,1] + cloud_object.transformed_vertices_object_frame[7,1]),2), cloud_object.transformed_vertices_object_frame[1,2]])
+    cloud_object.moment = np.cross(cloud_object.point, cloud_object.screw_axis)
+
+    cloud_object.generate_contacts()
+    return cloud_object
+
+'''Function to predict the metric and the ideal grasping region with or without quantization. Returns the normalized metric values,
+   the grid centers of the ideal grasping region and the number of contacts evaluated per second.'''
+def evaluate(cloud_object, quantized, repeats):
+    cloud_object.metric_quantized = quantized
+
+    # The first call loads the model into the cache, it is not included in the timing:
+    with contextlib.redirect_stdout(io.StringIO()):
+        cloud_object.predict_metric_generic()
+        time_start = perf_counter()
+        for i in range(repeats):
+            cloud_object.predict_metric_generic()
+        time_end = perf_counter()
+        cloud_object.get_ideal_grasping_region()
+
+    contacts_per_second = repeats*cloud_object.x_data.shape[0]/(time_end - time_start)
+    region = set(tuple(np.round(gc, 10)) for gc in cloud_object.ideal_grasping_region_grid_centers)
+    return np.copy(cloud_object.predicted), region, contacts_per_second
+
+# MAIN FUNCTION:
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Accuracy report for the dynamic int8 quantized metric network')
+    parser.add_argument('--folder', type=str, default='partial_point_cloud', help='Folder containing the point clouds (.ply)')
+    parser.add_argument('--repeats', type=int, default=20, help='Number of timed metric predictions per point cloud')
+    args = parser.parse_args()
+
+    print(f'{"point cloud":<36}{"contacts":>10}{"max abs err":>14}{"mean abs err":>14}{"region IoU":>12}{"float32 c/s":>14}{"int8 c/s":>14}')
+    for name in sorted(os.listdir(args.folder)):
+        if not name.endswith('.ply'):
+            continue
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                cloud_object = sample_contacts(os.path.join(args.folder, name))
+            predicted_float, region_float, rate_float = evaluate(cloud_object, False, args.repeats)
+            predicted_int8, region_int8, rate_int8 = evaluate(cloud_object, True, args.repeats)
+        except Exception as e:
+            print(f'{name:<36}skipped: {type(e).__name__}: {e}')
+            continue
+
+        error = np.abs(predicted_int8 - predicted_float)
+        iou = len(region_float & region_int8)/max(len(region_float | region_int8), 1)
+        print(f'{name:<36}{predicted_float.shape[0]:>10}{np.max(error):>14.5f}{np.mean(error):>14.5f}{iou:>12.3f}{rate_float:>14.0f}{rate_int8:>14.0f}')